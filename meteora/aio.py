@@ -0,0 +1,288 @@
+"""Asynchronous HTTP engine.
+
+Coroutines to send the requests of `meteora.clients.base.BaseRequestClient` with an
+`httpx.AsyncClient`, so that clients can be used from an asyncio event loop without
+blocking it (see the `aget_ts_df` method of the clients). Responses are converted to
+`requests.Response` objects and read from/written to the cache of the client's
+`requests_cache.CachedSession`, so that the cache semantics (cache keys, expiration,
+allowable codes and conditional requests) are the same as for synchronous requests.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import datetime as dt
+import io
+import logging as lg
+import time
+from collections.abc import AsyncIterator
+
+import requests
+import requests_cache
+import urllib3
+from requests.structures import CaseInsensitiveDict
+from requests_cache.policy import CacheActions, set_request_headers
+from requests_cache.session import get_504_response
+
+from meteora import rate_limit, settings, utils
+from meteora.optional import require_optional
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+__all__ = ["async_client", "send"]
+
+# the `httpx.AsyncClient`, semaphore and background tasks of the current
+# `async_client` context
+_ASYNC_CLIENT = contextvars.ContextVar("async_client", default=None)
+_SEMAPHORE = contextvars.ContextVar("semaphore", default=None)
+_BACKGROUND_TASKS = contextvars.ContextVar("background_tasks", default=None)
+# references to the background tasks sent outside of an `async_client` context, so
+# that they are not garbage collected before they are done
+_background_tasks = set()
+
+
+@contextlib.asynccontextmanager
+async def async_client(
+    *, max_concurrency: int | None = None, **client_kwargs
+) -> AsyncIterator["httpx.AsyncClient"]:
+    """Open an asynchronous HTTP client shared by all the requests within the context.
+
+    The connections of the client are reused across requests, so that time series
+    fetches that involve many requests to the same provider do not need to establish a
+    new TCP/TLS connection for each request. Contexts can be nested, in which case the
+    outermost client (and concurrency limit) is used. This is notably useful to share
+    connections across several `aget_ts_df` calls, e.g.:
+
+    .. code-block:: python
+
+        async with aio.async_client():
+            ts_df1, ts_df2 = await asyncio.gather(
+                client1.aget_ts_df(...), client2.aget_ts_df(...)
+            )
+
+    Parameters
+    ----------
+    max_concurrency : int, optional
+        Maximum number of concurrent requests. If None, the value from
+        `settings.ASYNC_MAX_CONCURRENCY` is used.
+    **client_kwargs
+        Additional keyword arguments to pass to `httpx.AsyncClient`.
+
+    Yields
+    ------
+    client : httpx.AsyncClient
+        The asynchronous HTTP client.
+    """
+    require_optional({"httpx": httpx}, extra="async", feature="Asynchronous requests")
+    _client = _ASYNC_CLIENT.get()
+    if _client is not None:
+        yield _client
+        return
+
+    if max_concurrency is None:
+        max_concurrency = settings.ASYNC_MAX_CONCURRENCY
+    _client_kwargs = {
+        "limits": httpx.Limits(
+            max_connections=max_concurrency, max_keepalive_connections=max_concurrency
+        ),
+        "follow_redirects": True,
+    }
+    _client_kwargs.update(client_kwargs)
+    async with httpx.AsyncClient(**_client_kwargs) as _client:
+        client_token = _ASYNC_CLIENT.set(_client)
+        semaphore_token = _SEMAPHORE.set(asyncio.Semaphore(max_concurrency))
+        background_tasks = set()
+        background_tasks_token = _BACKGROUND_TASKS.set(background_tasks)
+        try:
+            yield _client
+            # complete the background revalidations before the client is closed
+            await asyncio.gather(*background_tasks, return_exceptions=True)
+        finally:
+            # cancel the pending revalidations if the context exits with an exception
+            for task in background_tasks:
+                task.cancel()
+            await asyncio.gather(*background_tasks, return_exceptions=True)
+            _BACKGROUND_TASKS.reset(background_tasks_token)
+            _SEMAPHORE.reset(semaphore_token)
+            _ASYNC_CLIENT.reset(client_token)
+
+
+def _to_requests_response(
+    httpx_response: "httpx.Response", request: requests.PreparedRequest
+) -> requests.Response:
+    """Convert an `httpx.Response` to a `requests.Response`."""
+    response = requests.Response()
+    response.status_code = httpx_response.status_code
+    response.reason = httpx_response.reason_phrase
+    response.headers = CaseInsensitiveDict(httpx_response.headers)
+    response.url = str(httpx_response.url)
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.request = request
+    # httpx has already decoded the body, so drop the encoding headers of the raw
+    # response (otherwise it could be decoded again when read from the cache)
+    raw_headers = {
+        key: value
+        for key, value in response.headers.items()
+        if key.lower() not in {"content-encoding", "transfer-encoding"}
+    }
+    response.raw = urllib3.HTTPResponse(
+        body=io.BytesIO(httpx_response.content),
+        headers=raw_headers,
+        status=httpx_response.status_code,
+        reason=httpx_response.reason_phrase,
+        preload_content=False,
+        decode_content=False,
+        request_url=response.url,
+    )
+    response._content = httpx_response.content
+    return response
+
+
+def _httpx_kwargs(request_kwargs: dict) -> dict:
+    """Translate `requests` keyword arguments into `httpx` ones."""
+    httpx_kwargs = {}
+    if "timeout" in request_kwargs:
+        httpx_kwargs["timeout"] = request_kwargs["timeout"]
+    if request_kwargs.get("allow_redirects") is not None:
+        httpx_kwargs["follow_redirects"] = request_kwargs["allow_redirects"]
+    return httpx_kwargs
+
+
+async def _send(
+    session: requests.Session, request: requests.PreparedRequest, request_kwargs: dict
+) -> requests.Response:
+    """Send a prepared request with the client of the current context."""
+    # honour the rate limits of the session's transport adapter (only requests that are
+    # actually sent count against them)
+    adapter = session.get_adapter(request.url)
+    if isinstance(adapter, rate_limit.RateLimitAdapter):
+        await adapter.aacquire(request.url)
+    async with async_client() as _client:
+        semaphore = _SEMAPHORE.get()
+        async with semaphore if semaphore is not None else contextlib.nullcontext():
+            start = time.perf_counter()
+            # raise the same exceptions as `requests` so that errors are handled
+            # (e.g., retried) as for synchronous requests
+            try:
+                httpx_response = await _client.request(
+                    request.method,
+                    request.url,
+                    headers=dict(request.headers),
+                    content=request.body,
+                    **_httpx_kwargs(request_kwargs),
+                )
+            except httpx.TimeoutException as exc:
+                raise requests.Timeout(exc, request=request) from exc
+            except httpx.TransportError as exc:
+                raise requests.ConnectionError(exc, request=request) from exc
+    response = _to_requests_response(httpx_response, request)
+    response.elapsed = dt.timedelta(seconds=time.perf_counter() - start)
+    return response
+
+
+async def _send_and_cache(
+    session: requests_cache.CacheMixin,
+    request: requests.PreparedRequest,
+    actions: CacheActions,
+    cached_response: requests_cache.CachedResponse | None,
+    request_kwargs: dict,
+) -> requests.Response:
+    # mirrors `requests_cache.CacheMixin._send_and_cache`
+    request = actions.update_request(request)
+    response = await _send(session, request, request_kwargs)
+    actions.update_from_response(response)
+    if not actions.skip_write:
+        session.cache.save_response(response, actions.cache_key, actions.expires)
+    elif cached_response is not None and response.status_code == 304:
+        return actions.update_revalidated_response(response, cached_response)
+    return requests_cache.OriginalResponse.wrap_response(response, actions)
+
+
+def _log_background_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        utils.log(
+            f"Background revalidation failed: {task.exception()!r}", level=lg.WARNING
+        )
+
+
+def _run_in_background(coro) -> asyncio.Task:
+    """Run a coroutine in a task of the current `async_client` context."""
+    background_tasks = _BACKGROUND_TASKS.get()
+    if background_tasks is None:
+        background_tasks = _background_tasks
+    task = asyncio.ensure_future(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    task.add_done_callback(_log_background_failure)
+    return task
+
+
+async def send(
+    session: requests.Session,
+    request: requests.PreparedRequest,
+    **request_kwargs,
+) -> requests.Response:
+    """Send a prepared request asynchronously, using the cache of `session` if any.
+
+    Parameters
+    ----------
+    session : requests.Session
+        Session of the client. If it is a `requests_cache.CachedSession` (or any
+        session with the `requests_cache.CacheMixin`), its cache and settings are used
+        to look up the response and to store it.
+    request : requests.PreparedRequest
+        Prepared request to send.
+    **request_kwargs
+        Additional keyword arguments, as passed to `requests.Session.get` (only
+        "timeout" and "allow_redirects" are taken into account).
+
+    Returns
+    -------
+    response : requests.Response
+        Response object, either from the cache or from the server.
+    """
+    if not isinstance(session, requests_cache.CacheMixin) or session.settings.disabled:
+        return await _send(session, request, request_kwargs)
+
+    # mirrors `requests_cache.CacheMixin.send`
+    request.headers = set_request_headers(request.headers, None, False, False, False)
+    actions = CacheActions.from_request(
+        session.cache.create_key(request), request, session.settings
+    )
+    cached_response = None
+    if not actions.skip_read:
+        cached_response = session.cache.get_response(actions.cache_key)
+    actions.update_from_cached_response(cached_response, session.cache.create_key)
+
+    if actions.error_504:
+        return get_504_response(request)
+    if actions.resend_async:
+        # stale-while-revalidate: return the stale response and refresh it in the
+        # background
+        _run_in_background(
+            _send_and_cache(session, request, actions, cached_response, request_kwargs)
+        )
+        return cached_response
+    if actions.resend_request:
+        try:
+            response = await _send_and_cache(
+                session, request, actions, cached_response, request_kwargs
+            )
+            if (
+                session.settings.stale_if_error
+                and response.status_code not in session.settings.allowable_codes
+            ):
+                response.raise_for_status()
+            return response
+        except Exception:
+            if actions.is_usable(cached_response, error=True):
+                return cached_response
+            raise
+    if actions.send_request:
+        return await _send_and_cache(
+            session, request, actions, cached_response, request_kwargs
+        )
+    return cached_response
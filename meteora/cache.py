@@ -0,0 +1,1285 @@
+"""Storage and management of the cached responses and files.
+
+The HTTP cache (see `HybridCache`) and the files retrieved with pooch are tracked in an
+index that records their size and (when budgets are set) accesses, so that they can be
+inspected (`inspect`), evicted according to size and age budgets (`prune`) and pinned
+so that they are never evicted (`pin`). Stale responses served from the HTTP cache (see
+`settings.CACHE_STALE_WHILE_REVALIDATE` and `settings.CACHE_STALE_IF_ERROR`) are
+reported in the `"stale"` attribute of the time series data frames (see
+`collect_stale`).
+
+In front of the HTTP cache, an in-process LRU tier keeps the decoded contents (e.g.,
+parsed JSON) of the most recently used cached responses within a memory budget (see
+`MemoryCache` and `settings.CACHE_MEMORY_MAX_SIZE`), so that repeated requests skip
+both reading the response from the cache and decoding it again.
+
+The time series partitions that are known to have no data (e.g., the files of the
+station-years that do not exist) are recorded in a persistent negative cache (see
+`record_nodata` and `settings.CACHE_NODATA_EXPIRE`), so that they are skipped rather
+than requested again.
+
+The coverage of a time series query by these caches, i.e., which partitions are cached
+and which would be requested, can be computed before running it (see `CacheCoverage`).
+
+The time series data frames parsed from the cached responses and files can in turn be
+cached as Parquet files (see `settings.CACHE_PARSED_PARTITIONS` and `read_parsed`), so
+that repeated queries skip parsing them again.
+
+In offline mode (see `settings.OFFLINE`), requests and files are only served from these
+caches, and a `CacheMissError` is raised for the ones that are not cached.
+"""
+
+import collections
+import contextlib
+import contextvars
+import copy
+import gzip
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections.abc import Hashable, Iterable, Iterator
+from typing import Any, NamedTuple
+
+import pandas as pd
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests_cache import EXPIRE_IMMEDIATELY, NEVER_EXPIRE, BaseCache, CachedResponse
+from requests_cache.backends.sqlite import SQLiteCache, SQLiteDict
+from requests_cache.models.raw_response import CachedHTTPResponse
+from requests_cache.policy.expiration import get_expiration_seconds
+
+from meteora import sessions, settings, utils
+from meteora.optional import require_optional
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+__all__ = [
+    "CacheCoverage",
+    "CacheMissError",
+    "HybridCache",
+    "HybridSQLiteDict",
+    "MemoryCache",
+    "MemoryCacheInfo",
+    "clear_memory_cache",
+    "clear_nodata",
+    "clear_parsed",
+    "collect_stale",
+    "get_backend",
+    "get_memory_cache",
+    "get_nodata",
+    "inspect",
+    "is_stale",
+    "lookup_responses",
+    "mark_stale",
+    "memory_cache_info",
+    "parsed_key",
+    "pin",
+    "prune",
+    "read_parsed",
+    "record_file",
+    "record_key",
+    "record_nodata",
+    "record_response",
+    "record_stale",
+    "unpin",
+    "write_parsed",
+]
+
+HYBRID_BACKEND = "hybrid"
+SQLITE_BACKENDS = ["sqlite", HYBRID_BACKEND]
+EVICTION_POLICIES = ["lru", "lfu"]
+HTTP_KIND = "http"
+FILE_KIND = "file"
+# compression level of the response bodies stored in files
+BODY_COMPRESS_LEVEL = 6
+# minimum size (in bytes) of the response bodies that are compressed in the database
+DB_BODY_COMPRESS_MIN_SIZE = 1024
+# header that marks the cached responses whose body is stored in a file, with the
+# encoding of the original response as value (since the body stored in the database is
+# empty, its encoding may be lost when serializing the response)
+_BODY_FILE_HEADER = "X-Meteora-Body-File"
+# header that marks the cached responses whose body is gzip-compressed in the database,
+# with the encoding of the original response as value
+_BODY_GZIP_HEADER = "X-Meteora-Body-Gzip"
+# status codes of the responses that mean that a partition has no data
+NODATA_STATUS_CODES = {404, 410}
+# maximum number of keys per query of the negative cache and the responses (SQLite has
+# a limit on the number of parameters of a statement)
+_QUERY_CHUNK_SIZE = 500
+# attribute of the time series data frames with the URLs of the stale responses
+STALE_ATTR = "stale"
+# coverage status of the time series partitions, see `CacheCoverage`
+COVERAGE_CACHED = "cached"
+COVERAGE_STALE = "stale"
+COVERAGE_MISSING = "missing"
+COVERAGE_NODATA = "nodata"
+# URLs of the stale responses served within the current `collect_stale` context
+_STALE_URLS = contextvars.ContextVar("stale_urls", default=None)
+
+
+class CacheMissError(LookupError):
+    """Error raised in offline mode when the requested data is not cached.
+
+    Parameters
+    ----------
+    urls : sequence of str
+        URLs of the requests (or files) that are not cached.
+    partitions : sequence of mappings, optional
+        Time series partitions (e.g., station and period) that are not cached.
+    """
+
+    def __init__(
+        self, urls: Iterable[str], partitions: Iterable[dict] | None = None
+    ) -> None:
+        """Initialize the error."""
+        self.urls = list(urls)
+        self.partitions = list(partitions or [])
+        if self.partitions:
+            missing = "; ".join(
+                ", ".join(f"{key}={value}" for key, value in partition.items())
+                for partition in self.partitions
+            )
+            msg = f"{len(self.partitions)} partitions are not cached: {missing}"
+        else:
+            msg = f"Not cached: {', '.join(self.urls)}"
+        super().__init__(f"Offline mode. {msg}.")
+
+    def __reduce__(self):
+        """Pickle with the constructor arguments, e.g., to send it across processes."""
+        return type(self), (self.urls, self.partitions)
+
+
+def _write_body(filepath: str, body: bytes) -> None:
+    """Compress and write a response body, atomically replacing any previous one."""
+    fd, tmp_filepath = tempfile.mkstemp(dir=os.path.dirname(filepath))
+    try:
+        with os.fdopen(fd, "wb") as dst:
+            dst.write(gzip.compress(body, compresslevel=BODY_COMPRESS_LEVEL, mtime=0))
+        os.replace(tmp_filepath, filepath)
+    except BaseException:
+        os.remove(tmp_filepath)
+        raise
+
+
+def _read_body(filepath: str) -> bytes:
+    """Read and decompress a response body."""
+    with open(filepath, "rb") as src:
+        return gzip.decompress(src.read())
+
+
+def _remove_body(filepath: str) -> None:
+    try:
+        os.remove(filepath)
+    except FileNotFoundError:
+        pass
+
+
+def _replace_body(response: CachedResponse, body: bytes, header: str) -> CachedResponse:
+    """Copy a response with another body, marked by `header`."""
+    response = copy.copy(response)
+    response._content = body
+    response.headers = CaseInsensitiveDict(response.headers)
+    response.headers[header] = response.encoding or ""
+    return response
+
+
+class HybridSQLiteDict(SQLiteDict):
+    """SQLite dictionary that stores large response bodies in compressed files.
+
+    Response metadata (and bodies up to `max_body_size` bytes) is stored in the SQLite
+    database, whereas larger bodies are gzip-compressed and stored in files (one per
+    cache key) in `bodies_dir`. This keeps the database small, i.e., fast to query and
+    to update. The bodies stored in the database can be gzip-compressed too, see
+    `compress_bodies`. Either way, bodies are only decompressed when the responses are
+    read from the cache.
+
+    Parameters
+    ----------
+    db_path : str or path-like
+        Path to the SQLite database.
+    bodies_dir : str or path-like, optional
+        Directory where large response bodies are stored. If None, a directory named
+        after the database (with a "-bodies" suffix) is used.
+    max_body_size : int, optional
+        Maximum size (in bytes) of the response bodies stored in the database. If None,
+        the value from `settings.CACHE_MAX_DB_BODY_SIZE` is used.
+    compress_bodies : bool, optional
+        Whether the response bodies stored in the database (of at least
+        `DB_BODY_COMPRESS_MIN_SIZE` bytes) are gzip-compressed. If None, the value from
+        `settings.CACHE_COMPRESS_DB_BODIES` is used.
+    **kwargs
+        Additional keyword arguments to pass to `requests_cache.backends.SQLiteDict`.
+    """
+
+    def __init__(
+        self,
+        db_path: str | os.PathLike,
+        *,
+        bodies_dir: str | os.PathLike | None = None,
+        max_body_size: int | None = None,
+        compress_bodies: bool | None = None,
+        **kwargs,
+    ) -> None:
+        """Initialize the dictionary."""
+        super().__init__(db_path, **kwargs)
+        if bodies_dir is None:
+            bodies_dir = f"{os.path.splitext(self.db_path)[0]}-bodies"
+        if max_body_size is None:
+            max_body_size = settings.CACHE_MAX_DB_BODY_SIZE
+        if compress_bodies is None:
+            compress_bodies = settings.CACHE_COMPRESS_DB_BODIES
+        self.bodies_dir = str(bodies_dir)
+        self.max_body_size = max_body_size
+        self.compress_bodies = compress_bodies
+        os.makedirs(self.bodies_dir, exist_ok=True)
+
+    def _body_filepath(self, key: str) -> str:
+        return os.path.join(self.bodies_dir, f"{key}.gz")
+
+    def _write(self, key, value):
+        body = getattr(value, "_content", None)
+        if not isinstance(value, CachedResponse) or not body:
+            return super()._write(key, value)
+        body_filepath = self._body_filepath(key)
+        if len(body) <= self.max_body_size:
+            # the key may have been stored with a large body before
+            _remove_body(body_filepath)
+            if self.compress_bodies and len(body) >= DB_BODY_COMPRESS_MIN_SIZE:
+                value = _replace_body(
+                    value,
+                    gzip.compress(body, compresslevel=BODY_COMPRESS_LEVEL, mtime=0),
+                    _BODY_GZIP_HEADER,
+                )
+            return super()._write(key, value)
+        _write_body(body_filepath, body)
+        return super()._write(key, _replace_body(value, b"", _BODY_FILE_HEADER))
+
+    def deserialize(self, key, value):
+        """Deserialize a response, decompressing its body if needed."""
+        response = super().deserialize(key, value)
+        if not isinstance(response, CachedResponse):
+            return response
+        encoding = response.headers.pop(_BODY_FILE_HEADER, None)
+        if encoding is not None:
+            try:
+                response._content = _read_body(self._body_filepath(key))
+            except FileNotFoundError:
+                # the body is gone, so treat the response as not cached
+                return None
+        else:
+            encoding = response.headers.pop(_BODY_GZIP_HEADER, None)
+            if encoding is None:
+                return response
+            response._content = gzip.decompress(response._content)
+        response.encoding = encoding or None
+        if "Content-Length" in response.headers:
+            response.headers["Content-Length"] = str(len(response._content))
+        response.raw = CachedHTTPResponse.from_cached_response(response)
+        return response
+
+    def __delitem__(self, key):
+        """Delete an item (and its body file, if any) from the cache."""
+        super().__delitem__(key)
+        _remove_body(self._body_filepath(key))
+
+    def bulk_delete(self, keys=None, values=None):
+        """Delete multiple items (and their body files, if any) from the cache."""
+        super().bulk_delete(keys=keys, values=values)
+        if keys:
+            for key in keys:
+                _remove_body(self._body_filepath(key))
+        elif values:
+            self.prune_bodies()
+
+    def clear(self):
+        """Delete all items (and body files) from the cache."""
+        super().clear()
+        self.prune_bodies()
+
+    def prune_bodies(self) -> None:
+        """Remove the body files whose key is no longer in the database."""
+        keys = set(self)
+        for filename in os.listdir(self.bodies_dir):
+            key, ext = os.path.splitext(filename)
+            if ext == ".gz" and key not in keys:
+                _remove_body(os.path.join(self.bodies_dir, filename))
+
+    def size(self) -> int:
+        """Return the size of the database and the body files, in bytes."""
+        with os.scandir(self.bodies_dir) as entries:
+            bodies_size = sum(entry.stat().st_size for entry in entries)
+        return super().size() + bodies_size
+
+
+class HybridCache(SQLiteCache):
+    """SQLite cache backend that stores large response bodies in compressed files.
+
+    See `HybridSQLiteDict` for details.
+
+    Parameters
+    ----------
+    db_path : str or path-like, default "http_cache"
+        Path to the SQLite database.
+    bodies_dir : str or path-like, optional
+        Directory where large response bodies are stored. If None, a directory named
+        after the database (with a "-bodies" suffix) is used.
+    max_body_size : int, optional
+        Maximum size (in bytes) of the response bodies stored in the database. If None,
+        the value from `settings.CACHE_MAX_DB_BODY_SIZE` is used.
+    compress_bodies : bool, optional
+        Whether the response bodies stored in the database are gzip-compressed. If
+        None, the value from `settings.CACHE_COMPRESS_DB_BODIES` is used.
+    serializer : optional
+        Serializer of the responses, passed to `requests_cache.backends.SQLiteCache`.
+    **kwargs
+        Additional keyword arguments to pass to `requests_cache.backends.SQLiteCache`.
+    """
+
+    def __init__(
+        self,
+        db_path: str | os.PathLike = "http_cache",
+        *,
+        bodies_dir: str | os.PathLike | None = None,
+        max_body_size: int | None = None,
+        compress_bodies: bool | None = None,
+        serializer=None,
+        **kwargs,
+    ) -> None:
+        """Initialize the cache backend."""
+        super().__init__(db_path, serializer=serializer, **kwargs)
+        skwargs = {"serializer": serializer, **kwargs} if serializer else kwargs
+        self.responses.close()
+        self.responses = HybridSQLiteDict(
+            db_path,
+            bodies_dir=bodies_dir,
+            max_body_size=max_body_size,
+            compress_bodies=compress_bodies,
+            table_name="responses",
+            lock=self.redirects._lock,
+            **skwargs,
+        )
+
+    def delete(self, *keys: str, expired: bool = False, **kwargs):
+        """Remove responses (and their body files) from the cache."""
+        super().delete(*keys, expired=expired, **kwargs)
+        if expired:
+            # expired responses are deleted in SQL, i.e., without removing their files
+            self.responses.prune_bodies()
+
+
+def get_backend(backend: str | BaseCache | None = None) -> str | BaseCache:
+    """Get the backend of the HTTP cache.
+
+    Parameters
+    ----------
+    backend : str or requests_cache.BaseCache, optional
+        Backend name (e.g., "sqlite", "memory" or "hybrid") or instance. If None, the
+        value from `settings.CACHE_BACKEND` is used.
+
+    Returns
+    -------
+    backend : str or requests_cache.BaseCache
+        The backend, to pass to `requests_cache.CachedSession`. The "hybrid" backend
+        (see `HybridCache`) is instantiated with `settings.CACHE_NAME` as database path,
+        other names are passed as is.
+    """
+    if backend is None:
+        backend = settings.CACHE_BACKEND
+    if backend == HYBRID_BACKEND:
+        return HybridCache(settings.CACHE_NAME)
+    return backend
+
+
+# cache index
+
+
+class CacheIndex:
+    """Index of the cached responses and files, with their size and accesses.
+
+    Entries are identified by their key, i.e., the cache key of HTTP responses or the
+    absolute path of files.
+
+    Parameters
+    ----------
+    db_path : str or path-like
+        Path to the SQLite database of the index.
+    """
+
+    def __init__(self, db_path: str | os.PathLike) -> None:
+        """Initialize the index."""
+        self.db_path = str(db_path)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            self.db_path, check_same_thread=False, isolation_level=None
+        )
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "    key TEXT PRIMARY KEY,"
+                "    kind TEXT,"
+                "    size INTEGER,"
+                "    last_access REAL,"
+                "    hits INTEGER DEFAULT 0,"
+                "    pinned INTEGER DEFAULT 0"
+                ")"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS nodata ("
+                "    key TEXT PRIMARY KEY,"
+                "    recorded REAL"
+                ")"
+            )
+
+    def record(self, kind: str, key: str, size: int, *, hit: bool = True) -> None:
+        """Record an access to an entry (adding it to the index if needed)."""
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO entries (key, kind, size, last_access, hits) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+                "kind=excluded.kind, size=excluded.size, "
+                "last_access=excluded.last_access, hits=hits+excluded.hits",
+                (key, kind, size, time.time(), int(hit)),
+            )
+
+    def update(self, kind: str, key: str, size: int, last_access: float) -> None:
+        """Update the kind and size of an entry, adding it to the index if needed."""
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO entries (key, kind, size, last_access) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+                "kind=excluded.kind, size=excluded.size",
+                (key, kind, size, last_access),
+            )
+
+    def set_pinned(self, keys: Iterable[str], pinned: bool) -> None:
+        """Pin or unpin entries (adding them to the index if needed)."""
+        with self._lock:
+            self._connection.executemany(
+                "INSERT INTO entries (key, kind, size, last_access, pinned) "
+                "VALUES (?, ?, 0, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET pinned=excluded.pinned",
+                [
+                    (
+                        key,
+                        FILE_KIND if os.path.isfile(key) else HTTP_KIND,
+                        time.time(),
+                        int(pinned),
+                    )
+                    for key in keys
+                ],
+            )
+
+    def remove(self, keys: Iterable[str]) -> None:
+        """Remove entries from the index."""
+        with self._lock:
+            self._connection.executemany(
+                "DELETE FROM entries WHERE key=?", [(key,) for key in keys]
+            )
+
+    def record_nodata(self, keys: Iterable[str]) -> None:
+        """Record (now) that the partitions with the given keys have no data."""
+        recorded = time.time()
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO nodata (key, recorded) VALUES (?, ?)",
+                [(key, recorded) for key in keys],
+            )
+
+    def get_nodata(self, keys: Iterable[str], recorded_after: float) -> set[str]:
+        """Get the keys recorded as having no data after the given time."""
+        keys = list(keys)
+        nodata_keys = set()
+        with self._lock:
+            for i in range(0, len(keys), _QUERY_CHUNK_SIZE):
+                chunk = keys[i : i + _QUERY_CHUNK_SIZE]
+                nodata_keys.update(
+                    key
+                    for (key,) in self._connection.execute(
+                        "SELECT key FROM nodata WHERE recorded > ? AND key IN "
+                        f"({', '.join('?' * len(chunk))})",
+                        (recorded_after, *chunk),
+                    )
+                )
+        return nodata_keys
+
+    def remove_nodata(self, keys: Iterable[str] | None = None) -> None:
+        """Remove keys (or, if None, all of them) from the negative cache."""
+        with self._lock:
+            if keys is None:
+                self._connection.execute("DELETE FROM nodata")
+            else:
+                self._connection.executemany(
+                    "DELETE FROM nodata WHERE key=?", [(key,) for key in keys]
+                )
+
+    def to_frame(self) -> pd.DataFrame:
+        """Get the entries as a data frame indexed by key."""
+        with self._lock:
+            df = pd.read_sql_query(
+                "SELECT key, kind, size, last_access, hits, pinned FROM entries",
+                self._connection,
+                index_col="key",
+            )
+        return df.assign(
+            last_access=pd.to_datetime(df["last_access"], unit="s"),
+            pinned=df["pinned"].astype(bool),
+        )
+
+
+_INDEXES: dict[str, CacheIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+# time (`time.monotonic`) of the last automatic eviction
+_last_prune = float("-inf")
+
+
+def _get_index() -> CacheIndex:
+    """Get the process-wide index of the cache named `settings.CACHE_NAME`."""
+    db_path = f"{settings.CACHE_NAME}-index.sqlite"
+    with _INDEXES_LOCK:
+        try:
+            return _INDEXES[db_path]
+        except KeyError:
+            index = CacheIndex(db_path)
+            _INDEXES[db_path] = index
+            return index
+
+
+@contextlib.contextmanager
+def _http_backend() -> Iterator[BaseCache | None]:
+    """Open the (persistent) backend of the HTTP cache, if it is SQLite-based."""
+    if settings.CACHE_BACKEND == HYBRID_BACKEND:
+        backend = get_backend()
+    elif settings.CACHE_BACKEND == "sqlite":
+        backend = SQLiteCache(settings.CACHE_NAME)
+    else:
+        yield None
+        return
+    try:
+        yield backend
+    finally:
+        backend.close()
+
+
+def _has_budget() -> bool:
+    """Whether the cache has size or age budgets, i.e., accesses must be recorded."""
+    return settings.CACHE_MAX_SIZE is not None or settings.CACHE_MAX_AGE is not None
+
+
+def _maybe_prune(exclude: str) -> None:
+    """Evict entries if budgets are set and the last eviction is old enough."""
+    global _last_prune
+    if not _has_budget():
+        return
+    now = time.monotonic()
+    with _INDEXES_LOCK:
+        if now - _last_prune < settings.CACHE_PRUNE_INTERVAL:
+            return
+        _last_prune = now
+    prune(exclude=[exclude])
+
+
+def record_response(response: requests.Response) -> None:
+    """Record an access to a response of the HTTP cache.
+
+    Accesses are only recorded if the cache has a size or age budget (see
+    `settings.CACHE_MAX_SIZE` and `settings.CACHE_MAX_AGE`), since they only matter to
+    evict entries. Otherwise, the responses are added to the index (without accesses)
+    when it is inspected or pruned.
+
+    Parameters
+    ----------
+    response : requests.Response
+        Response from a `requests_cache.CachedSession` with a SQLite-based backend (see
+        `settings.CACHE_BACKEND`). Other responses are ignored.
+    """
+    key = getattr(response, "cache_key", None)
+    # only responses of SQLite-based backends are managed (e.g., the ones of the
+    # "memory" backend are not persistent anyway)
+    if not key or settings.CACHE_BACKEND not in SQLITE_BACKENDS or not _has_budget():
+        return
+    content = response._content
+    _get_index().record(
+        HTTP_KIND, key, len(content) if isinstance(content, bytes) else 0
+    )
+    if not getattr(response, "from_cache", False):
+        # the cache has grown
+        _maybe_prune(key)
+
+
+def record_key(key: str, size: int) -> None:
+    """Record an access to a response of the HTTP cache by its cache key.
+
+    Like `record_response`, for the responses that are served without reading them
+    from the HTTP cache, i.e., from the in-memory tier (see `get_memory_cache`).
+
+    Parameters
+    ----------
+    key : str
+        Cache key of the response.
+    size : int
+        Size of the response body, in bytes.
+    """
+    if settings.CACHE_BACKEND not in SQLITE_BACKENDS or not _has_budget():
+        return
+    _get_index().record(HTTP_KIND, key, size)
+
+
+def record_file(filepath: str | os.PathLike) -> None:
+    """Record an access to a cached file.
+
+    Like for `record_response`, accesses are only recorded if the cache has a size or
+    age budget, and the files are only tracked (i.e., inspected, pruned) from then on.
+
+    Parameters
+    ----------
+    filepath : str or path-like
+        Path to the file, e.g., as returned by `pooch.retrieve`.
+    """
+    if not _has_budget():
+        return
+    key = os.path.abspath(filepath)
+    _get_index().record(FILE_KIND, key, os.path.getsize(key))
+    _maybe_prune(key)
+
+
+def _sync_index(index: CacheIndex, backend: BaseCache | None) -> pd.DataFrame:
+    """Add the untracked entries to the index and drop the entries that are gone."""
+    index_df = index.to_frame()
+    # only the files retrieved by meteora are tracked, since pooch's default directory
+    # may be shared with other libraries
+    file_keys = index_df.index[index_df["kind"] == FILE_KIND]
+    gone_keys = []
+    for key in file_keys:
+        try:
+            stat = os.stat(key)
+        except FileNotFoundError:
+            gone_keys.append(key)
+            continue
+        index.update(FILE_KIND, key, stat.st_size, max(stat.st_atime, stat.st_mtime))
+    # responses (only SQLite-based backends are managed)
+    if backend is not None:
+        with backend.responses.connection() as con:
+            http_sizes = dict(
+                con.execute(
+                    f"SELECT key, LENGTH(value) FROM {backend.responses.table_name}"
+                )
+            )
+        if isinstance(backend.responses, HybridSQLiteDict):
+            bodies_dir = backend.responses.bodies_dir
+            with os.scandir(bodies_dir) as entries:
+                for entry in entries:
+                    key = os.path.splitext(entry.name)[0]
+                    if key in http_sizes:
+                        http_sizes[key] += entry.stat().st_size
+        for key, size in http_sizes.items():
+            # if the entry is not in the index yet, its last access is unknown, so
+            # consider it the least recent
+            index.update(HTTP_KIND, key, size, 0)
+        http_keys = index_df.index[index_df["kind"] == HTTP_KIND]
+        gone_keys += [key for key in http_keys if key not in http_sizes]
+    index.remove(gone_keys)
+    return index.to_frame()
+
+
+def inspect() -> pd.DataFrame:
+    """Inspect the cached responses and files.
+
+    Returns
+    -------
+    cache_df : pandas.DataFrame
+        Data frame indexed by key (i.e., the cache key of HTTP responses or the path of
+        files), with the kind of entry ("http" or "file"), its size (in bytes), the time
+        of its last access, its number of hits and whether it is pinned.
+    """
+    with _http_backend() as backend:
+        return _sync_index(_get_index(), backend)
+
+
+def pin(*keys: str) -> None:
+    """Pin entries of the cache, so that they are never evicted.
+
+    Parameters
+    ----------
+    *keys : str
+        Keys of the entries, i.e., cache keys of HTTP responses (e.g., the `cache_key`
+        attribute of a cached response) and/or paths of files.
+    """
+    _get_index().set_pinned(_normalize_keys(keys), True)
+
+
+def unpin(*keys: str) -> None:
+    """Unpin entries of the cache, see `pin`."""
+    _get_index().set_pinned(_normalize_keys(keys), False)
+
+
+def _normalize_keys(keys: Iterable[str]) -> list[str]:
+    # file keys are absolute paths
+    return [os.path.abspath(key) if os.path.exists(key) else key for key in keys]
+
+
+def prune(
+    max_size: int | None = None,
+    max_age: float | None = None,
+    policy: str | None = None,
+    *,
+    exclude: Iterable[str] | None = None,
+) -> pd.DataFrame:
+    """Evict cached responses and files to stay within size and age budgets.
+
+    Pinned entries (see `pin`) are never evicted, but count towards the size budget.
+
+    Parameters
+    ----------
+    max_size : int, optional
+        Maximum total size (in bytes) of the HTTP cache and the cached files. If None,
+        the value from `settings.CACHE_MAX_SIZE` is used.
+    max_age : float, optional
+        Maximum time (in seconds) since the last access of an entry. If None, the value
+        from `settings.CACHE_MAX_AGE` is used.
+    policy : {"lru", "lfu"}, optional
+        Which entries are evicted first to meet `max_size`, i.e., either the least
+        recently used or the least frequently used (and then least recently used)
+        ones. If None, the value from `settings.CACHE_EVICTION_POLICY` is used.
+    exclude : iterable of str, optional
+        Keys of entries that must not be evicted (e.g., the ones in use).
+
+    Returns
+    -------
+    evicted_df : pandas.DataFrame
+        The evicted entries, in the same format as the data frame returned by
+        `inspect`.
+    """
+    if max_size is None:
+        max_size = settings.CACHE_MAX_SIZE
+    if max_age is None:
+        max_age = settings.CACHE_MAX_AGE
+    if policy is None:
+        policy = settings.CACHE_EVICTION_POLICY
+    if policy not in EVICTION_POLICIES:
+        raise ValueError(
+            f"Unknown eviction policy '{policy}'. Must be one of {EVICTION_POLICIES}."
+        )
+    index = _get_index()
+    with _http_backend() as backend:
+        cache_df = _sync_index(index, backend)
+        candidates_df = cache_df[
+            ~cache_df["pinned"] & ~cache_df.index.isin(list(exclude or []))
+        ]
+        if policy == "lru":
+            candidates_df = candidates_df.sort_values("last_access")
+        else:
+            candidates_df = candidates_df.sort_values(["hits", "last_access"])
+
+        evict = pd.Series(False, index=candidates_df.index)
+        if max_age is not None:
+            evict |= candidates_df["last_access"] < pd.Timestamp(
+                time.time() - max_age, unit="s"
+            )
+        if max_size is not None:
+            excess = (
+                cache_df["size"].sum()
+                - candidates_df.loc[evict, "size"].sum()
+                - max_size
+            )
+            if excess > 0:
+                # evict the remaining candidates, in order, until the excess is freed
+                sizes = candidates_df["size"].where(~evict, 0)
+                evict |= (sizes.cumsum() - sizes) < excess
+        evicted_df = candidates_df[evict]
+        if evicted_df.empty:
+            return evicted_df
+
+        file_keys = evicted_df.index[evicted_df["kind"] == FILE_KIND]
+        for key in file_keys:
+            for filepath in [key, f"{key}{sessions.VALIDATORS_SUFFIX}"]:
+                try:
+                    os.remove(filepath)
+                except FileNotFoundError:
+                    pass
+        http_keys = list(evicted_df.index[evicted_df["kind"] == HTTP_KIND])
+        if http_keys:
+            backend.delete(*http_keys)
+        index.remove([*file_keys, *http_keys])
+        utils.log(
+            f"Evicted {len(evicted_df)} cache entries "
+            f"({evicted_df['size'].sum() / 1e6:.1f} MB)"
+        )
+    return evicted_df
+
+
+# negative cache
+
+
+def record_nodata(*keys: str) -> None:
+    """Record that time series partitions have no data.
+
+    Parameters
+    ----------
+    *keys : str
+        Keys of the partitions, e.g., the URL of their file.
+    """
+    if get_expiration_seconds(settings.CACHE_NODATA_EXPIRE) == EXPIRE_IMMEDIATELY:
+        return
+    _get_index().record_nodata(keys)
+
+
+def get_nodata(keys: Iterable[str]) -> set[str]:
+    """Get which time series partitions are known to have no data.
+
+    Parameters
+    ----------
+    keys : iterable of str
+        Keys of the partitions, see `record_nodata`.
+
+    Returns
+    -------
+    nodata_keys : set of str
+        Keys recorded as having no data within the last
+        `settings.CACHE_NODATA_EXPIRE`.
+    """
+    keys = list(keys)
+    expire_seconds = get_expiration_seconds(settings.CACHE_NODATA_EXPIRE)
+    if not keys or expire_seconds == EXPIRE_IMMEDIATELY:
+        return set()
+    if expire_seconds == NEVER_EXPIRE:
+        recorded_after = float("-inf")
+    else:
+        recorded_after = time.time() - expire_seconds
+    return _get_index().get_nodata(keys, recorded_after)
+
+
+def clear_nodata(*keys: str) -> None:
+    """Forget that time series partitions have no data.
+
+    Parameters
+    ----------
+    *keys : str
+        Keys of the partitions, see `record_nodata`. If none are provided, the whole
+        negative cache is cleared.
+    """
+    _get_index().remove_nodata(keys or None)
+
+
+# stale responses
+
+
+def is_stale(response: requests.Response) -> bool:
+    """Whether a response is an expired one served from the HTTP cache.
+
+    This happens with stale-while-revalidate (the response is refreshed in the
+    background) and stale-if-error (the request failed), see
+    `settings.CACHE_STALE_WHILE_REVALIDATE` and `settings.CACHE_STALE_IF_ERROR`.
+    """
+    return bool(
+        getattr(response, "from_cache", False)
+        and getattr(response, "is_expired", False)
+    )
+
+
+@contextlib.contextmanager
+def collect_stale() -> Iterator[list[str]]:
+    """Collect the URLs of the stale responses served within the context.
+
+    The collected URLs are those reported with `record_stale` from the same thread or
+    task (or from the tasks and threads started with its context, e.g., with
+    `asyncio.gather` or `asyncio.to_thread`). In nested contexts, the URLs are only
+    collected by the innermost one.
+
+    Yields
+    ------
+    stale_urls : list of str
+        URLs of the stale responses, which is filled as they are served.
+    """
+    stale_urls = []
+    token = _STALE_URLS.set(stale_urls)
+    try:
+        yield stale_urls
+    finally:
+        _STALE_URLS.reset(token)
+
+
+def record_stale(url: str) -> None:
+    """Report that a stale response of `url` has been served, see `collect_stale`."""
+    stale_urls = _STALE_URLS.get()
+    if stale_urls is not None:
+        stale_urls.append(url)
+
+
+def mark_stale(
+    ts_df: pd.DataFrame | pd.Series | None, stale_urls: Iterable[str] = ()
+) -> pd.DataFrame | pd.Series | None:
+    """Set the URLs of the stale responses from which a data frame was obtained.
+
+    Parameters
+    ----------
+    ts_df : pandas.DataFrame or pandas.Series
+        Time series data frame (or series), whose `attrs["stale"]` is set to the
+        sorted union of `stale_urls` and the URLs that it already has, if any.
+    stale_urls : iterable of str, optional
+        URLs of the stale responses.
+
+    Returns
+    -------
+    ts_df : pandas.DataFrame or pandas.Series
+        The same object, with the attribute set.
+    """
+    if ts_df is None:
+        return None
+    stale_urls = sorted({*ts_df.attrs.get(STALE_ATTR, []), *stale_urls})
+    ts_df.attrs = {**ts_df.attrs, STALE_ATTR: stale_urls}
+    return ts_df
+
+
+# coverage
+
+
+def lookup_responses(
+    backend: BaseCache, keys: Iterable[str]
+) -> dict[str, tuple[float | None, int]]:
+    """Look up responses in the HTTP cache without reading their bodies if possible.
+
+    Parameters
+    ----------
+    backend : requests_cache.BaseCache
+        Backend of the HTTP cache, e.g., the `cache` attribute of a cached session.
+    keys : iterable of str
+        Cache keys of the responses.
+
+    Returns
+    -------
+    responses : dict
+        Mapping of the keys of the cached responses to their expiration time (as a
+        Unix timestamp, or None if they never expire) and size (in bytes). Keys that
+        are not cached are not included.
+    """
+    keys = list(keys)
+    responses = {}
+    if isinstance(backend.responses, SQLiteDict):
+        # query the expiration column of SQLite-based backends
+        with backend.responses.connection() as con:
+            for i in range(0, len(keys), _QUERY_CHUNK_SIZE):
+                chunk = keys[i : i + _QUERY_CHUNK_SIZE]
+                for key, expires, size in con.execute(
+                    "SELECT key, expires, LENGTH(value) FROM "
+                    f"{backend.responses.table_name} WHERE key IN "
+                    f"({', '.join('?' * len(chunk))})",
+                    chunk,
+                ):
+                    responses[key] = (expires, size)
+        if isinstance(backend.responses, HybridSQLiteDict):
+            for key, (expires, size) in responses.items():
+                with contextlib.suppress(FileNotFoundError):
+                    size += os.path.getsize(backend.responses._body_filepath(key))
+                responses[key] = (expires, size)
+        return responses
+    for key in keys:
+        response = backend.get_response(key)
+        if response is None:
+            continue
+        expires = response.expires
+        responses[key] = (
+            None if expires is None else expires.timestamp(),
+            len(response.content or b""),
+        )
+    return responses
+
+
+class CacheCoverage(NamedTuple):
+    """Coverage of a time series query by the caches.
+
+    Attributes
+    ----------
+    coverage_df : pandas.DataFrame
+        Data frame with a row for each request or file of the (innermost) partitions
+        of the query, with the partition values (e.g., "period" or "station_id"), the
+        URL of the request or file ("url"), its key in the cache ("key", i.e., the
+        cache key of the response or the path of the file), the kind of cache ("kind",
+        i.e., "http" or "file"), its "status" and, if cached, its "size" (in bytes).
+        The status is either "cached" (served from the cache), "stale" (cached, but
+        revalidated with the server), "missing" (downloaded) or "nodata" (known to have
+        no data, so skipped).
+    n_requests : int
+        Number of requests that the query would send, i.e., of missing and stale
+        entries.
+    n_bytes : float
+        Estimated number of bytes that the query would download, i.e., the number of
+        missing entries times the mean size of the cached ones (NaN if none is
+        cached).
+    """
+
+    coverage_df: pd.DataFrame
+    n_requests: int
+    n_bytes: float
+
+    @classmethod
+    def from_frame(cls, coverage_df: pd.DataFrame) -> "CacheCoverage":
+        """Estimate the download cost of a coverage data frame."""
+        status_ser = coverage_df["status"]
+        n_missing = int((status_ser == COVERAGE_MISSING).sum())
+        cached_sizes = coverage_df.loc[
+            status_ser.isin([COVERAGE_CACHED, COVERAGE_STALE]), "size"
+        ]
+        if n_missing == 0:
+            n_bytes = 0.0
+        elif cached_sizes.empty:
+            n_bytes = float("nan")
+        else:
+            n_bytes = float(n_missing * cached_sizes.mean())
+        return cls(
+            coverage_df,
+            n_missing + int((status_ser == COVERAGE_STALE).sum()),
+            n_bytes,
+        )
+
+
+# parsed partitions
+
+
+def _parsed_dir() -> str:
+    return f"{settings.CACHE_NAME}-parsed"
+
+
+def _parsed_filepath(key: str) -> str:
+    return os.path.join(_parsed_dir(), f"{key}.parquet")
+
+
+def parsed_key(*parts: Any) -> str:
+    """Get the key of a parsed time series partition.
+
+    Parameters
+    ----------
+    *parts
+        Values that identify the parsed data frame, i.e., the client, the partition
+        and the validator of its source (e.g., the size and modification time of its
+        file), so that the key changes whenever the source does. Their representations
+        (`repr`) are hashed.
+
+    Returns
+    -------
+    key : str
+        Hexadecimal digest.
+    """
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def read_parsed(key: str) -> pd.DataFrame | None:
+    """Read a parsed time series partition from the cache.
+
+    Parameters
+    ----------
+    key : str
+        Key of the partition, see `parsed_key`.
+
+    Returns
+    -------
+    ts_df : pandas.DataFrame or None
+        The parsed data frame, or None if it is not cached.
+    """
+    require_optional(
+        {"pyarrow": pyarrow}, extra="parquet", feature="The parsed-partition cache"
+    )
+    filepath = _parsed_filepath(key)
+    try:
+        ts_df = pd.read_parquet(filepath, engine="pyarrow")
+    except FileNotFoundError:
+        return None
+    record_file(filepath)
+    return ts_df
+
+
+def write_parsed(key: str, ts_df: pd.DataFrame) -> None:
+    """Write a parsed time series partition to the cache.
+
+    Data frames that cannot be stored as Parquet as they are (i.e., series or data
+    frames with non-string column labels) are not cached.
+
+    Parameters
+    ----------
+    key : str
+        Key of the partition, see `parsed_key`.
+    ts_df : pandas.DataFrame
+        Parsed data frame.
+    """
+    require_optional(
+        {"pyarrow": pyarrow}, extra="parquet", feature="The parsed-partition cache"
+    )
+    if not isinstance(ts_df, pd.DataFrame) or not all(
+        isinstance(column, str) for column in ts_df.columns
+    ):
+        return
+    filepath = _parsed_filepath(key)
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    # write atomically, since the same partition may be parsed concurrently
+    fd, tmp_filepath = tempfile.mkstemp(dir=os.path.dirname(filepath), suffix=".tmp")
+    os.close(fd)
+    try:
+        ts_df.to_parquet(tmp_filepath, engine="pyarrow")
+        os.replace(tmp_filepath, filepath)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_filepath)
+        raise
+    record_file(filepath)
+
+
+def clear_parsed() -> None:
+    """Remove all the parsed time series partitions from the cache."""
+    parsed_dir = _parsed_dir()
+    if not os.path.isdir(parsed_dir):
+        return
+    filepaths = [
+        os.path.abspath(os.path.join(parsed_dir, filename))
+        for filename in os.listdir(parsed_dir)
+    ]
+    for filepath in filepaths:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(filepath)
+    _get_index().remove(filepaths)
+
+
+# in-memory tier
+
+
+class MemoryCacheInfo(NamedTuple):
+    """Statistics of a `MemoryCache`."""
+
+    hits: int
+    misses: int
+    entries: int
+    size: int
+    max_size: int
+
+
+class MemoryCache:
+    """Bounded in-process LRU cache of decoded response contents.
+
+    The least recently used entries are evicted so that the total size of the entries
+    (as given when they are set, e.g., the size of the response body) does not exceed
+    `max_size`. Entries can also have an expiration time, after which they are treated
+    as missing. The cache is thread-safe and counts the hits and misses of `get`.
+
+    Parameters
+    ----------
+    max_size : int
+        Maximum total size (in bytes) of the entries.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """Initialize the cache."""
+        self.max_size = max_size
+        # (value, size, expiration time) by key, from least to most recently used
+        self._entries: collections.OrderedDict = collections.OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get the value of `key` (or `default` if it is missing or expired)."""
+        with self._lock:
+            try:
+                value, _, expires = self._entries[key]
+            except KeyError:
+                self._misses += 1
+                return default
+            if expires is not None and time.time() >= expires:
+                self._pop(key)
+                self._misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(
+        self, key: Hashable, value: Any, size: int, expires: float | None = None
+    ) -> None:
+        """Set the value of `key`, evicting the least recently used entries if needed.
+
+        Parameters
+        ----------
+        key : hashable
+            Key of the entry.
+        value
+            Value of the entry, which is shared by all the `get` calls, so it must not
+            be modified in place.
+        size : int
+            Size of the entry, in bytes. Entries larger than `max_size` are not stored.
+        expires : float, optional
+            Expiration time of the entry (in `time.time` seconds). If None, the entry
+            never expires.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            if size > self.max_size:
+                return
+            self._entries[key] = (value, size, expires)
+            self._size += size
+            self._evict()
+
+    def resize(self, max_size: int) -> None:
+        """Change the maximum total size, evicting entries if needed."""
+        with self._lock:
+            self.max_size = max_size
+            self._evict()
+
+    def clear(self) -> None:
+        """Remove all the entries and reset the hit and miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self._hits = 0
+            self._misses = 0
+
+    def info(self) -> MemoryCacheInfo:
+        """Get the hits, misses, number of entries, total size and maximum size."""
+        with self._lock:
+            return MemoryCacheInfo(
+                self._hits, self._misses, len(self._entries), self._size, self.max_size
+            )
+
+    def _pop(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._size -= size
+
+    def _evict(self) -> None:
+        while self._size > self.max_size:
+            _, (_, size, _) = self._entries.popitem(last=False)
+            self._size -= size
+
+
+_MEMORY_CACHE = MemoryCache(settings.CACHE_MEMORY_MAX_SIZE or 0)
+
+
+def get_memory_cache() -> MemoryCache | None:
+    """Get the process-wide in-memory tier of the HTTP cache.
+
+    Returns
+    -------
+    memory_cache : MemoryCache or None
+        The in-memory tier, with `settings.CACHE_MEMORY_MAX_SIZE` as maximum size, or
+        None if the setting is 0 or None (i.e., the tier is disabled).
+    """
+    max_size = settings.CACHE_MEMORY_MAX_SIZE
+    if not max_size:
+        return None
+    if _MEMORY_CACHE.max_size != max_size:
+        _MEMORY_CACHE.resize(max_size)
+    return _MEMORY_CACHE
+
+
+def memory_cache_info() -> MemoryCacheInfo:
+    """Get the statistics (e.g., hits and misses) of the in-memory tier."""
+    return _MEMORY_CACHE.info()
+
+
+def clear_memory_cache() -> None:
+    """Clear the in-memory tier (and reset its statistics)."""
+    _MEMORY_CACHE.clear()
@@ -1,5 +1,6 @@
 """AEMET client."""
 
+import asyncio
 from collections.abc import Mapping
 
 import pandas as pd
@@ -27,6 +28,7 @@ VARIABLES_ENDPOINT = TS_ENDPOINT = f"{BASE_URL}/observacion/convencional/todas"
 STATIONS_GDF_ID_COL = "indicativo"
 TS_DF_STATIONS_ID_COL = "idema"
 TS_DF_TIME_COL = "fint"
+STATIONS_ALTITUDE_COL = "altitud"
 VARIABLES_ID_COL = "id"
 ECV_DICT = {
     # precipitation
@@ -94,7 +96,10 @@ class AemetClient(
 
     # auth constants
     _api_key_param_name = "api_key"
-    # request_headers = {"cache-control": "no-cache"}
+
+    # cache constants: the time series endpoint returns the latest 24h of data, so its
+    # cached responses soon go stale (see `settings.CACHE_EXPIRE_LIVE_TS`)
+    _live_ts = True
 
     def __init__(
         self, region: RegionType, api_key: str, **sjoin_kwargs: KwargsType
@@ -108,50 +113,47 @@ class AemetClient(
         # need to call super().__init__() to set the cache
         super().__init__()
 
-    @property
-    def request_headers(self) -> dict:
-        """Request headers."""
-        try:
-            return self._request_headers
-        except AttributeError:
-            self._request_headers = super().request_headers | {
-                "cache-control": "no-cache"
-            }
-        return self._request_headers
+    def _get_data_content(self, response_content: Mapping, key: str = "datos"):
+        # the responses only hold the URLs of the actual data ("datos") and metadata
+        # ("metadatos"), which are requested in turn. These URLs are temporary (a new
+        # one is returned for each request to the endpoints), so they are neither read
+        # from nor written to the HTTP cache
+        return self._get_content_from_url(
+            response_content[key], headers={"cache-control": "no-store"}
+        )
 
     def _stations_df_from_content(self, response_content: Mapping) -> pd.DataFrame:
-        # response_content returns a dict with urls, where the one under the "datos" key
-        # contains the JSON data
-        stations_df = pd.read_json(response_content["datos"], encoding="latin1")
+        stations_df = pd.DataFrame(self._get_data_content(response_content))
         for col in [self.X_COL, self.Y_COL]:
             stations_df[col] = utils.dms_to_decimal(stations_df[col])
+        # the altitudes are strings in the JSON data
+        stations_df[STATIONS_ALTITUDE_COL] = pd.to_numeric(
+            stations_df[STATIONS_ALTITUDE_COL]
+        )
         return stations_df
 
     def _variables_df_from_content(self, response_json) -> pd.DataFrame:
         return pd.json_normalize(
-            pd.read_json(response_json["metadatos"], encoding="latin1")["campos"]
+            self._get_data_content(response_json, "metadatos")["campos"]
         )
 
-    @property
-    def variables_df(self) -> pd.DataFrame:
-        """Variables dataframe."""
-        try:
-            return self._variables_df
-        except AttributeError:
-            with self._session.cache_disabled():
-                response_content = self._get_content_from_url(self._variables_endpoint)
-            self._variables_df = self._variables_df_from_content(response_content)
-            return self._variables_df
+    def _parsed_cache_token(self) -> tuple:
+        # the stations outside the region are filtered out when parsing
+        return tuple(self.stations_gdf.index)
 
     def _ts_df_from_content(self, response_content: Mapping) -> pd.DataFrame:
-        # response_content returns a dict with urls, where the one under the "datos" key
-        # contains the JSON data
-        ts_df = pd.read_json(response_content["datos"], encoding="latin1")
+        ts_df = pd.DataFrame(self._get_data_content(response_content))
         # filter only stations from the region
         return ts_df[
             ts_df[self._ts_df_stations_id_col].isin(self.stations_gdf.index)
         ].set_index([self._ts_df_stations_id_col, self._ts_df_time_col])
 
+    async def _ats_df_from_endpoint(self, ts_params: Mapping) -> pd.DataFrame:
+        # the data URL is requested while parsing the response (see
+        # `_ts_df_from_content`), so run the synchronous implementation in a worker
+        # thread so that the event loop is not blocked
+        return await asyncio.to_thread(self._ts_df_from_endpoint, ts_params)
+
     def get_ts_df(
         self,
         variables: VariablesType,
@@ -171,6 +173,15 @@ class AemetClient(
             Long form data frame with a time series of measurements (second-level index)
             at each station (first-level index) for each variable (column).
         """
-        # disable cache since the endpoint returns the latest 24h of data
-        with self._session.cache_disabled():
-            return self._get_ts_df(variables)
+        return self._get_ts_df(variables)
+
+    async def aget_ts_df(
+        self,
+        variables: VariablesType,
+    ) -> pd.DataFrame:
+        """Get time series data frame for the last 24h asynchronously.
+
+        Coroutine version of `get_ts_df`, see its documentation for the parameters and
+        the returned data frame.
+        """
+        return await self._aget_ts_df(variables)
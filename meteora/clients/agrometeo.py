@@ -288,24 +288,25 @@ class AgrometeoClient(StationsEndpointMixin, VariablesEndpointMixin, BaseJSONCli
         ts_df = self._get_ts_df(
             variables, start, end, scale=scale, measurement=measurement
         )
-        units_map = ts_df.attrs.get("units")
         # filter time range, otherwise, for some reason, agrometeo API includes one day
         # after
-        # TODO: dry with Meteocat, perhaps a global approach in the base client
-        time_ser = ts_df.index.get_level_values(settings.TIME_COL).to_series()
-        tz = time_ser.dt.tz
-        ts_df = ts_df.loc[
-            (
-                slice(None),
-                time_ser.between(
-                    pd.Timestamp(start, tz=tz),
-                    pd.Timestamp(end, tz=tz),
-                    inclusive="both",
-                ),
-            ),
-            :,
-        ]
-        if isinstance(units_map, Mapping):
-            ts_df.attrs = ts_df.attrs.copy()
-            ts_df.attrs["units"] = dict(units_map)
-        return ts_df
+        return self._filter_time_range(ts_df, start, end)
+
+    async def aget_ts_df(
+        self,
+        variables: VariablesType,
+        start: DateTimeType,
+        end: DateTimeType,
+        *,
+        scale: str | None = None,
+        measurement: str | None = None,
+    ) -> pd.DataFrame:
+        """Get time series data frame asynchronously.
+
+        Coroutine version of `get_ts_df`, see its documentation for the parameters and
+        the returned data frame.
+        """
+        ts_df = await self._aget_ts_df(
+            variables, start, end, scale=scale, measurement=measurement
+        )
+        return self._filter_time_range(ts_df, start, end)
@@ -9,12 +9,13 @@ import pyproj
 import requests
 from pyregeon import RegionType
 
-from meteora import settings
+from meteora import parsing, settings
 from meteora.clients.base import BaseFileClient
 from meteora.clients.mixins import (
     TimePartitionedTSMixin,
     VariablesHardcodedMixin,
 )
+from meteora.concurrency import BaseExecutor
 from meteora.utils import DateTimeType, KwargsType, VariablesType
 
 # disable pooch warnings when providing `None` as "known_hash"
@@ -46,6 +47,13 @@ ECV_DICT = {
     settings.ECV_TEMPERATURE: "temperature",
     settings.ECV_RELATIVE_HUMIDITY: "humidity",
 }
+# the type of the sensor identifiers is inferred to match the stations' index
+TS_CSV_SCHEMA = parsing.CSVSchema(
+    sep=";",
+    dtypes={SENSOR_HEIGHT_COL: "float64"}
+    | {variable_id: "float64" for variable_id in VARIABLES_DICT},
+    time_formats={TS_DF_TIME_COL: parsing.ISO8601},
+)
 
 
 class AWELClient(TimePartitionedTSMixin, VariablesHardcodedMixin, BaseFileClient):
@@ -74,6 +82,9 @@ class AWELClient(TimePartitionedTSMixin, VariablesHardcodedMixin, BaseFileClient
     progress : bool, optional
         Whether to show a tqdm progress bar for partitioned time series fetches. If
         None, the value from `settings.SHOW_PROGRESS` is used.
+    executor : {"serial", "thread", "process", "dask"} or BaseExecutor, optional
+        Executor used to run the partitions of time series fetches concurrently. If
+        None, the value from `settings.EXECUTOR` is used.
     sjoin_kwargs : dict, optional
         Keyword arguments to pass to the `geopandas.sjoin` function when filtering the
         stations within the region. If None, the value from `settings.SJOIN_KWARGS` is
@@ -95,6 +106,7 @@ class AWELClient(TimePartitionedTSMixin, VariablesHardcodedMixin, BaseFileClient
     _stations_gdf_id_col = STATIONS_GDF_ID_COL
     _ts_df_stations_id_col = TS_DF_STATIONS_ID_COL
     _ts_df_time_col = TS_DF_TIME_COL
+    _ts_csv_schema = TS_CSV_SCHEMA
     _variables_id_col = VARIABLES_ID_COL
     _variables_label_col = VARIABLES_LABEL_COL
     _variables_dict = VARIABLES_DICT
@@ -107,6 +119,7 @@ class AWELClient(TimePartitionedTSMixin, VariablesHardcodedMixin, BaseFileClient
         sensor_height: float = 2,
         pooch_kwargs: KwargsType | None = None,
         progress: bool | None = None,
+        executor: str | BaseExecutor | None = None,
         **sjoin_kwargs: KwargsType,
     ) -> None:
         """Initialize AWEL client."""
@@ -125,6 +138,8 @@ class AWELClient(TimePartitionedTSMixin, VariablesHardcodedMixin, BaseFileClient
         super().__init__()
         if progress is not None:
             self.progress = progress
+        if executor is not None:
+            self.executor = executor
 
     def _get_stations_df(self):
         today = dt_date.today()
@@ -161,9 +176,12 @@ class AWELClient(TimePartitionedTSMixin, VariablesHardcodedMixin, BaseFileClient
         period = ts_params["period"]
         return not (period.year == today.year and period.month == today.month)
 
+    def _parsed_cache_token(self) -> tuple:
+        # the sensor height and the stations outside the region are filtered out when
+        # parsing
+        return (self._sensor_height, *self.stations_gdf.index)
+
     def _ts_df_from_url(self, url, ts_params) -> pd.DataFrame:
-        start = ts_params["start"]
-        end = ts_params["end"]
         variable_cols = list(ts_params["variable_ids"])
         cols_to_keep = (
             [self._ts_df_stations_id_col]
@@ -174,14 +192,12 @@ class AWELClient(TimePartitionedTSMixin, VariablesHardcodedMixin, BaseFileClient
             source = self._ts_source(url, ts_params)
         except requests.HTTPError:
             return pd.DataFrame()
-        ts_df = pd.read_csv(source, sep=";", usecols=cols_to_keep)
+        ts_df = parsing.read_csv(source, self._ts_csv_schema, columns=cols_to_keep)
         ts_df = ts_df[ts_df[SENSOR_HEIGHT_COL] == self._sensor_height]
         ts_df = ts_df[ts_df[self._ts_df_stations_id_col].isin(self.stations_gdf.index)]
         ts_df = ts_df.groupby([self._ts_df_stations_id_col, self._ts_df_time_col]).head(
             1
         )
-        ts_df[self._ts_df_time_col] = pd.to_datetime(ts_df[self._ts_df_time_col])
-        ts_df = ts_df[ts_df[self._ts_df_time_col].between(start, end)]
         return ts_df.set_index([self._ts_df_stations_id_col, self._ts_df_time_col])
 
     def get_ts_df(
@@ -210,3 +226,16 @@ class AWELClient(TimePartitionedTSMixin, VariablesHardcodedMixin, BaseFileClient
             at each station (first-level index) for each variable (column).
         """
         return self._get_ts_df(variables, start, end)
+
+    async def aget_ts_df(
+        self,
+        variables: VariablesType,
+        start: DateTimeType,
+        end: DateTimeType,
+    ) -> pd.DataFrame:
+        """Get time series data frame asynchronously.
+
+        Coroutine version of `get_ts_df`, see its documentation for the parameters and
+        the returned data frame.
+        """
+        return await self._aget_ts_df(variables, start, end)
@@ -1,22 +1,43 @@
 """Base abstract classes for meteo station datasets."""
 
 import abc
+import asyncio
+import functools
 import io
 import logging as lg
+import os
 import re
 import time
-from collections.abc import Mapping
+import warnings
+from collections.abc import Callable, Mapping, Sequence
+from urllib import parse
 
 import geopandas as gpd
 import pandas as pd
 import pooch
 import pyproj
 import requests
-import requests_cache
 from pyregeon import RegionMixin, RegionType
-
-from meteora import settings, units, utils
-from meteora.utils import KwargsType, VariablesType
+from requests_cache import NEVER_EXPIRE, CacheMixin, ExpirationTime
+from requests_cache.policy import CacheActions
+from requests_cache.policy.expiration import get_expiration_seconds
+
+from meteora import (
+    aio,
+    concurrency,
+    parsing,
+    rate_limit,
+    retry,
+    sessions,
+    settings,
+    single_flight,
+    units,
+    utils,
+)
+from meteora import cache as http_cache
+from meteora import store as ts_store
+from meteora.clients.mixins.time_series import PartitionedTSMixin
+from meteora.utils import DateTimeType, KwargsType, VariablesType
 
 __all__ = [
     "BaseFileClient",
@@ -24,22 +45,158 @@ __all__ = [
     "BaseTextClient",
 ]
 
+# process-wide group in which concurrent identical requests and file retrievals are
+# merged
+_SINGLE_FLIGHT = single_flight.SingleFlight()
+# marker of the requests that are not in the in-memory cache tier
+_NOT_MEMORIZED = object()
+
+
+def _pooch_filepath(url: str, pooch_kwargs: Mapping) -> str:
+    """Get the path where `pooch.retrieve` stores the file of `url`."""
+    path = pooch_kwargs.get("path")
+    if path is None:
+        path = pooch.os_cache("pooch")
+    fname = pooch_kwargs.get("fname")
+    if fname is None:
+        fname = pooch.utils.unique_file_name(url)
+    return str(pooch.utils.cache_location(path).resolve() / fname)
+
+
+def _validated_within(filepath: str, expire_after: ExpirationTime) -> bool:
+    """Whether a cached file was (re)validated less than `expire_after` ago."""
+    if expire_after is None:
+        return False
+    # the validators are (re)written on each validation of the file
+    try:
+        validated = os.path.getmtime(f"{filepath}{sessions.VALIDATORS_SUFFIX}")
+    except FileNotFoundError:
+        return False
+    expire_seconds = get_expiration_seconds(expire_after)
+    return expire_seconds == NEVER_EXPIRE or time.time() - validated < expire_seconds
+
+
+# format fields (e.g., "{station_id}") of the endpoints
+_ENDPOINT_FIELD_RE = re.compile(r"\{[^{}]*\}")
+
+
+def _share_bytes_io(content: io.BytesIO, n_callers: int) -> list[io.BytesIO]:
+    # give each caller its own stream over the same (immutable) bytes
+    body = content.getvalue()
+    return [io.BytesIO(body) for _ in range(n_callers)]
+
+
+def _get_retry_policy(
+    retry_policy: retry.RetryPolicy | None, error_pause: int | None
+) -> retry.RetryPolicy | None:
+    # `error_pause` is a deprecated alias of the backoff factor of the retry policy
+    if error_pause is None:
+        return retry_policy
+    warnings.warn(
+        "`error_pause` is deprecated, use `retry_policy` instead",
+        DeprecationWarning,
+        stacklevel=3,
+    )
+    if retry_policy is None:
+        retry_policy = retry.RetryPolicy(backoff_factor=error_pause)
+    return retry_policy
+
 
 class BaseClient(RegionMixin, abc.ABC):
     """Meteora base client."""
 
+    # maximum number of requests and time window (in seconds) for each quota of the
+    # provider's API, shared by all the clients requesting the same domain (see
+    # `meteora.rate_limit`)
+    _rate_limits: rate_limit.RateLimitsType = ()
+    # names of the request parameters and/or headers that hold credentials, which are
+    # left out of cache keys (see `meteora.sessions.cache_ignored_parameters`)
+    _credential_params: Sequence[str] = ()
+    # expiration of the cached responses of each kind of endpoint, i.e., stations,
+    # variables and time series, the latter being either historical or live (e.g., the
+    # latest observations, see `_live_ts`). If None, the corresponding
+    # `settings.CACHE_EXPIRE_*` value (or `settings.CACHE_EXPIRE` if it is None) is used
+    _stations_expire_after: ExpirationTime = None
+    _variables_expire_after: ExpirationTime = None
+    _historical_ts_expire_after: ExpirationTime = None
+    _live_ts_expire_after: ExpirationTime = None
+    # whether the time series endpoint returns live data, which soon goes stale
+    _live_ts: bool = False
+    # types of the returned time series data frames, i.e., float variables by default
+    # (see `meteora.parsing.TSSchema`)
+    _ts_schema: parsing.TSSchema = parsing.TSSchema()
+
     def __init__(self, *args, **kwargs):
-        # if use_cache is None:
-        #     use_cache = settings.USE_CACHE
-        if settings.USE_CACHE:  # if use_cache:
-            session = requests_cache.CachedSession(
-                cache_name=settings.CACHE_NAME,
-                backend=settings.CACHE_BACKEND,
-                expire_after=settings.CACHE_EXPIRE,
-            )
-        else:
-            session = requests.Session()
-        self._session = session
+        # pooled session shared by all the clients of the provider, i.e., reusing its
+        # connections and cache handle (see `meteora.sessions`)
+        self._session = sessions.get_session(
+            self._session_key,
+            rate_limits=self._rate_limits,
+            credential_params=self._credential_params,
+            urls_expire_after=self._urls_expire_after,
+        )
+
+    @property
+    def _session_key(self) -> str:
+        """Key of the pooled session, i.e., the domain of the provider's API."""
+        ts_endpoint = getattr(self, "_ts_endpoint", None)
+        if isinstance(ts_endpoint, str):
+            domain = parse.urlsplit(ts_endpoint).netloc
+            if domain:
+                return domain
+        return type(self).__name__
+
+    def _get_expire_after(self, endpoint_kind: str) -> ExpirationTime:
+        """Get the expiration of the cached responses of a kind of endpoint.
+
+        Parameters
+        ----------
+        endpoint_kind : {"stations", "variables", "historical_ts", "live_ts"}
+            Kind of endpoint.
+
+        Returns
+        -------
+        expire_after : int, float, datetime.timedelta or datetime.datetime
+            Expiration, in any of the formats accepted by `requests_cache`.
+        """
+        expire_after = getattr(self, f"_{endpoint_kind}_expire_after")
+        if expire_after is None:
+            expire_after = getattr(settings, f"CACHE_EXPIRE_{endpoint_kind.upper()}")
+        if expire_after is None:
+            expire_after = settings.CACHE_EXPIRE
+        return expire_after
+
+    @property
+    def _urls_expire_after(self) -> dict:
+        """Expiration of the cached responses by URL pattern of the client's endpoints.
+
+        Format fields of the endpoints (e.g., "{station_id}") are matched by wildcards
+        and query strings are ignored. The first pattern that matches a URL applies, so
+        the time series endpoint takes precedence when it is shared with another
+        endpoint.
+        """
+        ts_kind = "live_ts" if self._live_ts else "historical_ts"
+        urls_expire_after = {}
+        for endpoint, endpoint_kind in [
+            (getattr(self, "_ts_endpoint", None), ts_kind),
+            (getattr(self, "_variables_endpoint", None), "variables"),
+            (getattr(self, "_stations_endpoint", None), "stations"),
+        ]:
+            if isinstance(endpoint, str):
+                pattern = _ENDPOINT_FIELD_RE.sub("*", endpoint.split("?")[0])
+                urls_expire_after.setdefault(
+                    pattern, self._get_expire_after(endpoint_kind)
+                )
+        return urls_expire_after
+
+    def _ts_nodata_key(self, ts_params: Mapping) -> str | None:
+        """Key of a time series partition in the negative cache.
+
+        Partitions whose key is recorded as having no data are skipped (see
+        `meteora.cache.record_nodata`). Returns None if the partitions of the client
+        are not tracked in the negative cache.
+        """
+        return None
 
     @property
     def progress(self):
@@ -56,6 +213,83 @@ class BaseClient(RegionMixin, abc.ABC):
     def progress(self, value):
         self._progress = bool(value)
 
+    @property
+    def executor(self) -> str | concurrency.BaseExecutor:
+        """Executor used to run the partitions of partitioned time series fetches.
+
+        Either an executor name among "serial", "thread", "process" and "dask" or a
+        `meteora.concurrency.BaseExecutor` instance (e.g., to set the maximum number of
+        workers for a given client). Defaults to `settings.EXECUTOR` and can be
+        overridden per-client at init time (via the `executor` keyword argument) or at
+        runtime (`client.executor = "serial"`).
+        """
+        return getattr(self, "_executor", settings.EXECUTOR)
+
+    @executor.setter
+    def executor(self, value):
+        self._executor = value
+
+    @property
+    def offline(self) -> bool:
+        """Whether the client only serves data from the caches.
+
+        In offline mode, requests are only answered from the HTTP cache (even if the
+        cached responses have expired, in which case they are reported as stale) and
+        files from the pooch cache, so the network is never accessed. Data that is not
+        cached raises a `meteora.cache.CacheMissError`. Defaults to `settings.OFFLINE`
+        and can be overridden per-client (`client.offline = True`).
+        """
+        return getattr(self, "_offline", settings.OFFLINE)
+
+    @offline.setter
+    def offline(self, value):
+        self._offline = bool(value)
+
+    def _get_cached_response(
+        self, url: str, params: KwargsType = None, headers: KwargsType = None
+    ) -> requests.Response | None:
+        """Get the response of a request from the HTTP cache, expired or not.
+
+        Returns None if the response is not cached (or the session does not cache
+        responses). The parameters and headers are added to the `request_params` and
+        `request_headers` properties.
+        """
+        cache_key = self._get_cache_key(url, params, headers)
+        if cache_key is None:
+            return None
+        return self._session.cache.get_response(cache_key)
+
+    def _get_cache_key(
+        self, url: str, params: KwargsType = None, headers: KwargsType = None
+    ) -> str | None:
+        """Get the key of a request in the HTTP cache.
+
+        Returns None if the session does not cache responses.
+        """
+        if not isinstance(self._session, CacheMixin):
+            return None
+        request = self._session.prepare_request(
+            requests.Request(
+                "GET",
+                url,
+                params={**self.request_params, **(params or {})},
+                headers={**self.request_headers, **(headers or {})},
+            )
+        )
+        return self._session.cache.create_key(request)
+
+    def __getstate__(self):
+        # sessions (notably cached ones) cannot be pickled, which is required e.g., to
+        # send the client to a process pool, so drop the session and set a new one when
+        # unpickling
+        state = self.__dict__.copy()
+        state.pop("_session", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        BaseClient.__init__(self)
+
     @utils.abstract_attribute
     def X_COL(self) -> str:  # pylint: disable=invalid-name
         """Name of the column with longitude coordinates."""
@@ -159,21 +393,33 @@ class BaseClient(RegionMixin, abc.ABC):
     def _ts_params(self, variable_ids, *args, **kwargs) -> dict:
         return {"variable_ids": variable_ids, **kwargs}
 
-    def _post_process_ts_df(self, ts_df: pd.DataFrame) -> pd.DataFrame:
-        return ts_df.apply(pd.to_numeric, axis="columns")  # .sort_index()
+    def _post_process_ts_df(
+        self, ts_df: pd.DataFrame, variable_id_ser: pd.Series
+    ) -> pd.DataFrame:
+        # type the data frame following the client's schema (without sorting)
+        schema = self._ts_schema
+        variable_dtypes = schema.variable_dtypes or {}
+        dtypes = {}
+        for variable, variable_id in variable_id_ser.items():
+            dtype = variable_dtypes.get(variable_id, schema.value_dtype)
+            if dtype is not None:
+                dtypes[variable] = dtype
+        return parsing.coerce_ts_df(ts_df, dtypes, station_dtype=schema.station_dtype)
 
     def _rename_variables_cols(
         self, ts_df: pd.DataFrame, variable_id_ser: pd.Series
     ) -> pd.DataFrame:
-        # TODO: avoid this if the user provided variable codes (in which case the dict
-        # maps variable codes to variable codes)?
-        # also keep only columns of requested variables
-        return ts_df[variable_id_ser].rename(
-            columns={
-                variable_id: variable
-                for variable, variable_id in variable_id_ser.items()
-            }
-        )
+        # keep only columns of requested variables, selecting them only if needed since
+        # the selection copies the data
+        variable_ids = pd.Index(variable_id_ser)
+        if ts_df.columns.equals(variable_ids):
+            ts_df = ts_df.copy(deep=False)
+        else:
+            ts_df = ts_df[variable_ids]
+        # the returned frame is a new object (sharing the data), so that the labels can
+        # be set without copying the data (e.g., as `rename` does)
+        ts_df.columns = pd.Index(variable_id_ser.index, name=ts_df.columns.name)
+        return ts_df
 
     def _coerce_variable_id(self, variable_id):
         """Coerce a variable id to match the variables dataframe dtype."""
@@ -231,16 +477,20 @@ class BaseClient(RegionMixin, abc.ABC):
     def _ts_df_from_endpoint(self, ts_params: Mapping) -> pd.DataFrame:
         pass
 
-    def _get_ts_df(self, variables: VariablesType, *args, **kwargs) -> pd.DataFrame:
-        # process the variables arg
-        variable_id_ser = self._get_variable_id_ser(variables)
-
-        # prepare base request parameters
-        ts_params = self._ts_params(variable_id_ser, *args, **kwargs)
-
-        # perform request
-        ts_df = self._ts_df_from_endpoint(ts_params)
+    async def _ats_df_from_endpoint(self, ts_params: Mapping) -> pd.DataFrame:
+        # clients without an asynchronous implementation run the synchronous one in a
+        # worker thread so that the event loop is not blocked. For partitioned clients,
+        # this is only reached for single partitions, hence the partitioned mixins must
+        # be skipped
+        if isinstance(self, PartitionedTSMixin):
+            ts_df_from_endpoint = self._partition_ts_df_from_endpoint
+        else:
+            ts_df_from_endpoint = self._ts_df_from_endpoint
+        return await asyncio.to_thread(ts_df_from_endpoint, ts_params)
 
+    def _process_ts_df(
+        self, ts_df: pd.DataFrame, variable_id_ser: pd.Series
+    ) -> pd.DataFrame:
         # ACHTUNG: do NOT set the station, time multi-index here because this is already
         # done in `_ts_df_from_content` in many cases since it results from groupby,
         # stack or pivot operations
@@ -252,29 +502,312 @@ class BaseClient(RegionMixin, abc.ABC):
         # variable codes in the column names).
         ts_df = self._rename_variables_cols(ts_df, variable_id_ser)
 
-        # apply a generic post-processing function (by default, ensuring numeric dtypes
-        # and sorting)
-        ts_df = self._post_process_ts_df(ts_df)
+        # apply a generic post-processing function (by default, ensuring the dtypes of
+        # the client's `_ts_schema`)
+        ts_df = self._post_process_ts_df(ts_df, variable_id_ser)
+
+        # rename stations and id labels in multi-level index. Since `ts_df` is a new
+        # object (see `_rename_variables_cols`), its index is replaced rather than
+        # copying the data (e.g., as `rename_axis` does)
+        index_names = {
+            self._ts_df_stations_id_col: settings.STATIONS_ID_COL,
+            self._ts_df_time_col: settings.TIME_COL,
+        }
+        ts_df.index = ts_df.index.set_names(
+            [index_names.get(name, name) for name in ts_df.index.names]
+        )
+
+        # attach units (in place, since `ts_df` is a new object)
+        units._set_units(ts_df, self._get_units_map(variable_id_ser))
+        return ts_df
+
+    def _get_ts_df(self, variables: VariablesType, *args, **kwargs) -> pd.DataFrame:
+        # process the variables arg
+        variable_id_ser = self._get_variable_id_ser(variables)
+
+        # prepare base request parameters
+        ts_params = self._ts_params(variable_id_ser, *args, **kwargs)
+
+        # perform request, keeping track of the stale responses from the cache (those of
+        # the partitions are set in the `"stale"` attribute of their data frames)
+        with http_cache.collect_stale() as stale_urls:
+            ts_df = self._ts_df_from_endpoint(ts_params)
+        stale_urls += ts_df.attrs.get(http_cache.STALE_ATTR, [])
+
+        # process and return
+        return http_cache.mark_stale(
+            self._process_ts_df(ts_df, variable_id_ser), stale_urls
+        )
+
+    async def _aget_ts_df(
+        self, variables: VariablesType, *args, **kwargs
+    ) -> pd.DataFrame:
+        # the variables and stations metadata may require (synchronous) requests, which
+        # are run in a worker thread (the metadata is then cached in the client)
+        variable_id_ser = await asyncio.to_thread(self._get_variable_id_ser, variables)
+        ts_params = await asyncio.to_thread(
+            self._ts_params, variable_id_ser, *args, **kwargs
+        )
+
+        # perform the requests within a shared asynchronous HTTP client
+        async with aio.async_client():
+            with http_cache.collect_stale() as stale_urls:
+                ts_df = await self._ats_df_from_endpoint(ts_params)
+        stale_urls += ts_df.attrs.get(http_cache.STALE_ATTR, [])
+
+        # process and return
+        return http_cache.mark_stale(
+            self._process_ts_df(ts_df, variable_id_ser), stale_urls
+        )
+
+    def _ts_leaves(self, ts_params: Mapping) -> list[Mapping]:
+        """Get the parameters of the innermost partitions of a time series query."""
+        if isinstance(self, PartitionedTSMixin):
+            return list(
+                self._iter_plan_leaves(
+                    self._partition_plan(ts_params, self._partition_mixins())
+                )
+            )
+        return [ts_params]
+
+    def _ts_cache_entries(self, leaves: Sequence[Mapping]) -> list[list[dict]]:
+        """Get the "url", "key", "kind", "status" and "size" of each partition.
+
+        Returns, for each partition, a list with an entry for each of its requests or
+        files. See `meteora.cache.CacheCoverage` for the meaning of each value. Clients
+        whose requests are unknown report each partition as a single missing request.
+        """
+        return [
+            [
+                {
+                    "url": None,
+                    "key": None,
+                    "kind": None,
+                    "status": http_cache.COVERAGE_MISSING,
+                    "size": None,
+                }
+            ]
+            for _ in leaves
+        ]
+
+    def _parsed_cache_token(self) -> tuple:
+        """Client state on which the parsed time series partitions depend.
+
+        Part of the key of the parsed partitions (see `_get_parsed_key`), e.g., for
+        clients that filter out the stations outside the region while parsing.
+        """
+        return ()
+
+    def _ts_parsed_cache(self, ts_params: Mapping) -> bool:
+        """Whether the parsed data frame of the time series partition can be cached.
 
-        # rename stations and id labels in multi-level index
-        ts_df = ts_df.rename_axis(
-            index={
-                self._ts_df_stations_id_col: settings.STATIONS_ID_COL,
-                self._ts_df_time_col: settings.TIME_COL,
+        Partitions whose data frame is not only parsed from their own source (e.g.,
+        that is completed with another file) should not be cached.
+        """
+        return True
+
+    def _caches_parsed(self, ts_params: Mapping) -> bool:
+        """Whether the parsed data frame of the time series partition is cached."""
+        return settings.CACHE_PARSED_PARTITIONS and self._ts_parsed_cache(ts_params)
+
+    def _get_parsed_key(
+        self, ts_params: Mapping, get_validator: Callable[[], tuple | None]
+    ) -> str | None:
+        """Get the key of a parsed time series partition given its source validator.
+
+        The key only depends on the source (e.g., the URL and the cache key of the
+        response or the path of the file, see `get_validator`) and on the client state
+        that is relevant to parse it (see `_parsed_cache_token`), so that the parsed
+        partition is shared by the queries of other time ranges or variables. Returns
+        None if the parsed partitions are not cached (see
+        `settings.CACHE_PARSED_PARTITIONS`) or the source is not cached as is. The
+        validator of the source (e.g., a cache lookup or a file stat) is only computed,
+        by calling `get_validator`, if the parsed partitions are cached.
+        """
+        if not self._caches_parsed(ts_params):
+            return None
+        validator = get_validator()
+        if validator is None:
+            return None
+        return http_cache.parsed_key(
+            type(self).__module__,
+            type(self).__qualname__,
+            self._parsed_cache_token(),
+            validator,
+        )
+
+    def get_cache_coverage(
+        self, variables: VariablesType, *args, **kwargs
+    ) -> http_cache.CacheCoverage:
+        """Get which partitions of a time series query are cached.
+
+        The partitions of the query (e.g., periods, stations or variables) are checked
+        against the HTTP and pooch caches without requesting them, so that the network
+        is only accessed if the metadata required to plan the partitions (e.g., the
+        stations) is not cached. Partitions that are cached but would be revalidated
+        with the server are reported as "stale".
+
+        Parameters
+        ----------
+        variables, *args, **kwargs
+            Target variables and further arguments of the query, as passed to
+            `get_ts_df`.
+
+        Returns
+        -------
+        coverage : meteora.cache.CacheCoverage
+            Named tuple with the coverage data frame of the partitions (`coverage_df`),
+            the number of requests that the query would send (`n_requests`) and an
+            estimate of the bytes that it would download (`n_bytes`).
+        """
+        variable_id_ser = self._get_variable_id_ser(variables)
+        ts_params = self._ts_params(variable_id_ser, *args, **kwargs)
+        leaves = self._ts_leaves(ts_params)
+        nodata_keys = [self._ts_nodata_key(_ts_params) for _ts_params in leaves]
+        known_nodata_keys = http_cache.get_nodata(
+            key for key in nodata_keys if key is not None
+        )
+        rows = []
+        for _ts_params, entries, nodata_key in zip(
+            leaves, self._ts_cache_entries(leaves), nodata_keys
+        ):
+            # the partition values, i.e., the parameters set by the partitions
+            partition_values = {
+                key: value for key, value in _ts_params.items() if key not in ts_params
             }
+            for entry in entries:
+                if nodata_key in known_nodata_keys:
+                    entry["status"] = http_cache.COVERAGE_NODATA
+                rows.append({**partition_values, **entry})
+        coverage_df = pd.DataFrame(
+            rows, columns=None if rows else ["url", "key", "kind", "status", "size"]
         )
+        return http_cache.CacheCoverage.from_frame(coverage_df)
+
+    @property
+    def _store_provider(self) -> str:
+        """Name of the provider's data in a `meteora.store.ParquetStore`."""
+        return type(self).__name__
+
+    def sync(
+        self,
+        variables: VariablesType,
+        start: DateTimeType,
+        end: DateTimeType,
+        store: str | os.PathLike | ts_store.ParquetStore,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """Sync the time series of the region into a local Parquet store.
+
+        The requested period is compared against the periods already synced for each
+        station of the region and variable, and only the missing gaps are fetched
+        (through `get_ts_df`, i.e., the partitions that overlap them) and appended to
+        the store. Periods are recorded as synced up to the last timestamp of the
+        fetched data, so that data that is not published yet is fetched by the next
+        sync, whereas gaps without any data are recorded as synced up to their end (or
+        up to now if it is in the future).
+
+        Parameters
+        ----------
+        variables : str, int or list-like of str or int
+            Target variables, as passed to `get_ts_df`. The stored columns are named
+            after them, so subsequent syncs must use the same names.
+        start, end : datetime-like, str, int, float
+            Values representing the start and end of the requested data period
+            respectively.
+        store : str, path-like or meteora.store.ParquetStore
+            Store, or path to its root directory.
+        **kwargs
+            Additional keyword arguments to pass to `get_ts_df`.
 
-        # attach units
-        units_map = self._get_units_map(variable_id_ser)
-        ts_df = units.attach_units(ts_df, units_map)
+        Returns
+        -------
+        appended_df : pandas.DataFrame
+            Data appended to the store, in the format of `get_ts_df`.
+        """
+        if not isinstance(store, ts_store.ParquetStore):
+            store = ts_store.ParquetStore(store)
+        variable_id_ser = self._get_variable_id_ser(variables)
+        stations = list(self.stations_gdf.index)
+        station_gaps = store.gaps(
+            self._store_provider,
+            stations,
+            [str(variable) for variable in variable_id_ser.index],
+            start,
+            end,
+        )
+        # the gaps of all the stations are fetched together, since the partitions are
+        # requested for the whole region
+        appended_dfs = []
+        for gap_start, gap_end in ts_store.merge_intervals(
+            gap for gaps in station_gaps.values() for gap in gaps
+        ):
+            ts_df = self._get_ts_df(variables, gap_start, gap_end, **kwargs)
+            if ts_df.empty:
+                # record the period without data as synced for the requested variables
+                ts_df = ts_df.reindex(columns=variable_id_ser.index)
+            appended_dfs.append(
+                store.append(
+                    self._store_provider, ts_df, gap_start, gap_end, stations=stations
+                )
+            )
+        if not appended_dfs:
+            utils.log(f"The store at '{store.path}' is already in sync.")
+            return pd.DataFrame(columns=variable_id_ser.index)
+        return pd.concat(appended_dfs)
 
-        # return
+    def _filter_time_range(
+        self,
+        ts_df: pd.DataFrame,
+        start: DateTimeType,
+        end: DateTimeType,
+        *,
+        time_col: str | None = None,
+    ) -> pd.DataFrame:
+        # filter the time range, for APIs that return full periods (e.g., days) that
+        # extend beyond the requested `start` and `end`
+        if time_col is None:
+            time_col = settings.TIME_COL
+        # keep the attributes, e.g., units and stale responses
+        attrs = ts_df.attrs.copy()
+        time_ser = ts_df.index.get_level_values(time_col).to_series()
+        tz = time_ser.dt.tz
+        ts_df = ts_df.loc[
+            (
+                slice(None),
+                time_ser.between(
+                    pd.Timestamp(start, tz=tz),
+                    pd.Timestamp(end, tz=tz),
+                    inclusive="both",
+                ),
+            ),
+            :,
+        ]
+        ts_df.attrs = attrs
         return ts_df
 
 
 class BaseRequestClient(BaseClient, abc.ABC):
     """Base class for clients that request content over HTTP."""
 
+    def _request_kwargs(
+        self,
+        params: KwargsType = None,
+        headers: KwargsType = None,
+        request_kwargs: KwargsType = None,
+    ) -> tuple[dict, dict, dict]:
+        """Merge the request parameters, headers and keyword arguments with defaults."""
+        _params = self.request_params.copy()
+        _headers = self.request_headers.copy()
+        _request_kwargs = settings.REQUEST_KWARGS.copy()
+        if params is not None:
+            _params.update(params)
+        if headers is not None:
+            _headers.update(headers)
+        if request_kwargs is not None:
+            _request_kwargs.update(request_kwargs)
+        return _params, _headers, _request_kwargs
+
     def _get(
         self,
         url: str,
@@ -304,24 +837,296 @@ class BaseRequestClient(BaseClient, abc.ABC):
         response : requests.Response
             Response object from the server.
         """
-        _params = self.request_params.copy()
-        _headers = self.request_headers.copy()
-        _request_kwargs = settings.REQUEST_KWARGS.copy()
-        if params is not None:
-            _params.update(params)
-        if headers is not None:
-            _headers.update(headers)
-        if request_kwargs is not None:
-            _request_kwargs.update(request_kwargs)
-
+        _params, _headers, _request_kwargs = self._request_kwargs(
+            params, headers, request_kwargs
+        )
         return self._session.get(
             url, params=_params, headers=_headers, **_request_kwargs
         )
 
+    def _prepare_request(
+        self, url: str, params: Mapping, headers: Mapping
+    ) -> requests.PreparedRequest:
+        """Prepare a GET request with the session's defaults (e.g., headers, auth)."""
+        return self._session.prepare_request(
+            requests.Request("GET", url, params=params, headers=headers)
+        )
+
+    async def _aget(
+        self,
+        url: str,
+        *,
+        params: KwargsType = None,
+        headers: KwargsType = None,
+        **request_kwargs: KwargsType,
+    ) -> requests.Response:
+        """Get response for the url asynchronously (from the cache or from the API).
+
+        Parameters
+        ----------
+        url : str
+            URL to request.
+        params : dict, optional
+            Parameters to pass to the request. They will be added to the default params
+            set in the `request_params` property.
+        headers : dict, optional
+            Headers to pass to the request. They will be added to the default headers
+            set in the `request_headers` property.
+        request_kwargs : dict, optional
+            Additional keyword arguments, as in `_get`. If None, the value from
+            `settings.REQUEST_KWARGS` is used.
+
+        Returns
+        -------
+        response : requests.Response
+            Response object from the server.
+        """
+        _params, _headers, _request_kwargs = self._request_kwargs(
+            params, headers, request_kwargs
+        )
+        request = self._prepare_request(url, _params, _headers)
+        return await aio.send(self._session, request, **_request_kwargs)
+
     @abc.abstractmethod
     def _get_content_from_response(self, response: requests.Response):
         pass
 
+    def _share_content(self, response_content, n_callers: int) -> list:
+        """Share the content of a response among the callers of merged requests.
+
+        The content is shared as is, so it must not be modified in place (e.g., copy
+        JSON dictionaries before popping keys from them).
+        """
+        return [response_content] * n_callers
+
+    def _share_result(self, result: tuple, n_callers: int) -> list[tuple]:
+        """Share the (response content, stale URL) result of merged requests."""
+        response_content, stale_url = result
+        return [
+            (_response_content, stale_url)
+            for _response_content in self._share_content(response_content, n_callers)
+        ]
+
+    def _request_key(
+        self, url: str, params: KwargsType = None, headers: KwargsType = None
+    ) -> tuple:
+        """Key identifying identical requests (see `meteora.single_flight`)."""
+        _params, _headers, _ = self._request_kwargs(params, headers)
+        return (
+            type(self),
+            url,
+            parse.urlencode(sorted(_params.items()), doseq=True),
+            tuple(sorted(_headers.items())),
+        )
+
+    def _memory_key(
+        self, url: str, params: KwargsType = None, headers: KwargsType = None
+    ) -> tuple | None:
+        """Key of a request in the in-memory cache tier (see `meteora.cache`).
+
+        The key is built from the HTTP cache key, hence it leaves out the credentials.
+        Returns None if the session does not cache responses, since the tier only
+        holds the contents of responses of the HTTP cache.
+        """
+        if not isinstance(self._session, CacheMixin) or self._session.settings.disabled:
+            return None
+        # the backend is part of the key since sessions with different settings (e.g.,
+        # expiration) have different backends
+        return (self._session.cache, self._get_cache_key(url, params, headers))
+
+    def _memory_value(self, response: requests.Response, response_content) -> tuple:
+        """Get the value to keep in the in-memory cache tier and the content to return.
+
+        The value is shared by all the subsequent requests, see `_content_from_memory`.
+        """
+        return response_content, response_content
+
+    def _content_from_memory(self, value):
+        """Get the response content from a value of the in-memory cache tier."""
+        return value
+
+    def _get_memorized_content(
+        self, url: str, params: KwargsType = None, headers: KwargsType = None
+    ):
+        """Get the response content from the in-memory cache tier, if there."""
+        memory_cache = http_cache.get_memory_cache()
+        memory_key = self._memory_key(url, params, headers)
+        if memory_cache is None or memory_key is None:
+            return _NOT_MEMORIZED
+        entry = memory_cache.get(memory_key, _NOT_MEMORIZED)
+        if entry is _NOT_MEMORIZED:
+            return _NOT_MEMORIZED
+        value, size = entry
+        # the hits of the tier are accesses to the cached responses too (e.g., so that
+        # they are not evicted as least recently used)
+        http_cache.record_key(memory_key[1], size)
+        return self._content_from_memory(value)
+
+    def _memorize_content(
+        self,
+        url: str,
+        params: KwargsType,
+        headers: KwargsType,
+        response: requests.Response,
+        response_content,
+    ):
+        """Keep the content of a cached response in the in-memory cache tier.
+
+        The entry expires with the cached response, and its size is the one of the
+        response body. Responses larger than `settings.CACHE_MEMORY_MAX_ENTRY_SIZE` are
+        not kept. Returns the content to pass on.
+        """
+        memory_cache = http_cache.get_memory_cache()
+        memory_key = self._memory_key(url, params, headers)
+        body = response._content
+        if (
+            memory_cache is None
+            or memory_key is None
+            # only the responses that are stored in the HTTP cache
+            or not getattr(response, "cache_key", None)
+            or not isinstance(body, bytes)
+            or len(body)
+            > min(memory_cache.max_size, settings.CACHE_MEMORY_MAX_ENTRY_SIZE)
+        ):
+            return response_content
+        value, response_content = self._memory_value(response, response_content)
+        expires = getattr(response, "expires", None)
+        memory_cache.set(
+            memory_key,
+            (value, len(body)),
+            len(body),
+            expires=None if expires is None else expires.timestamp(),
+        )
+        return response_content
+
+    def _get_retry_pause(
+        self,
+        url: str,
+        attempt: int,
+        retry_policy: retry.RetryPolicy,
+        *,
+        response: requests.Response | None = None,
+        exception: Exception | None = None,
+    ) -> float:
+        """Get the pause before re-trying a failed request, or raise."""
+        domain = parse.urlsplit(url).netloc
+        if exception is not None:
+            error_msg = f"{domain} request failed ({exception!r})"
+        else:
+            error_msg = f"{domain} returned {response.status_code}"
+        if not retry_policy.is_retryable(response=response, exception=exception):
+            # unhandled error (e.g., 4xx status code), throw an exception
+            utils.log(error_msg, level=lg.ERROR)
+            if exception is not None:
+                raise exception
+            raise Exception(
+                f"Server returned:\n{response} {response.reason}\n{response.text}"
+            )
+        # connection errors and server errors (e.g., 504 'gateway timeout') may be due
+        # to a provider outage, whereas throttling (e.g., 429 'too many requests')
+        # shows that the provider is up
+        circuit_breaker = retry.get_circuit_breaker(domain)
+        if retry.is_outage(response=response, exception=exception):
+            circuit_breaker.record_failure()
+        else:
+            circuit_breaker.record_success()
+        if attempt >= retry_policy.max_attempts:
+            utils.log(
+                f"{error_msg}: giving up after {attempt} attempts", level=lg.ERROR
+            )
+            if exception is not None:
+                raise exception
+            raise Exception(
+                f"Server returned:\n{response} {response.reason}\n{response.text}"
+            )
+        pause = retry_policy.get_pause(attempt, response=response)
+        utils.log(f"{error_msg}: retry in {pause:.1f} secs", level=lg.WARNING)
+        return pause
+
+    def _get_stale_response(
+        self, url: str, params: KwargsType = None, headers: KwargsType = None
+    ) -> requests.Response | None:
+        """Get the cached response of a failed request, if stale-if-error allows it.
+
+        This complements `requests_cache`, which does not fall back to the cached
+        response when the failed request is a conditional one (i.e., when the cached
+        response has validators) nor, obviously, when no request is sent because the
+        circuit of the provider is open.
+        """
+        if not isinstance(self._session, CacheMixin):
+            return None
+        cache_settings = self._session.settings
+        if not cache_settings.stale_if_error:
+            return None
+        _params, _headers, _ = self._request_kwargs(params, headers)
+        request = self._prepare_request(url, _params, _headers)
+        actions = CacheActions.from_request(
+            self._session.cache.create_key(request), request, cache_settings
+        )
+        cached_response = self._session.cache.get_response(actions.cache_key)
+        if not actions.is_usable(cached_response, error=True):
+            return None
+        return cached_response
+
+    def _get_stale_result(
+        self,
+        url: str,
+        params: KwargsType,
+        headers: KwargsType,
+        retry_policy: retry.RetryPolicy | None = None,
+        *,
+        response: requests.Response | None = None,
+        exception: Exception | None = None,
+    ) -> tuple | None:
+        """Get the (content, stale URL) result of a failed request from the cache.
+
+        Returns None if there is no cached response to fall back to (see
+        `_get_stale_response`). Otherwise, if `retry_policy` is provided, outages (see
+        `retry.is_outage`) are recorded by the circuit breaker of the provider.
+        """
+        stale_response = self._get_stale_response(url, params, headers)
+        if stale_response is None:
+            return None
+        domain = parse.urlsplit(url).netloc
+        if retry_policy is not None and retry.is_outage(
+            response=response, exception=exception
+        ):
+            retry.get_circuit_breaker(domain).record_failure()
+        utils.log(
+            f"{domain} request failed, serving stale cached response for "
+            f"{stale_response.url}",
+            level=lg.WARNING,
+        )
+        http_cache.record_response(stale_response)
+        return self._get_content_from_response(stale_response), stale_response.url
+
+    def _get_offline_result(
+        self, url: str, params: KwargsType, headers: KwargsType
+    ) -> tuple:
+        """Get the (content, stale URL) result of a request from the HTTP cache only."""
+        cached_response = self._get_cached_response(url, params, headers)
+        if cached_response is None:
+            raise http_cache.CacheMissError([self._get_request_url(url, params)])
+        http_cache.record_response(cached_response)
+        response_content = self._get_content_from_response(cached_response)
+        if cached_response.is_expired:
+            return response_content, cached_response.url
+        return response_content, None
+
+    def _get_request_url(self, url: str, params: KwargsType = None) -> str:
+        """Get the URL of a request with its query string, without credentials."""
+        _params, _, _ = self._request_kwargs(params)
+        credential_params = set(self._credential_params)
+        query = parse.urlencode(
+            sorted(
+                (key, value)
+                for key, value in _params.items()
+                if key not in credential_params
+            ),
+            doseq=True,
+        )
+        return f"{url}?{query}" if query else url
+
     def _get_content_from_url(
         self,
         url: str,
@@ -330,6 +1135,7 @@ class BaseRequestClient(BaseClient, abc.ABC):
         request_kwargs: KwargsType = None,
         pause: int | None = None,
         error_pause: int | None = None,
+        retry_policy: retry.RetryPolicy | None = None,
     ):
         """Get the response content from a given URL.
 
@@ -350,51 +1156,221 @@ class BaseRequestClient(BaseClient, abc.ABC):
             How long to pause before request, in seconds. If None, the value from
             `settings.PAUSE` is used.
         error_pause : int, optional
-            How long to pause in seconds before re-trying request if error. If None, the
-            value from `settings.ERROR_PAUSE` is used.
+            Deprecated, use `retry_policy` instead. Pause before the first retry of a
+            failed request, in seconds, if `retry_policy` is None.
+        retry_policy : RetryPolicy, optional
+            Policy to retry failed requests (connection errors and retryable status
+            codes). If None, a policy with the `settings.RETRY_*` values is used.
 
         Returns
         -------
         response_content
             Response content.
         """
+        retry_policy = _get_retry_policy(retry_policy, error_pause)
+        # repeated requests are served (already decoded) from the in-memory cache tier
+        response_content = self._get_memorized_content(url, params, headers)
+        if response_content is not _NOT_MEMORIZED:
+            return response_content
+        # concurrent identical requests (e.g., from other threads) are merged into one
+        response_content, stale_url = _SINGLE_FLIGHT.do(
+            self._request_key(url, params, headers),
+            self._fetch_content_from_url,
+            url,
+            params,
+            headers,
+            request_kwargs,
+            retry_policy,
+            share=self._share_result,
+        )
+        if stale_url is not None:
+            http_cache.record_stale(stale_url)
+        return response_content
+
+    def _fetch_content_from_url(
+        self,
+        url: str,
+        params: KwargsType,
+        headers: KwargsType,
+        request_kwargs: KwargsType,
+        retry_policy: retry.RetryPolicy | None,
+    ):
+        """Request the URL (retrying failures) and get the response content.
+
+        Returns the response content and, if the response is a stale one from the
+        cache, its URL (otherwise None).
+        """
+        if self.offline:
+            return self._get_offline_result(url, params, headers)
         if request_kwargs is None:
             request_kwargs = {}
-        response = self._get(url, params=params, headers=headers, **request_kwargs)
-        sc = response.status_code
-        try:
-            response_content = self._get_content_from_response(response)
-        except Exception:  # pragma: no cover
-            domain = re.findall(r"(?s)//(.*?)/", url)[0]
-            if sc in {429, 504}:
-                # 429 is 'too many requests' and 504 is 'gateway timeout' from
-                # server overload: handle these by pausing then recursively
-                # re-trying until we get a valid response from the server
-                if error_pause is None:
-                    error_pause = settings.ERROR_PAUSE
-                utils.log(
-                    f"{domain} returned {sc}: retry in {error_pause} secs",
-                    level=lg.WARNING,
+        if retry_policy is None:
+            retry_policy = retry.RetryPolicy()
+        circuit_breaker = retry.get_circuit_breaker(parse.urlsplit(url).netloc)
+        since = time.monotonic()
+        for attempt in range(1, retry_policy.max_attempts + 1):
+            # if the provider is down, fall back to the cached response right away
+            # (stale-if-error) or wait for the trial request of the circuit breaker
+            if circuit_breaker.is_open and (
+                stale_result := self._get_stale_result(url, params, headers)
+            ):
+                return stale_result
+            try:
+                circuit_breaker.acquire(since)
+            except retry.CircuitOpenError:
+                if stale_result := self._get_stale_result(url, params, headers):
+                    return stale_result
+                raise
+            try:
+                response = self._get(
+                    url, params=params, headers=headers, **request_kwargs
                 )
-                time.sleep(error_pause)
-                # note that this is a recursive call
-                response_content = self._get_content_from_url(
-                    url,
-                    params=params,
-                    headers=headers,
-                    request_kwargs=request_kwargs,
-                    pause=pause,
-                    error_pause=error_pause,
+            except requests.RequestException as exception:
+                if stale_result := self._get_stale_result(
+                    url, params, headers, retry_policy, exception=exception
+                ):
+                    return stale_result
+                time.sleep(
+                    self._get_retry_pause(
+                        url, attempt, retry_policy, exception=exception
+                    )
                 )
-            else:
-                # else, this was an unhandled status code, throw an exception
-                utils.log(f"{domain} returned {sc}", level=lg.ERROR)
-                raise Exception(
-                    f"Server returned:\n{response} {response.reason}\n{response.text}"
+                continue
+            try:
+                response_content = self._get_content_from_response(response)
+            except Exception:
+                if response.ok:
+                    # the provider is up but its content cannot be decoded (e.g.,
+                    # malformed JSON), which is not retried
+                    circuit_breaker.record_success()
+                    raise
+                if stale_result := self._get_stale_result(
+                    url, params, headers, retry_policy, response=response
+                ):
+                    return stale_result
+                time.sleep(
+                    self._get_retry_pause(url, attempt, retry_policy, response=response)
                 )
+                continue
+            http_cache.record_response(response)
+            if http_cache.is_stale(response):
+                # the provider may be down (stale-if-error), so leave the circuit as is
+                utils.log(f"Serving stale cached response for {response.url}")
+                return response_content, response.url
+            circuit_breaker.record_success()
+            return (
+                self._memorize_content(
+                    url, params, headers, response, response_content
+                ),
+                None,
+            )
 
+    async def _aget_content_from_url(
+        self,
+        url: str,
+        params: KwargsType = None,
+        headers: KwargsType = None,
+        request_kwargs: KwargsType = None,
+        pause: int | None = None,
+        error_pause: int | None = None,
+        retry_policy: retry.RetryPolicy | None = None,
+    ):
+        """Get the response content from a given URL asynchronously.
+
+        Coroutine version of `_get_content_from_url`, see its documentation for the
+        parameters and the returned content.
+        """
+        retry_policy = _get_retry_policy(retry_policy, error_pause)
+        response_content = self._get_memorized_content(url, params, headers)
+        if response_content is not _NOT_MEMORIZED:
+            return response_content
+        # concurrent identical requests (from other tasks) are merged into one
+        response_content, stale_url = await _SINGLE_FLIGHT.ado(
+            self._request_key(url, params, headers),
+            self._afetch_content_from_url,
+            url,
+            params,
+            headers,
+            request_kwargs,
+            retry_policy,
+            share=self._share_result,
+        )
+        if stale_url is not None:
+            http_cache.record_stale(stale_url)
         return response_content
 
+    async def _afetch_content_from_url(
+        self,
+        url: str,
+        params: KwargsType,
+        headers: KwargsType,
+        request_kwargs: KwargsType,
+        retry_policy: retry.RetryPolicy | None,
+    ):
+        """Coroutine version of `_fetch_content_from_url`."""
+        if self.offline:
+            return self._get_offline_result(url, params, headers)
+        if request_kwargs is None:
+            request_kwargs = {}
+        if retry_policy is None:
+            retry_policy = retry.RetryPolicy()
+        circuit_breaker = retry.get_circuit_breaker(parse.urlsplit(url).netloc)
+        since = time.monotonic()
+        for attempt in range(1, retry_policy.max_attempts + 1):
+            if circuit_breaker.is_open and (
+                stale_result := self._get_stale_result(url, params, headers)
+            ):
+                return stale_result
+            try:
+                await circuit_breaker.aacquire(since)
+            except retry.CircuitOpenError:
+                if stale_result := self._get_stale_result(url, params, headers):
+                    return stale_result
+                raise
+            try:
+                response = await self._aget(
+                    url, params=params, headers=headers, **request_kwargs
+                )
+            except requests.RequestException as exception:
+                if stale_result := self._get_stale_result(
+                    url, params, headers, retry_policy, exception=exception
+                ):
+                    return stale_result
+                await asyncio.sleep(
+                    self._get_retry_pause(
+                        url, attempt, retry_policy, exception=exception
+                    )
+                )
+                continue
+            try:
+                response_content = self._get_content_from_response(response)
+            except Exception:
+                if response.ok:
+                    # the provider is up but its content cannot be decoded (e.g.,
+                    # malformed JSON), which is not retried
+                    circuit_breaker.record_success()
+                    raise
+                if stale_result := self._get_stale_result(
+                    url, params, headers, retry_policy, response=response
+                ):
+                    return stale_result
+                await asyncio.sleep(
+                    self._get_retry_pause(url, attempt, retry_policy, response=response)
+                )
+                continue
+            http_cache.record_response(response)
+            if http_cache.is_stale(response):
+                # the provider may be down (stale-if-error), so leave the circuit as is
+                utils.log(f"Serving stale cached response for {response.url}")
+                return response_content, response.url
+            circuit_breaker.record_success()
+            return (
+                self._memorize_content(
+                    url, params, headers, response, response_content
+                ),
+                None,
+            )
+
     def _stations_df_from_endpoint(self) -> pd.DataFrame:
         response_content = self._get_content_from_url(self._stations_endpoint)
         return self._stations_df_from_content(response_content)
@@ -409,12 +1385,111 @@ class BaseRequestClient(BaseClient, abc.ABC):
     def _ts_query_params(self, ts_params: Mapping) -> Mapping:
         return ts_params
 
+    def _ts_response_validator(self, url: str, params: Mapping) -> tuple | None:
+        """Get the validator of the fresh cached response of a request, if any."""
+        if not isinstance(self._session, CacheMixin) or self._session.settings.disabled:
+            return None
+        cache_key = self._get_cache_key(url, params)
+        try:
+            expires, size = http_cache.lookup_responses(
+                self._session.cache, [cache_key]
+            )[cache_key]
+        except KeyError:
+            return None
+        if expires is not None and expires <= time.time():
+            return None
+        # the expiration time changes when the response is fetched again
+        return cache_key, expires, size
+
+    def _ts_cache_entries(self, leaves: Sequence[Mapping]) -> list[list[dict]]:
+        return [
+            [entry]
+            for entry in self._request_cache_entries(
+                [
+                    (
+                        self._format_ts_endpoint(_ts_params),
+                        self._ts_query_params(_ts_params),
+                    )
+                    for _ts_params in leaves
+                ]
+            )
+        ]
+
+    def _request_cache_entries(self, requests_: Sequence[tuple]) -> list[dict]:
+        """Get the cache entry of each `(url, params)` request of the time series."""
+        keys = [self._get_cache_key(url, params) for url, params in requests_]
+        if (
+            isinstance(self._session, CacheMixin)
+            and not self._session.settings.disabled
+        ):
+            responses = http_cache.lookup_responses(self._session.cache, keys)
+        else:
+            responses = {}
+        now = time.time()
+        entries = []
+        for (url, params), key in zip(requests_, keys):
+            try:
+                expires, size = responses[key]
+            except KeyError:
+                status, size = http_cache.COVERAGE_MISSING, None
+            else:
+                status = (
+                    http_cache.COVERAGE_STALE
+                    if expires is not None and expires <= now
+                    else http_cache.COVERAGE_CACHED
+                )
+            entries.append(
+                {
+                    "url": self._get_request_url(url, params),
+                    "key": key,
+                    "kind": http_cache.HTTP_KIND,
+                    "status": status,
+                    "size": size,
+                }
+            )
+        return entries
+
+    def _read_parsed_ts_df(
+        self, ts_params: Mapping, url: str, params: Mapping
+    ) -> pd.DataFrame | None:
+        parsed_key = self._get_parsed_key(
+            ts_params, functools.partial(self._ts_response_validator, url, params)
+        )
+        if parsed_key is None:
+            return None
+        return http_cache.read_parsed(parsed_key)
+
+    def _write_parsed_ts_df(
+        self, ts_params: Mapping, url: str, params: Mapping, ts_df: pd.DataFrame
+    ) -> None:
+        # the response may have been fetched (or served stale) in the meantime
+        parsed_key = self._get_parsed_key(
+            ts_params, functools.partial(self._ts_response_validator, url, params)
+        )
+        if parsed_key is not None:
+            http_cache.write_parsed(parsed_key, ts_df)
+
     def _ts_df_from_endpoint(self, ts_params: Mapping) -> pd.DataFrame:
         endpoint = self._format_ts_endpoint(ts_params)
-        response_content = self._get_content_from_url(
-            endpoint, params=self._ts_query_params(ts_params)
-        )
-        return self._ts_df_from_content(response_content)
+        params = self._ts_query_params(ts_params)
+        ts_df = self._read_parsed_ts_df(ts_params, endpoint, params)
+        if ts_df is not None:
+            return ts_df
+        response_content = self._get_content_from_url(endpoint, params=params)
+        ts_df = self._ts_df_from_content(response_content)
+        self._write_parsed_ts_df(ts_params, endpoint, params, ts_df)
+        return ts_df
+
+    async def _ats_df_from_endpoint(self, ts_params: Mapping) -> pd.DataFrame:
+        endpoint = self._format_ts_endpoint(ts_params)
+        params = self._ts_query_params(ts_params)
+        ts_df = self._read_parsed_ts_df(ts_params, endpoint, params)
+        if ts_df is not None:
+            return ts_df
+        response_content = await self._aget_content_from_url(endpoint, params=params)
+        ts_df = self._ts_df_from_content(response_content)
+        self._write_parsed_ts_df(ts_params, endpoint, params, ts_df)
+        return ts_df
 
 
 class BaseJSONClient(BaseRequestClient):
@@ -425,13 +1500,77 @@ class BaseJSONClient(BaseRequestClient):
 
 
 class BaseTextClient(BaseRequestClient):
-    """Base class for clients that return text-encoded (e.g., CSV) responses."""
+    """Base class for clients that return text-encoded (e.g., CSV) responses.
+
+    Unless `settings.STREAM_TEXT_RESPONSES` is False, the response content is a text
+    stream that is decoded incrementally as it is read (e.g., by `pandas.read_csv`), so
+    that the body is never held in memory as a string. Responses that are not cached
+    are moreover read straight from the connection.
+    """
+
+    def _get(
+        self,
+        url: str,
+        *,
+        params: KwargsType = None,
+        headers: KwargsType = None,
+        **request_kwargs: KwargsType,
+    ) -> requests.Response:
+        if settings.STREAM_TEXT_RESPONSES:
+            request_kwargs.setdefault("stream", True)
+        return super()._get(url, params=params, headers=headers, **request_kwargs)
 
     def _get_content_from_response(
         self,
         response: requests.Response,
-    ) -> io.StringIO:
-        return io.StringIO(response.content.decode(response.encoding))
+    ) -> io.TextIOBase:
+        response.raise_for_status()
+        encoding = response.encoding or "utf-8"
+        if not settings.STREAM_TEXT_RESPONSES:
+            return io.StringIO(response.content.decode(encoding))
+        if response._content is False:
+            # the body has not been read yet (i.e., the response is neither cached nor
+            # from the asynchronous engine), so read it from the connection, decoding
+            # any gzip/deflate transfer encoding on the fly (the raw response must not
+            # be closed when exhausted for `io.TextIOWrapper` to detect the end of file)
+            response.raw.decode_content = True
+            response.raw.auto_close = False
+            body = response.raw
+        else:
+            # `io.BytesIO` shares the buffer of the (immutable) bytes rather than
+            # copying it
+            body = io.BytesIO(response.content)
+        return io.TextIOWrapper(body, encoding=encoding, newline="")
+
+    def _memory_value(
+        self, response: requests.Response, response_content: io.TextIOBase
+    ) -> tuple:
+        # keep the (immutable) body rather than the decoded text, so that the memorized
+        # responses are decoded incrementally too (and the entry size is the actual one)
+        return (response._content, response.encoding or "utf-8"), response_content
+
+    def _content_from_memory(self, value: tuple) -> io.TextIOBase:
+        body, encoding = value
+        if not settings.STREAM_TEXT_RESPONSES:
+            return io.StringIO(body.decode(encoding))
+        return io.TextIOWrapper(io.BytesIO(body), encoding=encoding, newline="")
+
+    def _share_content(
+        self, response_content: io.TextIOBase, n_callers: int
+    ) -> list[io.TextIOBase]:
+        # text streams can only be read once, so read the body (once) and give each
+        # caller its own stream over it
+        if isinstance(response_content, io.TextIOWrapper):
+            with response_content:
+                body = response_content.buffer.read()
+            return [
+                io.TextIOWrapper(
+                    io.BytesIO(body), encoding=response_content.encoding, newline=""
+                )
+                for _ in range(n_callers)
+            ]
+        text = response_content.getvalue()
+        return [io.StringIO(text) for _ in range(n_callers)]
 
 
 class BaseFileClient(BaseClient):
@@ -450,35 +1589,198 @@ class BaseFileClient(BaseClient):
     def pooch_kwargs(self, value: dict | None) -> None:
         self._pooch_kwargs = {} if value is None else value
 
+    @property
+    def _download_session(self) -> requests.Session:
+        """Pooled session to download files (which are cached by pooch instead)."""
+        return sessions.get_session(
+            self._session_key, cache=False, rate_limits=self._rate_limits
+        )
+
     def _retrieve_file(
         self,
         url: str,
         *,
         known_hash: str | None = None,
         cache: bool = True,
+        revalidate: bool = False,
+        expire_after: ExpirationTime = None,
+        compression: str | None = None,
         pooch_kwargs: KwargsType | None = None,
     ) -> str | io.BytesIO:
-        if cache:
-            _pooch_kwargs = self.pooch_kwargs.copy()
-            if pooch_kwargs is not None:
-                _pooch_kwargs.update(pooch_kwargs)
-            try:
-                return pooch.retrieve(url, known_hash, **_pooch_kwargs)
-            except ValueError:
-                if known_hash is None:
-                    raise
-                utils.log(
-                    f"Pooch hash mismatch for '{url}', accepting updated download.",
-                    level=lg.WARNING,
-                )
-                return pooch.retrieve(url, None, **_pooch_kwargs)
+        """Retrieve a file, from the pooch cache if `cache` is True.
 
-        response = requests.get(
+        Parameters
+        ----------
+        url : str
+            URL of the file.
+        known_hash : str, optional
+            Known hash of the file, passed to `pooch.retrieve`.
+        cache : bool, default True
+            Whether to cache the file with pooch. Otherwise, its content is downloaded
+            (on every call) into memory, and it is only stored in the HTTP cache (so
+            that it can be served in offline mode) if `settings.CACHE_DOWNLOADED_FILES`
+            is True.
+        revalidate : bool, default False
+            Whether the cached file may change over time (e.g., data of the current
+            period), in which case it is revalidated with a conditional request (using
+            the "ETag" and "Last-Modified" validators stored next to it) and only
+            downloaded again if it changed. When a file that has been revalidated is
+            later retrieved with `revalidate=False` (e.g., once the period is over), it
+            is revalidated one last time and then considered final.
+        expire_after : int, float, datetime.timedelta or datetime.datetime, optional
+            Time (in any of the formats accepted by `requests_cache`) during which a
+            revalidated file is used as is, i.e., without revalidating it again. If
+            None, the file is revalidated on every retrieval. Ignored if `revalidate`
+            is False.
+        compression : {"gzip", "zstd"}, optional
+            Compression of the cached file, which is compressed as it is downloaded
+            and stored with the suffix of the compression (e.g., ".gz"), from which
+            `pandas.read_csv` infers how to decompress it. If None, the value from
+            `settings.CACHE_FILE_COMPRESSION` is used. Ignored if `cache` is False or a
+            custom downloader is passed in `pooch_kwargs`.
+        pooch_kwargs : dict, optional
+            Keyword arguments to pass to `pooch.retrieve`, which are added to the
+            `pooch_kwargs` property.
+
+        Returns
+        -------
+        source : str or io.BytesIO
+            Path to the cached file, or its content if `cache` is False.
+        """
+        if not cache:
+            if self.offline:
+                cached_response = self._get_cached_response(url)
+                if cached_response is None:
+                    raise http_cache.CacheMissError([url])
+                http_cache.record_response(cached_response)
+                return io.BytesIO(cached_response.content)
+            return _SINGLE_FLIGHT.do(
+                ("download", self._session_key, url),
+                self._download_file,
+                url,
+                share=_share_bytes_io,
+            )
+        _pooch_kwargs, compression = self._file_pooch_kwargs(
+            url, compression, pooch_kwargs
+        )
+        if self.offline:
+            # the cached file is used as is, i.e., without revalidating it
+            filepath = _pooch_filepath(url, _pooch_kwargs)
+            if not os.path.exists(filepath):
+                raise http_cache.CacheMissError([url])
+            http_cache.record_file(filepath)
+            return filepath
+        # merge the concurrent retrievals of the same file, which would otherwise
+        # download it several times and race each other writing it
+        filepath = _SINGLE_FLIGHT.do(
+            ("pooch", _pooch_filepath(url, _pooch_kwargs)),
+            self._pooch_retrieve_file,
             url,
-            params=self.request_params,
-            headers=self.request_headers,
-            **settings.REQUEST_KWARGS,
+            known_hash,
+            revalidate,
+            expire_after,
+            compression,
+            _pooch_kwargs,
         )
+        # keep track of the accesses for the eviction of cached files
+        http_cache.record_file(filepath)
+        return filepath
+
+    def _file_pooch_kwargs(
+        self, url: str, compression: str | None, pooch_kwargs: KwargsType | None
+    ) -> tuple[dict, str | None]:
+        """Get the pooch keyword arguments and the compression to retrieve a file."""
+        _pooch_kwargs = self.pooch_kwargs.copy()
+        if pooch_kwargs is not None:
+            _pooch_kwargs.update(pooch_kwargs)
+        if compression is None:
+            compression = settings.CACHE_FILE_COMPRESSION
+        if compression is not None and "downloader" not in _pooch_kwargs:
+            _pooch_kwargs["fname"] = sessions.compressed_fname(
+                _pooch_kwargs.get("fname") or pooch.utils.unique_file_name(url),
+                compression,
+            )
+        else:
+            compression = None
+        return _pooch_kwargs, compression
+
+    def _pooch_retrieve_file(
+        self,
+        url: str,
+        known_hash: str | None,
+        revalidate: bool,
+        expire_after: ExpirationTime,
+        compression: str | None,
+        pooch_kwargs: dict,
+    ) -> str:
+        """Retrieve a file with pooch, revalidating it if required."""
+        downloader = pooch_kwargs.setdefault(
+            "downloader",
+            sessions.SessionDownloader(
+                self._download_session,
+                compression=compression,
+                # the hash of compressed files is checked by the downloader, i.e., on
+                # the content before compression
+                known_hash=known_hash if compression is not None else None,
+                **settings.REQUEST_KWARGS,
+            ),
+        )
+        if compression is not None:
+            known_hash = None
+        if isinstance(downloader, sessions.SessionDownloader):
+            filepath = _pooch_filepath(url, pooch_kwargs)
+            # files that have validators stored are those that may have changed
+            if revalidate and _validated_within(filepath, expire_after):
+                return filepath
+            if os.path.exists(filepath) and (
+                revalidate or sessions.read_validators(filepath) is not None
+            ):
+                if downloader.revalidate(url, filepath):
+                    utils.log(f"Updated '{filepath}' from '{url}'.")
+                sessions.write_validators(
+                    filepath, downloader.validators if revalidate else None
+                )
+                # the file may have changed, so its hash is not checked
+                return pooch.retrieve(url, None, **pooch_kwargs)
+        try:
+            filepath = pooch.retrieve(url, known_hash, **pooch_kwargs)
+        except ValueError:
+            if known_hash is None and getattr(downloader, "known_hash", None) is None:
+                raise
+            utils.log(
+                f"Pooch hash mismatch for '{url}', accepting updated download.",
+                level=lg.WARNING,
+            )
+            if isinstance(downloader, sessions.SessionDownloader):
+                downloader.known_hash = None
+            filepath = pooch.retrieve(url, None, **pooch_kwargs)
+        if revalidate and isinstance(downloader, sessions.SessionDownloader):
+            sessions.write_validators(filepath, downloader.validators)
+        return filepath
+
+    def _download_file(self, url: str) -> io.BytesIO:
+        """Download a file into memory.
+
+        If `settings.CACHE_DOWNLOADED_FILES` is True and the session caches responses,
+        the file is stored in the HTTP cache but revalidated on every download, so that
+        the cached copy is only served as is in offline mode (see `offline`).
+        """
+        if settings.CACHE_DOWNLOADED_FILES and isinstance(self._session, CacheMixin):
+            response = self._session.get(
+                url,
+                params=self.request_params,
+                headers=self.request_headers,
+                refresh=True,
+                **settings.REQUEST_KWARGS,
+            )
+            http_cache.record_response(response)
+        else:
+            response = self._download_session.get(
+                url,
+                params=self.request_params,
+                headers=self.request_headers,
+                **settings.REQUEST_KWARGS,
+            )
         response.raise_for_status()
         return io.BytesIO(response.content)
 
@@ -533,15 +1835,137 @@ class BaseFileClient(BaseClient):
         return self._ts_endpoint.format(**ts_params)
 
     def _ts_cache(self, ts_params: Mapping) -> bool:
+        """Whether the file of the time series partition is final.
+
+        Files that are not final (e.g., data of the current period) are revalidated
+        (at most once per expiration of the live time series, see `_get_expire_after`)
+        rather than served from the pooch cache as is.
+        """
         return True
 
+    def _ts_nodata_key(self, ts_params: Mapping) -> str | None:
+        # partitions without data have no file
+        return self._format_ts_endpoint(ts_params)
+
+    def _ts_file_status(
+        self, url: str, ts_params: Mapping
+    ) -> tuple[str, str, int | None]:
+        """Get the path, coverage status and size of the file of a partition.
+
+        The status is the one of `meteora.cache.CacheCoverage`, i.e., whether the file
+        would be served as is, revalidated or downloaded by `_ts_source`.
+        """
+        filepath = os.path.abspath(
+            _pooch_filepath(url, self._file_pooch_kwargs(url, None, None)[0])
+        )
+        try:
+            size = os.path.getsize(filepath)
+        except FileNotFoundError:
+            return filepath, http_cache.COVERAGE_MISSING, None
+        # final files are revalidated if they have validators (i.e., one last time), and
+        # the others unless they were revalidated recently
+        if self._ts_cache(ts_params):
+            revalidate = sessions.read_validators(filepath) is not None
+        else:
+            revalidate = not _validated_within(
+                filepath, self._get_expire_after("live_ts")
+            )
+        if revalidate:
+            return filepath, http_cache.COVERAGE_STALE, size
+        return filepath, http_cache.COVERAGE_CACHED, size
+
+    def _ts_cache_entries(self, leaves: Sequence[Mapping]) -> list[list[dict]]:
+        entries = []
+        for _ts_params in leaves:
+            url = self._format_ts_endpoint(_ts_params)
+            filepath, status, size = self._ts_file_status(url, _ts_params)
+            entries.append(
+                [
+                    {
+                        "url": url,
+                        "key": filepath,
+                        "kind": http_cache.FILE_KIND,
+                        "status": status,
+                        "size": size,
+                    }
+                ]
+            )
+        return entries
+
+    def _ts_file_validator(self, url: str, ts_params: Mapping) -> tuple | None:
+        """Get the validator of the cached file of a partition if served as is."""
+        filepath, status, _ = self._ts_file_status(url, ts_params)
+        if status != http_cache.COVERAGE_CACHED:
+            return None
+        stat = os.stat(filepath)
+        # the file is replaced when it is downloaded again
+        return filepath, stat.st_size, stat.st_mtime_ns
+
     def _ts_source(self, url: str, ts_params: Mapping):
-        return self._retrieve_file(url, cache=self._ts_cache(ts_params))
+        try:
+            return self._retrieve_file(
+                url,
+                revalidate=not self._ts_cache(ts_params),
+                expire_after=self._get_expire_after("live_ts"),
+            )
+        except requests.HTTPError as exc:
+            # only final partitions are recorded, since the live ones (e.g., the current
+            # period) may have data later
+            if (
+                exc.response is not None
+                and exc.response.status_code in http_cache.NODATA_STATUS_CODES
+                and self._ts_cache(ts_params)
+            ):
+                http_cache.record_nodata(url)
+            raise
 
     @abc.abstractmethod
     def _ts_df_from_url(self, url: str, ts_params: Mapping) -> pd.DataFrame:
+        """Parse the file of a time series partition.
+
+        Only the variables of `ts_params` are parsed, but the data frame need not be
+        filtered by time range, see `_select_ts_df`.
+        """
         pass
 
+    def _ts_parsed_params(self, ts_params: Mapping) -> Mapping:
+        """Get the parameters to parse the file of a partition whose frame is cached.
+
+        All the variables of the client are parsed, so that the cached data frame is
+        shared by the queries of other variables.
+        """
+        return {
+            **ts_params,
+            "variable_ids": self.variables_df[self._variables_id_col].tolist(),
+        }
+
+    def _select_ts_df(self, ts_df: pd.DataFrame, ts_params: Mapping) -> pd.DataFrame:
+        """Select the requested variables and time range of a parsed partition."""
+        if ts_df.empty:
+            return ts_df
+        variable_ids = pd.Index(ts_params["variable_ids"])
+        # select only if needed since the selection copies the data. Variables that are
+        # not in the file are set as missing values, as in `parsing.read_csv`
+        if not ts_df.columns.equals(variable_ids):
+            ts_df = ts_df.reindex(columns=variable_ids)
+        return self._filter_time_range(
+            ts_df, ts_params["start"], ts_params["end"], time_col=self._ts_df_time_col
+        )
+
     def _ts_df_from_endpoint(self, ts_params: Mapping) -> pd.DataFrame:
         endpoint = self._format_ts_endpoint(ts_params)
-        return self._ts_df_from_url(endpoint, ts_params)
+        get_validator = functools.partial(self._ts_file_validator, endpoint, ts_params)
+        parsed_key = self._get_parsed_key(ts_params, get_validator)
+        if parsed_key is not None:
+            ts_df = http_cache.read_parsed(parsed_key)
+            if ts_df is not None:
+                return self._select_ts_df(ts_df, ts_params)
+        if self._caches_parsed(ts_params):
+            ts_df = self._ts_df_from_url(endpoint, self._ts_parsed_params(ts_params))
+            # the file may have been downloaded (or revalidated) in the meantime
+            parsed_key = self._get_parsed_key(ts_params, get_validator)
+            if parsed_key is not None:
+                http_cache.write_parsed(parsed_key, ts_df)
+        else:
+            ts_df = self._ts_df_from_url(endpoint, ts_params)
+        return self._select_ts_df(ts_df, ts_params)
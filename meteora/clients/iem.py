@@ -8,7 +8,7 @@ import geopandas as gpd
 import pandas as pd
 from pyregeon import RegionType
 
-from meteora import settings, utils
+from meteora import parsing, settings, utils
 from meteora.clients.base import BaseTextClient
 from meteora.clients.mixins import StationsEndpointMixin, VariablesHardcodedMixin
 from meteora.utils import DateTimeType, KwargsType, VariablesType
@@ -24,6 +24,9 @@ STATIONS_GDF_ID_COL = "id"
 TS_DF_STATIONS_ID_COL = "station"
 VARIABLES_ID_COL = "code"
 VARIABLES_LABEL_COL = "description"
+# missing values are reported as "M" (but the variable types are inferred since some
+# values are not numeric, e.g., "T" for trace precipitation)
+TS_NA_VALUES = ["M"]
 
 # ASOS 1 minute https://mesonet.agron.iastate.edu/cgi-bin/request/asos1min.py?help
 ONEMIN_STATIONS_ENDPOINT = f"{BASE_URL}/geojson/network/ASOS1MIN.geojson?only_online=0"
@@ -75,6 +78,11 @@ ONEMIN_ECV_DICT = {
     settings.ECV_WIND_DIRECTION: "drct",
 }
 ONEMIN_TS_DF_TIME_COL = "valid(UTC)"
+ONEMIN_TS_CSV_SCHEMA = parsing.CSVSchema(
+    dtypes={TS_DF_STATIONS_ID_COL: "str"},
+    time_formats={ONEMIN_TS_DF_TIME_COL: parsing.ISO8601},
+    na_values=TS_NA_VALUES,
+)
 
 # METAR/ASOS https://mesonet.agron.iastate.edu/cgi-bin/request/asos.py?help
 METAR_STATIONS_ENDPOINT = f"{BASE_URL}/geojson/network/AZOS.geojson"
@@ -146,6 +154,11 @@ METAR_ECV_DICT = {
     settings.ECV_WIND_DIRECTION: "drct",
 }
 METAR_TS_DF_TIME_COL = "valid"
+METAR_TS_CSV_SCHEMA = parsing.CSVSchema(
+    dtypes={TS_DF_STATIONS_ID_COL: "str"},
+    time_formats={METAR_TS_DF_TIME_COL: parsing.ISO8601},
+    na_values=TS_NA_VALUES,
+)
 
 
 class IEMClient(
@@ -159,6 +172,8 @@ class IEMClient(
     # data frame label constants
     _stations_gdf_id_col = STATIONS_GDF_ID_COL
     _ts_df_stations_id_col = TS_DF_STATIONS_ID_COL
+    # the variables are typed when parsing (see `TS_NA_VALUES`)
+    _ts_schema = parsing.TSSchema(value_dtype=None)
     _variables_id_col = VARIABLES_ID_COL
     _variables_label_col = VARIABLES_LABEL_COL
 
@@ -210,23 +225,11 @@ class IEMClient(
             "station": ",".join(self.stations_gdf.index),
         }
 
-    def _ts_df_from_content(self, response_content: io.StringIO) -> pd.DataFrame:
-        ts_df = pd.read_csv(
-            response_content,
-            na_values="M",
-        )
-        return (
-            ts_df.assign(
-                **{self._ts_df_time_col: pd.to_datetime(ts_df[self._ts_df_time_col])}
-            )
-            .groupby(["station", self._ts_df_time_col])
-            .first(skipna=True)
-        )
-
-    def _post_process_ts_df(self, ts_df: pd.DataFrame) -> pd.DataFrame:
-        # In this case:
-        # - avoid to_numeric as data is already numeric
-        return ts_df
+    def _ts_df_from_content(self, response_content: io.TextIOBase) -> pd.DataFrame:
+        # the content is parsed as it is read (and decoded) from the response stream
+        with response_content:
+            ts_df = parsing.read_csv(response_content, self._ts_csv_schema)
+        return ts_df.groupby(["station", self._ts_df_time_col]).first(skipna=True)
 
     def get_ts_df(
         self,
@@ -255,6 +258,19 @@ class IEMClient(
         """
         return self._get_ts_df(variables, start, end)
 
+    async def aget_ts_df(
+        self,
+        variables: VariablesType,
+        start: DateTimeType,
+        end: DateTimeType,
+    ) -> pd.DataFrame:
+        """Get time series data frame asynchronously.
+
+        Coroutine version of `get_ts_df`, see its documentation for the parameters and
+        the returned data frame.
+        """
+        return await self._aget_ts_df(variables, start, end)
+
 
 class ASOSOneMinIEMClient(IEMClient):
     """ASOS 1 minute Iowa Environmental Mesonet (IEM) client.
@@ -285,6 +301,7 @@ class ASOSOneMinIEMClient(IEMClient):
 
     # data frame labels constants
     _ts_df_time_col = ONEMIN_TS_DF_TIME_COL
+    _ts_csv_schema = ONEMIN_TS_CSV_SCHEMA
     _variables_dict = ONEMIN_VARIABLES_DICT
     _variable_units_dict = ONEMIN_VARIABLE_UNITS_DICT
     _ecv_dict = ONEMIN_ECV_DICT
@@ -320,6 +337,7 @@ class METARASOSIEMClient(IEMClient):
 
     # data frame labels constants
     _ts_df_time_col = METAR_TS_DF_TIME_COL
+    _ts_csv_schema = METAR_TS_CSV_SCHEMA
     _variables_dict = METAR_VARIABLES_DICT
     _variable_units_dict = METAR_VARIABLE_UNITS_DICT
     _ecv_dict = METAR_ECV_DICT
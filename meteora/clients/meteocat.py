@@ -14,6 +14,7 @@ from meteora.clients.mixins import (
     VariablePartitionedTSMixin,
     VariablesEndpointMixin,
 )
+from meteora.concurrency import BaseExecutor
 from meteora.utils import DateTimeType, KwargsType, VariablesType
 
 # API endpoints
@@ -77,6 +78,9 @@ class MeteocatClient(
     progress : bool, optional
         Whether to show a tqdm progress bar for partitioned time series fetches. If
         None, the value from `settings.SHOW_PROGRESS` is used.
+    executor : {"serial", "thread", "process", "dask"} or BaseExecutor, optional
+        Executor used to run the partitions of time series fetches concurrently. If
+        None, the value from `settings.EXECUTOR` is used.
     sjoin_kwargs : dict, optional
         Keyword arguments to pass to the `geopandas.sjoin` function when filtering the
         stations within the region. If None, the value from `settings.SJOIN_KWARGS` is
@@ -109,6 +113,7 @@ class MeteocatClient(
         api_key: str,
         *,
         progress: bool | None = None,
+        executor: str | BaseExecutor | None = None,
         **sjoin_kwargs: KwargsType,
     ) -> None:
         """Initialize Meteocat client."""
@@ -122,6 +127,8 @@ class MeteocatClient(
         super().__init__()
         if progress is not None:
             self.progress = progress
+        if executor is not None:
+            self.executor = executor
 
     def _ts_query_params(self, ts_params: Mapping) -> Mapping:
         return {}
@@ -132,6 +139,10 @@ class MeteocatClient(
     def _variables_df_from_content(self, response_content: Mapping) -> pd.DataFrame:
         return pd.json_normalize(response_content)
 
+    def _parsed_cache_token(self) -> tuple:
+        # the stations outside the region are filtered out when parsing
+        return tuple(self.stations_gdf.index)
+
     def _ts_df_from_content(self, response_content: Mapping):
         # process response
         response_df = pd.json_normalize(response_content)
@@ -188,22 +199,23 @@ class MeteocatClient(
             start=start,
             end=end,
         )
-        units_map = ts_df.attrs.get("units")
         # filter time range to avoid including a full day after
-        time_ser = ts_df.index.get_level_values(settings.TIME_COL).to_series()
-        tz = time_ser.dt.tz
-        ts_df = ts_df.loc[
-            (
-                slice(None),
-                time_ser.between(
-                    pd.Timestamp(start, tz=tz),
-                    pd.Timestamp(end, tz=tz),
-                    inclusive="both",
-                ),
-            ),
-            :,
-        ]
-        if isinstance(units_map, Mapping):
-            ts_df.attrs = ts_df.attrs.copy()
-            ts_df.attrs["units"] = dict(units_map)
-        return ts_df
+        return self._filter_time_range(ts_df, start, end)
+
+    async def aget_ts_df(
+        self,
+        variables: VariablesType,
+        start: DateTimeType,
+        end: DateTimeType,
+    ) -> pd.DataFrame:
+        """Get time series data frame asynchronously.
+
+        Coroutine version of `get_ts_df`, see its documentation for the parameters and
+        the returned data frame.
+        """
+        ts_df = await self._aget_ts_df(
+            variables,
+            start=start,
+            end=end,
+        )
+        return self._filter_time_range(ts_df, start, end)
@@ -1,14 +1,13 @@
 """MeteoSwiss client."""
 
 import datetime as dt
-import os
 from collections.abc import Mapping
 
 import pandas as pd
 import pyproj
 from pyregeon import CRSType, RegionType
 
-from meteora import settings, utils
+from meteora import parsing, settings, utils
 from meteora.clients.base import BaseFileClient
 from meteora.clients.mixins import (
     StationPartitionedTSMixin,
@@ -16,6 +15,7 @@ from meteora.clients.mixins import (
     TimePartitionedTSMixin,
     VariablesEndpointMixin,
 )
+from meteora.concurrency import BaseExecutor
 from meteora.utils import DateTimeType, KwargsType, VariablesType
 
 BASE_URL = "https://data.geo.admin.ch/ch.meteoschweiz.ogd-smn"
@@ -46,6 +46,13 @@ STATIONS_GDF_ID_COL = "station_abbr"
 TS_DF_STATIONS_ID_COL = "station_abbr"
 TS_DF_TIME_COL = "reference_timestamp"
 VARIABLES_ID_COL = "parameter_shortname"
+TS_CSV_SCHEMA = parsing.CSVSchema(
+    sep=READ_CSV_KWARGS["sep"],
+    dtypes={TS_DF_STATIONS_ID_COL: "str"},
+    time_formats={TS_DF_TIME_COL: "%d.%m.%Y %H:%M"},
+    value_dtype="float64",
+    encoding=READ_CSV_KWARGS["encoding"],
+)
 ECV_DICT = {
     # precipitation
     # "Precipitation (ten minutes total) [mm]"
@@ -108,6 +115,9 @@ class MeteoSwissClient(
     progress : bool, optional
         Whether to show a tqdm progress bar for partitioned time series fetches. If
         None, the value from `settings.SHOW_PROGRESS` is used.
+    executor : {"serial", "thread", "process", "dask"} or BaseExecutor, optional
+        Executor used to run the partitions of time series fetches concurrently. If
+        None, the value from `settings.EXECUTOR` is used.
     sjoin_kwargs : dict, optional
         Keyword arguments to pass to the `geopandas.sjoin` function when filtering the
         stations within the region. If None, the value from `settings.SJOIN_KWARGS` is
@@ -125,6 +135,7 @@ class MeteoSwissClient(
     _stations_gdf_id_col = STATIONS_GDF_ID_COL
     _ts_df_stations_id_col = TS_DF_STATIONS_ID_COL
     _ts_df_time_col = TS_DF_TIME_COL
+    _ts_csv_schema = TS_CSV_SCHEMA
     _variables_id_col = VARIABLES_ID_COL
     _ecv_dict = ECV_DICT
 
@@ -135,6 +146,7 @@ class MeteoSwissClient(
         crs: CRSType | None = None,
         pooch_kwargs: KwargsType | None = None,
         progress: bool | None = None,
+        executor: str | BaseExecutor | None = None,
         **sjoin_kwargs: KwargsType,
     ) -> None:
         """Initialize MeteoSwiss client."""
@@ -163,6 +175,8 @@ class MeteoSwissClient(
         super().__init__()
         if progress is not None:
             self.progress = progress
+        if executor is not None:
+            self.executor = executor
 
     def _iter_time_partitions(self, ts_params: Mapping):
         # determine whether we need "historical" or "recent" files, see
@@ -202,39 +216,53 @@ class MeteoSwissClient(
         start_year, end_year = (int(y) for y in decade.split("-"))
         return not (start_year <= today.year <= end_year)
 
+    def _ts_parsed_cache(self, ts_params: Mapping) -> bool:
+        # the historical data of the current decade may be completed with the recent
+        # data when parsing (see `_ts_df_from_url`)
+        period = ts_params["period"]
+        if period == "recent":
+            return True
+        end_year = int(period.split("historical_", 1)[1].split("-")[1])
+        return end_year < dt.date.today().year
+
+    def _ts_parsed_params(self, ts_params: Mapping) -> Mapping:
+        # the files only have the station, time and variable columns, and most of the
+        # variables of the endpoint are not measured at a given station
+        return {**ts_params, "variable_ids": None}
+
     def _ts_df_from_url(self, url, ts_params: Mapping) -> pd.DataFrame:
         start = pd.Timestamp(ts_params["start"])
         end = pd.Timestamp(ts_params["end"])
         period = ts_params["period"]
         _station_id = ts_params["station_id"].lower()
 
+        variable_ids = ts_params["variable_ids"]
+        if variable_ids is None:
+            # all the columns, see `_ts_parsed_params`
+            cols_to_keep = None
+        else:
+            cols_to_keep = [
+                self._ts_df_stations_id_col,
+                self._ts_df_time_col,
+                *variable_ids,
+            ]
+
         def _parse(source):
-            ts_df = pd.read_csv(source, **READ_CSV_KWARGS)
-            ts_df = ts_df.assign(
-                **{
-                    self._ts_df_time_col: pd.to_datetime(
-                        ts_df[self._ts_df_time_col], format="%d.%m.%Y %H:%M"
-                    )
-                }
+            return parsing.read_csv(
+                source, self._ts_csv_schema, columns=cols_to_keep
             ).set_index([self._ts_df_stations_id_col, self._ts_df_time_col])
-            time_ser = ts_df.index.get_level_values(self._ts_df_time_col).to_series()
-            tz = time_ser.dt.tz
-            return ts_df.loc[
-                (
-                    slice(None),
-                    time_ser.between(
-                        pd.Timestamp(start, tz=tz),
-                        pd.Timestamp(end, tz=tz),
-                        inclusive="both",
-                    ),
-                ),
-                :,
-            ]
+
+        def _is_empty(ts_df):
+            # whether there is no data for the requested time range (the data frame is
+            # filtered by time range in `_select_ts_df`)
+            return self._filter_time_range(
+                ts_df, start, end, time_col=self._ts_df_time_col
+            ).empty
 
         ts_source = self._ts_source(url, ts_params)
         ts_df = _parse(ts_source)
 
-        if ts_df.empty and period.startswith("historical_"):
+        if _is_empty(ts_df) and period.startswith("historical_"):
             utils.log(
                 f"The requested data for the given period and station "
                 f"'{_station_id}' returned an empty data frame. This can happen "
@@ -249,9 +277,13 @@ class MeteoSwissClient(
             ]
             if "recent" not in current_periods:
                 recent_url = self._format_ts_endpoint({**ts_params, "period": "recent"})
-                recent_source = self._retrieve_file(recent_url, cache=False)
+                recent_source = self._retrieve_file(
+                    recent_url,
+                    revalidate=True,
+                    expire_after=self._get_expire_after("live_ts"),
+                )
                 ts_df = _parse(recent_source)
-                if ts_df.empty:
+                if _is_empty(ts_df):
                     utils.log(
                         f"The requested data for the given period and station "
                         f"'{_station_id}' is not on the 'recent' data either. "
@@ -261,13 +293,9 @@ class MeteoSwissClient(
                         " will try to update the 'historical' file and retrieve"
                         " the requested data from the updated file.",
                     )
-                    os.remove(ts_source)
-                    utils.log(
-                        f"Removed cached file '{ts_source}' for station "
-                        f"'{_station_id}' to force the retrieval of the updated "
-                        f"'historical' data from the MeteoSwiss API."
-                    )
-                    ts_source = self._ts_source(url, ts_params)
+                    # revalidate the cached 'historical' file, i.e., download it
+                    # again if it has been updated
+                    ts_source = self._retrieve_file(url, revalidate=True)
                     ts_df = _parse(ts_source)
                 else:
                     utils.log(
@@ -307,3 +335,20 @@ class MeteoSwissClient(
             start=start,
             end=end,
         )
+
+    async def aget_ts_df(
+        self,
+        variables: VariablesType,
+        start: DateTimeType,
+        end: DateTimeType,
+    ) -> pd.DataFrame:
+        """Get time series data frame asynchronously.
+
+        Coroutine version of `get_ts_df`, see its documentation for the parameters and
+        the returned data frame.
+        """
+        return await self._aget_ts_df(
+            variables=variables,
+            start=start,
+            end=end,
+        )
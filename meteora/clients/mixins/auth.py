@@ -17,13 +17,20 @@ class APIKeyMixin(abc.ABC):
 class APIKeyHeaderMixin(APIKeyMixin):
     """API key as request header mixin."""
 
+    _api_key_header_name = "X-API-KEY"
+
+    @property
+    def _credential_params(self) -> tuple[str]:
+        # leave the API key out of cache keys
+        return (self._api_key_header_name,)
+
     @property
     def request_headers(self) -> dict:
         """Request headers."""
         try:
             return self._request_headers
         except AttributeError:
-            self._request_headers = {"X-API-KEY": self._api_key}
+            self._request_headers = {self._api_key_header_name: self._api_key}
             return self._request_headers
 
 
@@ -35,6 +42,11 @@ class APIKeyParamMixin(APIKeyMixin):
     def _api_key_param_name(self) -> str:
         pass
 
+    @property
+    def _credential_params(self) -> tuple[str]:
+        # leave the API key out of cache keys
+        return (self._api_key_param_name,)
+
     @property
     def request_params(self) -> dict:
         """Request parameters."""
@@ -1,40 +1,65 @@
 """Time series mixins."""
 
 import abc
+import asyncio
 from collections.abc import Iterable, Mapping
 
 import pandas as pd
 
+from meteora import cache, concurrency, utils
+
 
 class PartitionedTSMixin(abc.ABC):
     """Base mixin for partitioned time series endpoints.
 
     Subclasses partition time series requests along one axis (time, variable, or
-    station) and iterate over the partitions.  When ``client.progress`` is
-    enabled, only the outermost partitioned mixin in the MRO displays a tqdm
-    progress bar, determined by ``_should_show_progress``.
+    station).  When several partitioned mixins are combined, the outermost one (i.e.,
+    the first in the MRO) builds the plan of the nested partition product and maps the
+    innermost (non-partitioned) requests over the client's executor (see
+    ``client.executor``).  The results are then assembled level by level in the same
+    order as the plan, so the output does not depend on the executor.  When
+    ``client.progress`` is enabled, only the outermost partitioned mixin displays a
+    tqdm progress bar, determined by ``_should_show_progress``.  The asynchronous
+    counterpart (``_ats_df_from_endpoint``) builds the same plan but requests all the
+    innermost partitions concurrently in the event loop.
     """
 
+    # concatenation axis of the partitions' data frames
+    _partition_axis = 0
+    # progress bar labels
+    _partition_desc: str
+    _partition_unit: str
+
+    @abc.abstractmethod
+    def _iter_partitions(self, ts_params: Mapping) -> Iterable[dict]:
+        pass
+
+    def _format_partition_ts_df(
+        self, ts_df: pd.DataFrame | pd.Series, partition: Mapping
+    ) -> pd.DataFrame | pd.Series:
+        return ts_df
+
+    def _partition_mixins(self) -> list[type]:
+        """Return the partitioned mixins of the client, from outermost to innermost."""
+        return [
+            cls
+            for cls in type(self).__mro__
+            if cls is not PartitionedTSMixin
+            and issubclass(cls, PartitionedTSMixin)
+            and "_iter_partitions" in cls.__dict__
+        ]
+
     def _should_show_progress(self, mixin_cls):
         """Return whether *mixin_cls* should display a progress bar.
 
-        Returns ``True`` only when ``self.progress`` is truthy **and**
-        *mixin_cls* is the first ``PartitionedTSMixin`` subclass in the MRO
-        that defines its own ``_ts_df_from_endpoint``.  This ensures that only
-        the outermost partition loop shows a progress bar, avoiding nested bars.
+        Returns ``True`` only when ``self.progress`` is truthy **and** *mixin_cls* is
+        the outermost partitioned mixin in the MRO.  This ensures that only the
+        outermost partition loop shows a progress bar, avoiding nested bars.
         """
         if not getattr(self, "progress", False):
             return False
-        # find the first class in MRO that defines its own _ts_df_from_endpoint
-        # (skips the concrete client class and PartitionedTSMixin itself)
-        for cls in type(self).__mro__:
-            if (
-                cls is not PartitionedTSMixin
-                and issubclass(cls, PartitionedTSMixin)
-                and "_ts_df_from_endpoint" in cls.__dict__
-            ):
-                return cls is mixin_cls
-        return False
+        partition_mixins = self._partition_mixins()
+        return bool(partition_mixins) and partition_mixins[0] is mixin_cls
 
     def _concat_ts_dfs(self, ts_dfs: Iterable[pd.DataFrame | pd.Series], axis: int):
         ts_dfs = [ts_df for ts_df in ts_dfs if ts_df is not None]
@@ -47,6 +72,194 @@ class PartitionedTSMixin(abc.ABC):
             return non_empty[0]
         return pd.concat(non_empty, axis=axis)
 
+    def _partition_plan(self, ts_params: Mapping, mixin_clss: list[type]) -> list:
+        """Build the plan of the nested partition product.
+
+        Returns a list with a ``(partition, ts_params, children)`` tuple for each
+        partition of the outermost mixin of `mixin_clss`, where ``children`` is the
+        (recursive) plan of the inner mixins or None for the innermost one.
+        """
+        mixin_cls, *inner_mixin_clss = mixin_clss
+        plan = []
+        for partition in mixin_cls._iter_partitions(self, ts_params):
+            _ts_params = ts_params | partition
+            if inner_mixin_clss:
+                children = self._partition_plan(_ts_params, inner_mixin_clss)
+            else:
+                children = None
+            plan.append((partition, _ts_params, children))
+        return plan
+
+    def _iter_plan_leaves(self, plan: list) -> Iterable[Mapping]:
+        for _, ts_params, children in plan:
+            if children is None:
+                yield ts_params
+            else:
+                yield from self._iter_plan_leaves(children)
+
+    def _nodata_mask(self, leaves: list[Mapping]) -> list[bool]:
+        """Whether each partition is known to have no data (see `_ts_nodata_key`)."""
+        keys = [self._ts_nodata_key(ts_params) for ts_params in leaves]
+        nodata_keys = cache.get_nodata(key for key in keys if key is not None)
+        if nodata_keys:
+            utils.log(
+                f"Skipping {len(nodata_keys)} partitions known to have no data (see "
+                "`meteora.cache.clear_nodata`)."
+            )
+        return [key in nodata_keys for key in keys]
+
+    def _fill_nodata(self, nodata_mask: list[bool], ts_dfs: Iterable) -> Iterable:
+        """Interleave empty data frames for the skipped partitions with `ts_dfs`."""
+        ts_dfs = iter(ts_dfs)
+        for nodata in nodata_mask:
+            yield pd.DataFrame() if nodata else next(ts_dfs)
+
+    def _partition_ts_df_from_endpoint(self, ts_params: Mapping) -> pd.DataFrame:
+        """Get the time series data frame of a single (innermost) partition."""
+        # skip all the partitioned mixins, i.e., call the client's base implementation.
+        # The partitions may be fetched in other threads or processes, so the stale
+        # responses are reported in the data frame (see `meteora.cache.collect_stale`)
+        with cache.collect_stale() as stale_urls:
+            ts_df = super(self._partition_mixins()[-1], self)._ts_df_from_endpoint(
+                ts_params
+            )
+        return cache.mark_stale(ts_df, stale_urls)
+
+    async def _apartition_ts_df_from_endpoint(self, ts_params: Mapping) -> pd.DataFrame:
+        """Get the time series data frame of a single partition asynchronously."""
+        with cache.collect_stale() as stale_urls:
+            ts_df = await super(
+                self._partition_mixins()[-1], self
+            )._ats_df_from_endpoint(ts_params)
+        return cache.mark_stale(ts_df, stale_urls)
+
+    def _offline_partition_ts_df_from_endpoint(
+        self, ts_params: Mapping
+    ) -> pd.DataFrame | cache.CacheMissError:
+        """Get the data frame of a partition or its cache miss error (offline mode)."""
+        try:
+            return self._partition_ts_df_from_endpoint(ts_params)
+        except cache.CacheMissError as exc:
+            return exc
+
+    async def _aoffline_partition_ts_df_from_endpoint(
+        self, ts_params: Mapping
+    ) -> pd.DataFrame | cache.CacheMissError:
+        try:
+            return await self._apartition_ts_df_from_endpoint(ts_params)
+        except cache.CacheMissError as exc:
+            return exc
+
+    def _raise_cache_misses(
+        self, ts_params: Mapping, leaves: list[Mapping], ts_dfs: list
+    ) -> None:
+        """Raise a single error naming all the partitions that are not cached."""
+        urls = []
+        partitions = []
+        for _ts_params, ts_df in zip(leaves, ts_dfs):
+            if isinstance(ts_df, cache.CacheMissError):
+                urls += ts_df.urls
+                partitions.append(
+                    {
+                        key: value
+                        for key, value in _ts_params.items()
+                        if key not in ts_params
+                    }
+                )
+        if urls:
+            raise cache.CacheMissError(urls, partitions)
+
+    def _assemble_plan(
+        self, plan: list, mixin_clss: list[type], ts_dfs_iter, *, progress: bool = True
+    ):
+        mixin_cls, *inner_mixin_clss = mixin_clss
+        if progress and self._should_show_progress(mixin_cls):
+            from tqdm.auto import tqdm
+
+            plan = tqdm(
+                plan, desc=mixin_cls._partition_desc, unit=mixin_cls._partition_unit
+            )
+        ts_dfs = []
+        stale_urls = []
+        for partition, _, children in plan:
+            if children is None:
+                ts_df = next(ts_dfs_iter)
+            else:
+                ts_df = self._assemble_plan(
+                    children, inner_mixin_clss, ts_dfs_iter, progress=progress
+                )
+            if ts_df is not None:
+                stale_urls += ts_df.attrs.get(cache.STALE_ATTR, [])
+            ts_dfs.append(mixin_cls._format_partition_ts_df(self, ts_df, partition))
+        return cache.mark_stale(
+            self._concat_ts_dfs(ts_dfs, axis=mixin_cls._partition_axis), stale_urls
+        )
+
+    def _partitioned_ts_df_from_endpoint(
+        self, ts_params: Mapping, mixin_cls: type
+    ) -> pd.DataFrame:
+        partition_mixins = self._partition_mixins()
+        mixin_clss = partition_mixins[partition_mixins.index(mixin_cls) :]
+        plan = self._partition_plan(ts_params, mixin_clss)
+        leaves = list(self._iter_plan_leaves(plan))
+        # partitions known to have no data are not scheduled
+        nodata_mask = self._nodata_mask(leaves)
+        leaves = [
+            _ts_params for _ts_params, nodata in zip(leaves, nodata_mask) if not nodata
+        ]
+        if getattr(self, "offline", False):
+            # collect the partitions that are not cached to report them all at once
+            ts_dfs_iter = list(
+                concurrency.get_executor(self.executor).map(
+                    self._offline_partition_ts_df_from_endpoint, leaves
+                )
+            )
+            self._raise_cache_misses(ts_params, leaves, ts_dfs_iter)
+            ts_dfs_iter = iter(ts_dfs_iter)
+        else:
+            # the executor yields the results lazily and in order, so that the progress
+            # bar advances as soon as all the requests of an outer partition are done
+            ts_dfs_iter = concurrency.get_executor(self.executor).map(
+                self._partition_ts_df_from_endpoint, leaves
+            )
+        return self._assemble_plan(
+            plan, mixin_clss, self._fill_nodata(nodata_mask, ts_dfs_iter)
+        )
+
+    async def _apartitioned_ts_df_from_endpoint(
+        self, ts_params: Mapping, mixin_cls: type
+    ) -> pd.DataFrame:
+        partition_mixins = self._partition_mixins()
+        mixin_clss = partition_mixins[partition_mixins.index(mixin_cls) :]
+        # building the plan may require the stations metadata, i.e., blocking requests
+        plan = await asyncio.to_thread(self._partition_plan, ts_params, mixin_clss)
+        # all the partitions are requested concurrently (up to the concurrency limit of
+        # `meteora.aio.async_client`), so the progress bar advances per request
+        leaves = list(self._iter_plan_leaves(plan))
+        nodata_mask = self._nodata_mask(leaves)
+        leaves = [
+            _ts_params for _ts_params, nodata in zip(leaves, nodata_mask) if not nodata
+        ]
+        offline = getattr(self, "offline", False)
+        if offline:
+            partition_coro = self._aoffline_partition_ts_df_from_endpoint
+        else:
+            partition_coro = self._apartition_ts_df_from_endpoint
+        coros = [partition_coro(_ts_params) for _ts_params in leaves]
+        if self._should_show_progress(mixin_cls):
+            from tqdm.asyncio import tqdm_asyncio
+
+            ts_dfs = await tqdm_asyncio.gather(
+                *coros, desc=mixin_cls._partition_desc, unit="request"
+            )
+        else:
+            ts_dfs = await asyncio.gather(*coros)
+        if offline:
+            self._raise_cache_misses(ts_params, leaves, ts_dfs)
+        return self._assemble_plan(
+            plan, mixin_clss, self._fill_nodata(nodata_mask, ts_dfs), progress=False
+        )
+
 
 class TimePartitionedTSMixin(PartitionedTSMixin):
     """Time-partitioned time series mixin.
@@ -62,6 +275,8 @@ class TimePartitionedTSMixin(PartitionedTSMixin):
     """
 
     _time_partition_freq: str
+    _partition_desc = "Time periods"
+    _partition_unit = "period"
 
     def _iter_time_partitions(self, ts_params: Mapping) -> Iterable[dict]:
         start = pd.Timestamp(ts_params["start"])
@@ -78,17 +293,16 @@ class TimePartitionedTSMixin(PartitionedTSMixin):
             date_range = [snapped_start]
         return [{"period": date} for date in date_range]
 
+    def _iter_partitions(self, ts_params: Mapping) -> Iterable[dict]:
+        return self._iter_time_partitions(ts_params)
+
     def _ts_df_from_endpoint(self, ts_params: Mapping) -> pd.DataFrame:
-        partitions = self._iter_time_partitions(ts_params)
-        if self._should_show_progress(TimePartitionedTSMixin):
-            from tqdm.auto import tqdm
+        return self._partitioned_ts_df_from_endpoint(ts_params, TimePartitionedTSMixin)
 
-            partitions = tqdm(partitions, desc="Time periods", unit="period")
-        ts_dfs = [
-            super()._ts_df_from_endpoint(ts_params | partition)
-            for partition in partitions
-        ]
-        return self._concat_ts_dfs(ts_dfs, axis=0)
+    async def _ats_df_from_endpoint(self, ts_params: Mapping) -> pd.DataFrame:
+        return await self._apartitioned_ts_df_from_endpoint(
+            ts_params, TimePartitionedTSMixin
+        )
 
 
 class VariablePartitionedTSMixin(PartitionedTSMixin):
@@ -99,6 +313,9 @@ class VariablePartitionedTSMixin(PartitionedTSMixin):
     """
 
     _ts_variable_endpoint_key = "variable_id"
+    _partition_axis = 1
+    _partition_desc = "Variables"
+    _partition_unit = "var"
 
     def _iter_variable_partitions(self, ts_params: Mapping) -> Iterable[dict]:
         variable_ids = list(ts_params["variable_ids"])
@@ -107,6 +324,9 @@ class VariablePartitionedTSMixin(PartitionedTSMixin):
             for variable_id in variable_ids
         ]
 
+    def _iter_partitions(self, ts_params: Mapping) -> Iterable[dict]:
+        return self._iter_variable_partitions(ts_params)
+
     def _format_variable_ts_df(
         self, ts_df: pd.DataFrame | pd.Series, variable_id
     ) -> pd.DataFrame | pd.Series:
@@ -114,19 +334,22 @@ class VariablePartitionedTSMixin(PartitionedTSMixin):
             return ts_df.rename(variable_id)
         return ts_df
 
+    def _format_partition_ts_df(
+        self, ts_df: pd.DataFrame | pd.Series, partition: Mapping
+    ) -> pd.DataFrame | pd.Series:
+        return self._format_variable_ts_df(
+            ts_df, partition[self._ts_variable_endpoint_key]
+        )
+
     def _ts_df_from_endpoint(self, ts_params: Mapping) -> pd.DataFrame:
-        partitions = self._iter_variable_partitions(ts_params)
-        if self._should_show_progress(VariablePartitionedTSMixin):
-            from tqdm.auto import tqdm
+        return self._partitioned_ts_df_from_endpoint(
+            ts_params, VariablePartitionedTSMixin
+        )
 
-            partitions = tqdm(partitions, desc="Variables", unit="var")
-        ts_dfs = []
-        for partition in partitions:
-            variable_id = partition[self._ts_variable_endpoint_key]
-            ts_df = super()._ts_df_from_endpoint(ts_params | partition)
-            ts_df = self._format_variable_ts_df(ts_df, variable_id)
-            ts_dfs.append(ts_df)
-        return self._concat_ts_dfs(ts_dfs, axis=1)
+    async def _ats_df_from_endpoint(self, ts_params: Mapping) -> pd.DataFrame:
+        return await self._apartitioned_ts_df_from_endpoint(
+            ts_params, VariablePartitionedTSMixin
+        )
 
 
 class StationPartitionedTSMixin(PartitionedTSMixin):
@@ -137,6 +360,8 @@ class StationPartitionedTSMixin(PartitionedTSMixin):
     """
 
     _ts_station_endpoint_key = "station_id"
+    _partition_desc = "Stations"
+    _partition_unit = "station"
 
     def _iter_station_ids(self) -> Iterable:
         return self.stations_gdf.index
@@ -147,14 +372,15 @@ class StationPartitionedTSMixin(PartitionedTSMixin):
             for station_id in self._iter_station_ids()
         ]
 
+    def _iter_partitions(self, ts_params: Mapping) -> Iterable[dict]:
+        return self._iter_station_partitions(ts_params)
+
     def _ts_df_from_endpoint(self, ts_params: Mapping) -> pd.DataFrame:
-        partitions = self._iter_station_partitions(ts_params)
-        if self._should_show_progress(StationPartitionedTSMixin):
-            from tqdm.auto import tqdm
+        return self._partitioned_ts_df_from_endpoint(
+            ts_params, StationPartitionedTSMixin
+        )
 
-            partitions = tqdm(partitions, desc="Stations", unit="station")
-        ts_dfs = [
-            super()._ts_df_from_endpoint(ts_params | partition)
-            for partition in partitions
-        ]
-        return self._concat_ts_dfs(ts_dfs, axis=0)
+    async def _ats_df_from_endpoint(self, ts_params: Mapping) -> pd.DataFrame:
+        return await self._apartitioned_ts_df_from_endpoint(
+            ts_params, StationPartitionedTSMixin
+        )
@@ -1,19 +1,24 @@
 """Netatmo client."""
 
+import asyncio
+import itertools
 import logging as lg
+import time
 import webbrowser
-from collections.abc import Mapping, Sequence
+from collections.abc import Iterable, Mapping, Sequence
+from urllib import parse
 
 import geopandas as gpd
 import numpy as np
 import pandas as pd
+import requests
 from pyregeon import RegionType
 from requests_cache import CacheMixin
 from requests_oauthlib import OAuth2Session
 from shapely import geometry
 from tqdm import tqdm
 
-from meteora import settings, utils
+from meteora import cache, sessions, settings, utils
 from meteora.clients.base import BaseJSONClient
 from meteora.clients.mixins import StationsEndpointMixin, VariablesHardcodedMixin
 from meteora.utils import DateTimeType, KwargsType, VariablesType
@@ -25,6 +30,8 @@ AUTHORIZATION_ENDPOINT = f"{BASE_URL}/oauth2/authorize"
 STATIONS_ENDPOINT = f"{BASE_URL}/api/getpublicdata"
 TS_ENDPOINT = f"{BASE_URL}/api/getmeasure"
 REDIRECT_URI = "https://dev.netatmo.com/apps"
+# request headers/parameters with the OAuth2 credentials, left out of cache keys
+CREDENTIAL_PARAMS = ["Authorization", "access_token"]
 
 # useful constants
 STATIONS_GDF_ID_COL = "id"
@@ -117,6 +124,15 @@ TIMEOUT = 180
 
 
 # utils
+def _is_api_limit_response(response_json: dict) -> bool:
+    """Whether a `getmeasure` response reports that the API limit was reached."""
+    return (
+        isinstance(response_json, dict)
+        and "body" not in response_json
+        and response_json.get("error", {}).get("message") != "Device not found"
+    )
+
+
 ## auth
 def _browser_fetch_token(session, client_secret):
     auth_url, state = session.authorization_url(AUTHORIZATION_ENDPOINT)
@@ -222,8 +238,13 @@ class NetatmoConnect:
         if use_cache:
             self.cache_kwargs = {
                 "cache_name": settings.CACHE_NAME,
-                "backend": settings.CACHE_BACKEND,
+                "backend": cache.get_backend(),
                 "expire_after": settings.CACHE_EXPIRE,
+                "stale_while_revalidate": settings.CACHE_STALE_WHILE_REVALIDATE,
+                "stale_if_error": settings.CACHE_STALE_IF_ERROR,
+                "ignored_parameters": sessions.cache_ignored_parameters(
+                    CREDENTIAL_PARAMS
+                ),
             }
             session = CachedOAuth2Session(
                 token=token, **self.cache_kwargs, **self.oauth_kwargs
@@ -381,6 +402,9 @@ class NetatmoClient(StationsEndpointMixin, VariablesHardcodedMixin, BaseJSONClie
     _variables_dict = VARIABLES_DICT
     _ecv_dict = ECV_DICT
 
+    # API limits
+    _rate_limits = [(TEN_SECONDS_REQUESTS_LIMIT, 10), (HOURLY_REQUESTS_LIMIT, 3600)]
+
     def __init__(
         self,
         region: RegionType,
@@ -457,9 +481,15 @@ class NetatmoClient(StationsEndpointMixin, VariablesHardcodedMixin, BaseJSONClie
         #     client_id, client_secret, redirect_uri=redirect_uri, token=token
         # )
         # TODO: for netatmo, API limit is raises code 403 -> manage it
-        self._session = NetatmoConnect(
-            client_id, client_secret, redirect_uri=redirect_uri, token=token
-        )._session
+        self._session = sessions.mount_adapter(
+            NetatmoConnect(
+                client_id, client_secret, redirect_uri=redirect_uri, token=token
+            )._session,
+            self._rate_limits,
+        )
+        if isinstance(self._session, CacheMixin):
+            # expiration of the cached responses of each endpoint (see `BaseClient`)
+            self._session.settings.urls_expire_after = self._urls_expire_after
 
     def _get_stations_df(self) -> pd.DataFrame:
         # use this to drop the measurements
@@ -554,7 +584,12 @@ class NetatmoClient(StationsEndpointMixin, VariablesHardcodedMixin, BaseJSONClie
             real_time=real_time,
         )
 
-    def _ts_df_from_endpoint(self, ts_params: Mapping) -> pd.DataFrame:
+    def _ts_module_requests(self, ts_params: Mapping) -> list[tuple]:
+        """Get the `getmeasure` requests needed for the time series data frame.
+
+        Returns a list with a `(station_id, module_id, module_vars, params)` tuple for
+        each request.
+        """
         # we can only query one module at a time, which means that (i) we can only query
         # one station at a time and (ii) for that station, we can only query the
         # variables measured by a single module at a time, i.e., pressure in "NAMain",
@@ -562,7 +597,7 @@ class NetatmoClient(StationsEndpointMixin, VariablesHardcodedMixin, BaseJSONClie
         # "NAModule3".
         # we first define this dict, i.e., the subset of `MODULE_VAR_DICT` but only for
         # the needed modules/variables
-        _ts_params = ts_params.copy()
+        _ts_params = dict(ts_params)
         variable_ids = _ts_params.pop("variable_ids")
         module_var_dict = {module_type: [] for module_type in MODULE_VAR_DICT}
         for module_type, module_vars in MODULE_VAR_DICT.items():
@@ -598,20 +633,43 @@ class NetatmoClient(StationsEndpointMixin, VariablesHardcodedMixin, BaseJSONClie
             )
         ]
 
-        # get the number of requests and warn (if needed) about API limits
-        n_requests = sum(
-            [
-                len(self.stations_gdf[module_type].dropna()) * len(time_range_chunks)
-                for module_type in module_var_dict
-            ]
-        )
+        module_requests = [
+            (
+                station_id,
+                module_id,
+                module_vars,
+                dict(type=",".join(module_vars))
+                | _ts_params
+                | dict(
+                    device_id=station_id,
+                    module_id=module_id,
+                    date_begin=start,
+                    date_end=end,
+                ),
+            )
+            for module_type, module_vars in module_var_dict.items()
+            for station_id, module_id in self.stations_gdf[module_type].dropna().items()
+            for start, end in time_range_chunks
+        ]
+
+        # warn (if needed) about API limits
+        n_requests = len(module_requests)
         if n_requests > HOURLY_REQUESTS_LIMIT:
             utils.log(
                 f"Number of requests ({n_requests}) exceeds the hourly limit "
-                f"({HOURLY_REQUESTS_LIMIT}).",
+                f"({HOURLY_REQUESTS_LIMIT}), requests will be throttled accordingly.",
                 level=lg.WARNING,
             )
-        ts_dfs = []
+        return module_requests
+
+    def _ts_df_from_response_jsons(
+        self, module_requests: Sequence[tuple], response_jsons: Iterable[dict]
+    ) -> pd.DataFrame:
+        """Process the `getmeasure` responses into a time series data frame.
+
+        The responses are consumed lazily and in the same order as `module_requests`,
+        so that no further requests are sent if the API limit is reached.
+        """
 
         def _process_response_chunk(response_chunk, module_vars):
             chunk_df = pd.DataFrame(response_chunk["value"], columns=module_vars)
@@ -632,111 +690,198 @@ class NetatmoClient(StationsEndpointMixin, VariablesHardcodedMixin, BaseJSONClie
                     time=pd.to_datetime(response_chunk["beg_time"], unit="s"),
                 )
 
+        ts_dfs = []
         n_nodata_modules = 0
-        with tqdm(total=n_requests) as pbar:
-            for module_type, module_vars in module_var_dict.items():
-                _params = dict(type=",".join(module_vars)) | _ts_params
-                for station_id, module_id in (
-                    self.stations_gdf[module_type].dropna().items()
-                ):
-                    _params["device_id"] = station_id
-                    _params["module_id"] = module_id
-                    for start, end in time_range_chunks:
-                        _params["date_begin"] = start
-                        _params["date_end"] = end
-
-                        response_json = self._get_content_from_url(
-                            self._ts_endpoint,
-                            params=_params,
+        for (station_id, module_id, module_vars, _), response_json in zip(
+            module_requests, response_jsons
+        ):
+            try:
+                response_data = response_json["body"]
+                if response_data == []:
+                    # TODO: is this logging level too verbose?
+                    utils.log(
+                        f"The request for station {station_id} and module"
+                        f" {module_id} returned no data. This suggests "
+                        "that the module was not set up at the time of "
+                        "the requested date range.",
+                        level=lg.INFO,
+                    )
+                    n_nodata_modules += 1
+                else:
+                    ts_dfs.append(
+                        pd.concat(
+                            [
+                                _process_response_chunk(response_chunk, module_vars)
+                                for response_chunk in response_data
+                            ],
+                            ignore_index=True,
+                        ).assign(**{self._ts_df_stations_id_col: station_id})
+                    )
+            except TypeError:
+                # print("typeerror", response_json)
+                # TODO: manage this error
+                pass
+            except IndexError:
+                # print("indexerror", response_json)
+                # TODO: manage this error
+                pass
+            # TODO: except TokenExpiredError
+            # from oauthlib.oauth2.rfc6749.errors import TokenExpiredError
+            except KeyError:
+                if response_json["error"]["message"] == "Device not found":
+                    # print(response_json["error"])
+                    # TODO: manage this error
+                    pass
+                else:
+                    log_msg = (
+                        f"API limit reached, returning records for {len(ts_dfs)} "
+                        "modules"
+                    )
+                    if n_nodata_modules > 0:
+                        log_msg += (
+                            f" (plus {n_nodata_modules} modules with no records for "
+                            "the requested time range)."
                         )
-
-                        try:
-                            response_data = response_json["body"]
-                            if response_data == []:
-                                # TODO: is this logging level too verbose?
-                                utils.log(
-                                    f"The request for station {station_id} and module"
-                                    f" {module_id} returned no data. This suggests "
-                                    "that the module was not set up at the time of "
-                                    "the requested date range.",
-                                    level=lg.INFO,
-                                )
-                                n_nodata_modules += 1
-                            else:
-                                ts_dfs.append(
-                                    pd.concat(
-                                        [
-                                            _process_response_chunk(
-                                                response_chunk, module_vars
-                                            )
-                                            for response_chunk in response_data
-                                        ],
-                                        ignore_index=True,
-                                    ).assign(
-                                        **{self._ts_df_stations_id_col: station_id}
-                                    )
-                                )
-                        except TypeError:
-                            # print("typeerror", response_json)
-                            # TODO: manage this error
-                            pass
-                        except IndexError:
-                            # print("indexerror", response_json)
-                            # TODO: manage this error
-                            pass
-                        # TODO: except TokenExpiredError
-                        # from oauthlib.oauth2.rfc6749.errors import TokenExpiredError
-                        except KeyError:
-                            if response_json["error"]["message"] == "Device not found":
-                                # print(response_json["error"])
-                                # TODO: manage this error
-                                pass
-                            else:
-                                log_msg = (
-                                    "API limit reached, returning records for"
-                                    f" {len(ts_dfs)} modules"
-                                )
-                                if n_nodata_modules > 0:
-                                    log_msg += (
-                                        f" (plus {n_nodata_modules} modules with no "
-                                        "records for the requested time range)."
-                                    )
-                                else:
-                                    log_msg += "."
-                                utils.log(
-                                    log_msg,
-                                    level=lg.WARNING,
-                                )
-                                if ts_dfs:
-                                    # TODO: DRY with the return statement at the end of
-                                    # the method
-                                    return pd.concat(
-                                        ts_dfs, ignore_index=True
-                                    ).set_index(
-                                        [
-                                            self._ts_df_stations_id_col,
-                                            self._ts_df_time_col,
-                                        ]
-                                    )
-                                else:
-                                    # return empty data frame
-                                    # TODO: catch the subsequent KeyError in
-                                    # `BaseClient._rename_variables_cols` and raise a
-                                    # more informative message
-                                    return pd.DataFrame()
-                        pbar.update(1)
+                    else:
+                        log_msg += "."
+                    utils.log(
+                        log_msg,
+                        level=lg.WARNING,
+                    )
+                    break
 
         if n_nodata_modules > 0:
             utils.log(
                 "Number of modules with no records for the requested time range: "
-                f"{n_nodata_modules} (out of {n_requests}).",
+                f"{n_nodata_modules} (out of {len(module_requests)}).",
                 level=lg.INFO,
             )
 
+        if not ts_dfs:
+            # return empty data frame
+            # TODO: catch the subsequent KeyError in
+            # `BaseClient._rename_variables_cols` and raise a more informative message
+            return pd.DataFrame()
         return pd.concat(ts_dfs, ignore_index=True).set_index(
             [self._ts_df_stations_id_col, self._ts_df_time_col]
         )
 
+    def _module_nodata_key(self, params: Mapping) -> str:
+        """Key of a `getmeasure` request in the negative cache."""
+        return f"{self._ts_endpoint}?{parse.urlencode(sorted(params.items()))}"
+
+    def _is_final_module_request(self, params: Mapping) -> bool:
+        """Whether a `getmeasure` request is final, i.e., may not get more data.
+
+        Only requests of past time ranges that are not in real time are final, so that
+        windows that reach the present are requested again.
+        """
+        return not params.get("real_time") and params["date_end"] < time.time()
+
+    def _get_nodata_keys(self, module_requests: Sequence[tuple]) -> set[str]:
+        """Get the keys of the `getmeasure` requests known to return no data."""
+        return cache.get_nodata(
+            self._module_nodata_key(params) for *_, params in module_requests
+        )
+
+    def _ts_cache_entries(self, leaves: Sequence[Mapping]) -> list[list[dict]]:
+        # each time series query is split into `getmeasure` requests, i.e., one for
+        # each module and time range chunk
+        leaves_entries = []
+        for _ts_params in leaves:
+            module_requests = self._ts_module_requests(_ts_params)
+            entries = self._request_cache_entries(
+                [(self._ts_endpoint, params) for *_, params in module_requests]
+            )
+            nodata_keys = self._get_nodata_keys(module_requests)
+            for (*_, params), entry in zip(module_requests, entries):
+                if self._module_nodata_key(params) in nodata_keys:
+                    entry["status"] = cache.COVERAGE_NODATA
+            leaves_entries.append(entries)
+        return leaves_entries
+
+    def _get_module_json(self, params: Mapping, nodata_keys: set[str]) -> dict:
+        """Get the `getmeasure` response, unless it is known to have no data."""
+        nodata_key = self._module_nodata_key(params)
+        if nodata_key in nodata_keys:
+            return {"body": []}
+        response_json = self._get_content_from_url(self._ts_endpoint, params=params)
+        if (
+            isinstance(response_json, dict)
+            and response_json.get("body") == []
+            and self._is_final_module_request(params)
+        ):
+            cache.record_nodata(nodata_key)
+        return response_json
+
+    async def _aget_module_json(self, params: Mapping, nodata_keys: set[str]) -> dict:
+        """Coroutine version of `_get_module_json`."""
+        nodata_key = self._module_nodata_key(params)
+        if nodata_key in nodata_keys:
+            return {"body": []}
+        response_json = await self._aget_content_from_url(
+            self._ts_endpoint, params=params
+        )
+        if (
+            isinstance(response_json, dict)
+            and response_json.get("body") == []
+            and self._is_final_module_request(params)
+        ):
+            cache.record_nodata(nodata_key)
+        return response_json
+
+    def _ts_df_from_endpoint(self, ts_params: Mapping) -> pd.DataFrame:
+        module_requests = self._ts_module_requests(ts_params)
+        # modules known to have no data for the requested time range are not requested
+        nodata_keys = self._get_nodata_keys(module_requests)
+        # use a generator so that the requests are only sent as the responses are
+        # processed
+        response_jsons = (
+            self._get_module_json(params, nodata_keys)
+            for *_, params in tqdm(module_requests, disable=not self.progress)
+        )
+        return self._ts_df_from_response_jsons(module_requests, response_jsons)
+
+    async def _ats_df_from_endpoint(self, ts_params: Mapping) -> pd.DataFrame:
+        module_requests = await asyncio.to_thread(self._ts_module_requests, ts_params)
+        nodata_keys = await asyncio.to_thread(self._get_nodata_keys, module_requests)
+        # at most `settings.ASYNC_MAX_CONCURRENCY` requests are in flight, and no
+        # further requests are sent once a response reports that the API limit is
+        # reached (the requests that were not sent are returned as None)
+        semaphore = asyncio.Semaphore(settings.ASYNC_MAX_CONCURRENCY)
+        limit_reached = asyncio.Event()
+
+        async def _aget_module_json(params, pbar):
+            async with semaphore:
+                if limit_reached.is_set():
+                    return None
+                response_json = await self._aget_module_json(params, nodata_keys)
+                if _is_api_limit_response(response_json):
+                    limit_reached.set()
+                pbar.update()
+                return response_json
+
+        with tqdm(total=len(module_requests), disable=not self.progress) as pbar:
+            response_jsons = await asyncio.gather(
+                *(_aget_module_json(params, pbar) for *_, params in module_requests)
+            )
+        # keep the responses in order up to the first request that was not sent
+        return self._ts_df_from_response_jsons(
+            module_requests,
+            itertools.takewhile(
+                lambda response_json: response_json is not None, response_jsons
+            ),
+        )
+
+    def _prepare_request(
+        self, url: str, params: Mapping, headers: Mapping
+    ) -> requests.PreparedRequest:
+        # the OAuth2 session adds the access token when sending the request (rather
+        # than when preparing it), so we need to add it here for asynchronous requests
+        request = super()._prepare_request(url, params, headers)
+        request.headers["Authorization"] = f"Bearer {self._session.access_token}"
+        return request
+
     def get_ts_df(
         self,
         variables: VariablesType,
@@ -786,3 +931,28 @@ class NetatmoClient(StationsEndpointMixin, VariablesHardcodedMixin, BaseJSONClie
             optimize=True,  # avoid writing a parsers for each format
             real_time=real_time,
         )
+
+    async def aget_ts_df(
+        self,
+        variables: VariablesType,
+        start: DateTimeType,
+        end: DateTimeType,
+        *,
+        scale: str | None = None,
+        limit: int | None = None,
+        real_time: bool | None = None,
+    ) -> pd.DataFrame:
+        """Get time series data frame asynchronously.
+
+        Coroutine version of `get_ts_df`, see its documentation for the parameters and
+        the returned data frame.
+        """
+        return await self._aget_ts_df(
+            variables=variables,
+            start=start,
+            end=end,
+            scale=scale,
+            limit=limit,
+            optimize=True,  # avoid writing a parsers for each format
+            real_time=real_time,
+        )
@@ -3,14 +3,12 @@
 import logging as lg
 from collections.abc import Sequence
 
-import dask
 import pandas as pd
 import pooch
 import requests
-from dask import diagnostics
 from pyregeon import RegionType
 
-from meteora import settings, utils
+from meteora import parsing, settings, utils
 from meteora.clients.base import BaseFileClient
 from meteora.clients.mixins import (
     StationPartitionedTSMixin,
@@ -18,6 +16,7 @@ from meteora.clients.mixins import (
     TimePartitionedTSMixin,
     VariablesHardcodedMixin,
 )
+from meteora.concurrency import BaseExecutor
 from meteora.utils import DateTimeType, KwargsType, VariablesType
 
 # disable pooch warnings when providing `None` as "known_hash"
@@ -44,6 +43,13 @@ TS_DF_STATIONS_ID_COL = "STATION"
 TS_DF_TIME_COL = "DATE"
 VARIABLES_ID_COL = "code"
 VARIABLES_LABEL_COL = "description"
+# the variables are read as floats (e.g., the "000" wind direction of calm winds)
+TS_CSV_SCHEMA = parsing.CSVSchema(
+    sep="|",
+    dtypes={TS_DF_STATIONS_ID_COL: "str"},
+    time_formats={TS_DF_TIME_COL: parsing.ISO8601},
+    value_dtype="float64",
+)
 
 # see section "IV. List of elements/variable" and appendix A of the GHCNh documentation
 # www.ncei.noaa.gov/oa/global-historical-climatology-network/hourly/doc/
@@ -112,6 +118,9 @@ class GHCNHourlyClient(
     progress : bool, optional
         Whether to show a tqdm progress bar for partitioned time series fetches. If
         None, the value from `settings.SHOW_PROGRESS` is used.
+    executor : {"serial", "thread", "process", "dask"} or BaseExecutor, optional
+        Executor used to run the partitions of time series fetches concurrently. If
+        None, the "thread" executor is used.
     sjoin_kwargs : dict, optional
         Keyword arguments to pass to the `geopandas.sjoin` function when filtering the
         stations within the region. If None, the value from `settings.SJOIN_KWARGS` is
@@ -126,6 +135,10 @@ class GHCNHourlyClient(
     # time partition frequency
     _time_partition_freq = "YS"
 
+    # fetch the (station, year) files concurrently by default, since each of them is a
+    # separate download
+    _executor = "thread"
+
     # API endpoints
     _stations_endpoint = GHCNH_STATIONS_ENDPOINT
     _ts_endpoint = TS_ENDPOINT
@@ -135,6 +148,7 @@ class GHCNHourlyClient(
     _stations_gdf_id_col = STATIONS_GDF_ID_COL
     _ts_df_stations_id_col = TS_DF_STATIONS_ID_COL
     _ts_df_time_col = TS_DF_TIME_COL
+    _ts_csv_schema = TS_CSV_SCHEMA
     _variables_id_col = VARIABLES_ID_COL
     _variables_label_col = VARIABLES_LABEL_COL
     _variables_dict = VARIABLES_DICT
@@ -146,6 +160,7 @@ class GHCNHourlyClient(
         *,
         pooch_kwargs: KwargsType | None = None,
         progress: bool | None = None,
+        executor: str | BaseExecutor | None = None,
         **sjoin_kwargs: KwargsType,
     ) -> None:
         """Initialize GHCN hourly client."""
@@ -162,6 +177,8 @@ class GHCNHourlyClient(
         super().__init__()
         if progress is not None:
             self.progress = progress
+        if executor is not None:
+            self.executor = executor
 
     def _ts_params(
         self, variable_ids: Sequence, start: DateTimeType, end: DateTimeType
@@ -178,42 +195,33 @@ class GHCNHourlyClient(
         cols_to_keep = (
             [self._ts_df_stations_id_col] + [self._ts_df_time_col] + variable_cols
         )
-        start = ts_params["start"]
-        end = ts_params["end"]
         try:
             source = self._ts_source(url, ts_params)
         except requests.HTTPError:
             return pd.DataFrame()
-        ts_df = pd.read_csv(source, sep="|", usecols=cols_to_keep)
-        ts_df[self._ts_df_time_col] = pd.to_datetime(ts_df[self._ts_df_time_col])
-        ts_df = ts_df[ts_df[self._ts_df_time_col].between(start, end)]
+        ts_df = parsing.read_csv(source, self._ts_csv_schema, columns=cols_to_keep)
         return ts_df.set_index([self._ts_df_stations_id_col, self._ts_df_time_col])
 
-    def _ts_df_from_endpoint(self, ts_params) -> pd.DataFrame:
-        # override to parallelize all (station, year) combinations with dask
-        variable_cols = list(ts_params["variable_ids"])
-        station_partitions = self._iter_station_partitions(ts_params)
-        time_partitions = self._iter_time_partitions(ts_params)
-
-        tasks = [
-            dask.delayed(self._ts_df_from_url)(
-                self._format_ts_endpoint(ts_params | sp | tp),
-                ts_params | sp | tp,
-            )
-            for sp in station_partitions
-            for tp in time_partitions
-        ]
-        with diagnostics.ProgressBar():
-            dfs = dask.compute(*tasks)
-
-        non_empty = [df for df in dfs if not df.empty]
-        if not non_empty:
+    def _handle_empty_ts_df(self, ts_df: pd.DataFrame, ts_params) -> pd.DataFrame:
+        if ts_df.empty:
             utils.log(
                 "No data found for any station in the requested period.",
                 level=lg.WARNING,
             )
-            return pd.DataFrame(columns=variable_cols)
-        return pd.concat(non_empty)
+            return pd.DataFrame(columns=list(ts_params["variable_ids"]))
+        return ts_df
+
+    def _ts_df_from_endpoint(self, ts_params) -> pd.DataFrame:
+        # the (station, year) partitions are run concurrently by the partitioned mixins
+        # (see the `executor` property), here we only handle the case of no data
+        return self._handle_empty_ts_df(
+            super()._ts_df_from_endpoint(ts_params), ts_params
+        )
+
+    async def _ats_df_from_endpoint(self, ts_params) -> pd.DataFrame:
+        return self._handle_empty_ts_df(
+            await super()._ats_df_from_endpoint(ts_params), ts_params
+        )
 
     def get_ts_df(
         self,
@@ -241,3 +249,16 @@ class GHCNHourlyClient(
             at each station (first-level index) for each variable (column).
         """
         return self._get_ts_df(variables, start, end)
+
+    async def aget_ts_df(
+        self,
+        variables: VariablesType,
+        start: DateTimeType,
+        end: DateTimeType,
+    ) -> pd.DataFrame:
+        """Get time series data frame asynchronously.
+
+        Coroutine version of `get_ts_df`, see its documentation for the parameters and
+        the returned data frame.
+        """
+        return await self._aget_ts_df(variables, start, end)
@@ -0,0 +1,144 @@
+"""Concurrency utilities."""
+
+import abc
+from collections.abc import Callable, Iterable, Iterator
+from concurrent import futures
+
+from meteora import settings
+
+__all__ = [
+    "BaseExecutor",
+    "DaskExecutor",
+    "ProcessExecutor",
+    "SerialExecutor",
+    "ThreadExecutor",
+    "get_executor",
+]
+
+
+class BaseExecutor(abc.ABC):
+    """Base executor to map a function over partitions.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Maximum number of concurrent workers. If None, the value from
+        `settings.MAX_WORKERS` is used. Ignored by the serial executor.
+    """
+
+    def __init__(self, max_workers: int | None = None) -> None:
+        """Initialize the executor."""
+        if max_workers is None:
+            max_workers = settings.MAX_WORKERS
+        self.max_workers = max_workers
+
+    @abc.abstractmethod
+    def map(self, func: Callable, iterable: Iterable) -> Iterator:
+        """Apply `func` to each item of `iterable`.
+
+        Results must be yielded in the same order as the items of `iterable`.
+        """
+        pass
+
+
+class SerialExecutor(BaseExecutor):
+    """Executor that runs each partition one after another in the calling thread."""
+
+    def map(self, func: Callable, iterable: Iterable) -> Iterator:
+        """Apply `func` to each item of `iterable` sequentially."""
+        return map(func, iterable)
+
+
+class _PoolExecutor(BaseExecutor):
+    _pool_cls: type[futures.Executor]
+
+    def map(self, func: Callable, iterable: Iterable) -> Iterator:
+        """Apply `func` to each item of `iterable` in a pool of workers."""
+        # yield from within the context manager so that the pool is only shut down once
+        # all the results have been consumed
+        with self._pool_cls(max_workers=self.max_workers) as pool:
+            yield from pool.map(func, iterable)
+
+
+class ThreadExecutor(_PoolExecutor):
+    """Executor that runs partitions concurrently in a thread pool."""
+
+    _pool_cls = futures.ThreadPoolExecutor
+
+
+class ProcessExecutor(_PoolExecutor):
+    """Executor that runs partitions concurrently in a process pool.
+
+    Note that the client (and hence the function that is mapped) must be picklable.
+    """
+
+    _pool_cls = futures.ProcessPoolExecutor
+
+
+class DaskExecutor(BaseExecutor):
+    """Executor that runs partitions as dask delayed tasks.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Maximum number of concurrent workers. If None, the value from
+        `settings.MAX_WORKERS` is used.
+    scheduler : str, optional
+        Dask scheduler, passed to `dask.compute`. If None, dask's configured default
+        scheduler is used (e.g., a `dask.distributed.Client` if one is active).
+    """
+
+    def __init__(
+        self, max_workers: int | None = None, *, scheduler: str | None = None
+    ) -> None:
+        """Initialize the dask executor."""
+        super().__init__(max_workers)
+        self.scheduler = scheduler
+
+    def map(self, func: Callable, iterable: Iterable) -> Iterator:
+        """Apply `func` to each item of `iterable` with `dask.compute`."""
+        import dask
+
+        tasks = [dask.delayed(func)(item) for item in iterable]
+        return iter(
+            dask.compute(*tasks, scheduler=self.scheduler, num_workers=self.max_workers)
+        )
+
+
+EXECUTOR_DICT = {
+    "serial": SerialExecutor,
+    "thread": ThreadExecutor,
+    "process": ProcessExecutor,
+    "dask": DaskExecutor,
+}
+
+
+def get_executor(
+    executor: str | BaseExecutor | None = None, *, max_workers: int | None = None
+) -> BaseExecutor:
+    """Get an executor instance.
+
+    Parameters
+    ----------
+    executor : {"serial", "thread", "process", "dask"} or BaseExecutor, optional
+        Executor name or instance. If None, the value from `settings.EXECUTOR` is used.
+    max_workers : int, optional
+        Maximum number of concurrent workers, used only when `executor` is a string. If
+        None, the value from `settings.MAX_WORKERS` is used.
+
+    Returns
+    -------
+    executor : BaseExecutor
+        The executor instance.
+    """
+    if executor is None:
+        executor = settings.EXECUTOR
+    if isinstance(executor, BaseExecutor):
+        return executor
+    try:
+        executor_cls = EXECUTOR_DICT[executor]
+    except KeyError:
+        raise ValueError(
+            f"executor must be among {list(EXECUTOR_DICT.keys())}, got {executor!r}"
+        )
+    return executor_cls(max_workers=max_workers)
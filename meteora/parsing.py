@@ -0,0 +1,294 @@
+"""Parsing and typing of the time series data.
+
+The file-based clients (and the text clients, e.g., IEM) parse their time series data
+with `read_csv` following a `CSVSchema`, which declares the column types and the
+explicit format of the timestamps of the client's data. The parsing engine is set by
+`settings.CSV_ENGINE`: "pandas" uses the default (single-threaded) `pandas.read_csv`
+whereas "pyarrow" uses the multi-threaded CSV reader of pyarrow, which parses the
+timestamps and converts the column types while reading the blocks of the file in
+parallel.
+
+The time series data frames returned by each client are then typed following its
+`TSSchema` (see `coerce_ts_df`), with a vectorized conversion of each column.
+"""
+
+import io
+from collections import defaultdict
+from collections.abc import Mapping, Sequence
+from typing import IO, NamedTuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype
+
+from meteora import settings
+from meteora.optional import require_optional
+from meteora.utils import PathType
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+    pa_csv = None
+
+__all__ = [
+    "CSV_ENGINES",
+    "ISO8601",
+    "CSVSchema",
+    "TSSchema",
+    "coerce_ts_df",
+    "read_csv",
+]
+
+CSV_ENGINES = ("pandas", "pyarrow")
+# format of the ISO 8601 timestamps (e.g., "2024-01-31T23:50:00" or "2024-01-31 23:50"),
+# understood by both `pandas.to_datetime` and pyarrow
+ISO8601 = "ISO8601"
+
+
+class CSVSchema(NamedTuple):
+    """Schema of CSV time series data.
+
+    Attributes
+    ----------
+    sep : str, default ","
+        Delimiter of the columns.
+    dtypes : mapping, optional
+        Data types (e.g., "str" or "float64") of the columns, keyed by column label.
+    time_formats : mapping, optional
+        Format of the timestamp columns, keyed by column label, either a `strftime`
+        format (e.g., "%d.%m.%Y %H:%M") or `ISO8601`.
+    value_dtype : str, optional
+        Data type of the other columns (i.e., the variables). If None, it is inferred.
+    na_values : sequence of str, optional
+        Additional strings to recognize as missing values.
+    encoding : str, default "utf-8"
+        Text encoding of the files.
+    """
+
+    sep: str = ","
+    dtypes: Mapping[str, str] | None = None
+    time_formats: Mapping[str, str] | None = None
+    value_dtype: str | None = None
+    na_values: Sequence[str] = ()
+    encoding: str = "utf-8"
+
+
+def _read_csv_pandas(
+    source: PathType | IO, schema: CSVSchema, columns: Sequence[str] | None
+) -> pd.DataFrame:
+    dtypes = dict(schema.dtypes or {})
+    # the timestamps are parsed with their explicit format afterwards
+    dtypes.update({time_col: "str" for time_col in schema.time_formats or {}})
+    if schema.value_dtype is not None:
+        dtypes = defaultdict(lambda: schema.value_dtype, dtypes)
+    if columns is None:
+        usecols = None
+    else:
+        # ignore the requested columns that are not in the file (read as missing)
+        usecols = set(columns).__contains__
+    df = pd.read_csv(
+        source,
+        sep=schema.sep,
+        encoding=schema.encoding,
+        usecols=usecols,
+        dtype=dtypes,
+        na_values=list(schema.na_values) or None,
+    )
+    if columns is not None:
+        df = df.reindex(columns=columns)
+    return df
+
+
+def _read_csv_pyarrow(
+    source: PathType | IO, schema: CSVSchema, columns: Sequence[str] | None
+) -> pd.DataFrame:
+    encoding = schema.encoding
+    # pyarrow reads (and decodes) bytes
+    if isinstance(source, io.TextIOWrapper):
+        encoding = source.encoding
+        source = source.buffer
+    elif isinstance(source, io.StringIO):
+        encoding = "utf-8"
+        source = io.BytesIO(source.getvalue().encode(encoding))
+
+    time_formats = schema.time_formats or {}
+    column_types = {
+        col: pa.from_numpy_dtype(np.dtype(dtype))
+        for col, dtype in (schema.dtypes or {}).items()
+    }
+    value_type = (
+        pa.from_numpy_dtype(np.dtype(schema.value_dtype))
+        if schema.value_dtype is not None
+        else None
+    )
+    if value_type is not None and columns is not None:
+        column_types.update(
+            {
+                col: value_type
+                for col in columns
+                if col not in column_types and col not in time_formats
+            }
+        )
+    convert_options = pa_csv.ConvertOptions(
+        column_types=column_types,
+        include_columns=columns,
+        include_missing_columns=columns is not None,
+        null_values=[*pa_csv.ConvertOptions().null_values, *schema.na_values],
+        strings_can_be_null=True,
+        timestamp_parsers=[
+            pa_csv.ISO8601 if time_format == ISO8601 else time_format
+            for time_format in set(time_formats.values())
+        ],
+    )
+    table = pa_csv.read_csv(
+        source,
+        read_options=pa_csv.ReadOptions(use_threads=True, encoding=encoding),
+        parse_options=pa_csv.ParseOptions(delimiter=schema.sep),
+        convert_options=convert_options,
+    )
+
+    for i, field in enumerate(table.schema):
+        if pa.types.is_timestamp(field.type):
+            # pandas timestamps are in nanoseconds
+            cast_type = pa.timestamp("ns", tz=field.type.tz)
+        elif field.name in time_formats or field.name in column_types:
+            continue
+        elif value_type is not None:
+            cast_type = value_type
+        elif pa.types.is_null(field.type):
+            # e.g., columns without any value (or missing from the file)
+            cast_type = pa.float64()
+        else:
+            continue
+        if field.type != cast_type:
+            table = table.set_column(i, field.name, table.column(i).cast(cast_type))
+    return table.to_pandas(use_threads=True)
+
+
+def read_csv(
+    source: PathType | IO,
+    schema: CSVSchema,
+    *,
+    columns: Sequence[str] | None = None,
+    engine: str | None = None,
+) -> pd.DataFrame:
+    """Read CSV time series data following a schema.
+
+    Parameters
+    ----------
+    source : str, path-like or file-like
+        Path to the CSV file (which can be compressed, e.g., with the ".gz" suffix) or
+        a binary or text file-like object.
+    schema : CSVSchema
+        Schema of the data.
+    columns : list-like of str, optional
+        Columns to read (in this order). The columns that are not in the data are read
+        as missing values. If None, all the columns are read.
+    engine : {"pandas", "pyarrow"}, optional
+        Parsing engine. If None, the value from `settings.CSV_ENGINE` is used.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        Data frame with the parsed data. The timestamps with an UTC offset are
+        converted to UTC by the "pyarrow" engine.
+    """
+    if engine is None:
+        engine = settings.CSV_ENGINE
+    if columns is not None:
+        columns = list(columns)
+    if engine == "pandas":
+        df = _read_csv_pandas(source, schema, columns)
+    elif engine == "pyarrow":
+        require_optional(
+            {"pyarrow": pa}, extra="parquet", feature='The "pyarrow" CSV engine'
+        )
+        df = _read_csv_pyarrow(source, schema, columns)
+    else:
+        raise ValueError(
+            f"Unknown CSV engine '{engine}'. Must be one of {list(CSV_ENGINES)}."
+        )
+
+    for time_col, time_format in (schema.time_formats or {}).items():
+        # the pyarrow engine parses the timestamps while reading (unless they do not
+        # match the format, e.g., an empty column)
+        if time_col in df.columns and not is_datetime64_any_dtype(df[time_col]):
+            df[time_col] = pd.to_datetime(df[time_col], format=time_format)
+    return df
+
+
+class TSSchema(NamedTuple):
+    """Typed schema of the time series data frames of a client.
+
+    Attributes
+    ----------
+    value_dtype : str, optional, default "float64"
+        Data type of the variable columns. If None, the parsed types are kept.
+    variable_dtypes : mapping, optional
+        Data types of specific variables, keyed by variable identifier, which take
+        precedence over `value_dtype`.
+    station_dtype : str, optional
+        Data type of the station identifiers (e.g., "int64" or "str"). If None, the
+        parsed type is kept.
+    """
+
+    value_dtype: str | None = "float64"
+    variable_dtypes: Mapping | None = None
+    station_dtype: str | None = None
+
+
+def coerce_ts_df(
+    ts_df: pd.DataFrame,
+    dtypes: Mapping[str, str],
+    *,
+    station_dtype: str | None = None,
+) -> pd.DataFrame:
+    """Coerce the columns and index of a time series data frame to the given types.
+
+    Each column is converted in a single vectorized pass (and only if its type differs),
+    and the station and time index levels are converted on their unique values only.
+
+    Parameters
+    ----------
+    ts_df : pandas.DataFrame
+        Long form data frame with a time series of measurements (second-level index)
+        at each station (first-level index) for each variable (column).
+    dtypes : mapping
+        Data types of the columns, keyed by column label. Object columns are converted
+        with `pandas.to_numeric` if the data type is numeric.
+    station_dtype : str, optional
+        Data type of the station identifiers. If None, the type is not changed.
+
+    Returns
+    -------
+    ts_df : pandas.DataFrame
+        Data frame with the coerced types, which is `ts_df` itself if all the types
+        already matched.
+    """
+    columns = {}
+    for col, dtype in dtypes.items():
+        ser = ts_df[col]
+        if ser.dtype == dtype:
+            continue
+        if not is_numeric_dtype(ser.dtype) and is_numeric_dtype(np.dtype(dtype)):
+            ser = pd.to_numeric(ser)
+        columns[col] = ser.astype(dtype)
+
+    index = ts_df.index
+    if isinstance(index, pd.MultiIndex) and index.nlevels == 2:
+        station_level, time_level = index.levels
+        if station_dtype is not None and station_level.dtype != station_dtype:
+            index = index.set_levels(station_level.astype(station_dtype), level=0)
+        if not is_datetime64_any_dtype(time_level.dtype):
+            index = index.set_levels(pd.to_datetime(time_level), level=1)
+
+    if not columns and index is ts_df.index:
+        return ts_df
+    # shallow copy, i.e., the columns that already have the right type are not copied
+    ts_df = ts_df.copy(deep=False)
+    for col, ser in columns.items():
+        ts_df[col] = ser
+    ts_df.index = index
+    return ts_df
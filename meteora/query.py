@@ -0,0 +1,218 @@
+"""Queries over Parquet datasets of time series data frames.
+
+The time series data frames returned by the clients' `get_ts_df` can be archived as
+Parquet files (e.g., with `pandas.DataFrame.to_parquet` or in a
+`meteora.store.ParquetStore`), and `query` reads them back with a pyarrow dataset, so
+that only the required data is read: the time and station filters are pushed down to
+the Parquet row groups (which are skipped based on their statistics), only the columns
+of the requested variables are read and the files are scanned in parallel threads.
+"""
+
+import json
+import os
+from collections.abc import Sequence
+
+import geopandas as gpd
+import pandas as pd
+from pyregeon import RegionMixin, RegionType
+
+from meteora import settings
+from meteora.optional import require_optional
+from meteora.utils import DateTimeType
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+    ds = None
+
+__all__ = ["query"]
+
+PathType = str | os.PathLike
+# key of the schema metadata where pandas stores the data frame attributes
+_PANDAS_ATTRS_KEY = b"PANDAS_ATTRS"
+
+
+def _scalar(value: DateTimeType, field_type: "pa.DataType") -> "pa.Scalar":
+    """Convert a datetime-like value to a scalar of a timestamp field.
+
+    Naive values are considered UTC times for tz-aware fields, like in
+    `meteora.store.ParquetStore`.
+    """
+    value = pd.Timestamp(value)
+    tz = getattr(field_type, "tz", None)
+    if tz is not None:
+        if value.tz is None:
+            value = value.tz_localize("UTC")
+        value = value.tz_convert(tz)
+    elif value.tz is not None:
+        value = value.tz_convert("UTC").tz_localize(None)
+    return pa.scalar(value, type=field_type)
+
+
+def _region_station_ids(stations_gdf: gpd.GeoDataFrame, region: RegionType) -> pd.Index:
+    """Get the identifiers of the stations within a region using a spatial index."""
+    region_gdf = RegionMixin._process_region_arg(region, crs=stations_gdf.crs)
+    if region_gdf.crs is not None and stations_gdf.crs is not None:
+        region_gdf = region_gdf.to_crs(stations_gdf.crs)
+    _, station_positions = stations_gdf.sindex.query(
+        region_gdf.geometry, predicate="intersects"
+    )
+    return stations_gdf.index[sorted(set(station_positions))]
+
+
+def query(
+    path: PathType | Sequence[PathType],
+    *,
+    region: RegionType | None = None,
+    stations_gdf: gpd.GeoDataFrame | None = None,
+    stations: Sequence | None = None,
+    start: DateTimeType | None = None,
+    end: DateTimeType | None = None,
+    variables: Sequence[str] | None = None,
+    use_threads: bool = True,
+) -> pd.DataFrame:
+    """Query a Parquet dataset of time series data frames.
+
+    Parameters
+    ----------
+    path : str, path-like or list-like of str or path-like
+        Path to a Parquet file or a directory of Parquet files (including
+        Hive-partitioned datasets, e.g., a `meteora.store.ParquetStore`), or list of
+        paths to Parquet files. The files must have the station and time columns of
+        the long form time series data frames (e.g., as their index).
+    region : str, Sequence, GeoSeries, GeoDataFrame, PathLike, or IO, optional
+        Region to filter the stations, in any of the formats accepted by the clients,
+        which requires `stations_gdf`.
+    stations_gdf : geopandas.GeoDataFrame, optional
+        Stations data indexed by station identifier, e.g., the `stations_gdf` of the
+        client that returned the data. Required if `region` is provided.
+    stations : list-like, optional
+        Identifiers of the stations to read. If `region` is also provided, only the
+        stations that are in both are read.
+    start, end : datetime-like, str, int, float, optional
+        Values representing the start and end of the period to read (both inclusive).
+        If None, the period is not bounded. Naive values are considered UTC times if
+        the time column is tz-aware.
+    variables : list-like of str, optional
+        Variables (columns) to read. If None, all the variables are read.
+    use_threads : bool, default True
+        Whether to scan the files in parallel threads.
+
+    Returns
+    -------
+    ts_df : pandas.DataFrame
+        Long form data frame with a time series of measurements (second-level index) at
+        each station (first-level index) for each variable (column), with the units in
+        `attrs["units"]` if the files have them.
+    """
+    require_optional(
+        {"pyarrow": pa}, extra="parquet", feature="Querying Parquet datasets"
+    )
+    if not isinstance(path, str | os.PathLike):
+        path = [os.fspath(_path) for _path in path]
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    # the files may have different columns (e.g., variables synced separately into a
+    # `meteora.store.ParquetStore`), so the schema is unified from all of them rather
+    # than inferred from the first one
+    physical_schemas = [
+        fragment.physical_schema for fragment in dataset.get_fragments()
+    ]
+    if len(physical_schemas) > 1:
+        dataset = ds.dataset(
+            path,
+            schema=pa.unify_schemas(
+                [dataset.schema, *physical_schemas], promote_options="permissive"
+            ),
+            format="parquet",
+            partitioning=dataset.partitioning,
+        )
+    schema = dataset.schema
+    if settings.TIME_COL not in schema.names:
+        # no files
+        return pd.DataFrame(columns=variables)
+    partition_names = (
+        set(dataset.partitioning.schema.names)
+        if dataset.partitioning is not None
+        else set()
+    )
+    id_cols = [settings.STATIONS_ID_COL, settings.TIME_COL]
+    if variables is None:
+        variables = [
+            name
+            for name in schema.names
+            if name not in id_cols
+            and name not in partition_names
+            and not name.startswith("__index_level_")
+        ]
+    else:
+        variables = list(variables)
+
+    # filters, pushed down to the row groups
+    if region is not None:
+        if stations_gdf is None:
+            raise ValueError("Filtering by `region` requires `stations_gdf`.")
+        region_station_ids = _region_station_ids(stations_gdf, region)
+        if stations is None:
+            stations = region_station_ids
+        else:
+            stations = pd.Index(stations).intersection(region_station_ids)
+    expressions = []
+    if stations is not None:
+        station_type = schema.field(settings.STATIONS_ID_COL).type
+        expressions.append(
+            ds.field(settings.STATIONS_ID_COL).isin(
+                pa.array(list(stations)).cast(station_type)
+            )
+        )
+    time_type = schema.field(settings.TIME_COL).type
+    if start is not None:
+        expressions.append(ds.field(settings.TIME_COL) >= _scalar(start, time_type))
+    if end is not None:
+        expressions.append(ds.field(settings.TIME_COL) <= _scalar(end, time_type))
+    filter_expression = None
+    for expression in expressions:
+        filter_expression = (
+            expression if filter_expression is None else filter_expression & expression
+        )
+
+    # projection of the variable columns (missing ones are read as nulls)
+    columns = {
+        name: ds.field(name)
+        if name in schema.names
+        else ds.scalar(None).cast(pa.float64())
+        for name in [*id_cols, *variables]
+    }
+    table = dataset.to_table(
+        columns=columns, filter=filter_expression, use_threads=use_threads
+    )
+    # build the index explicitly rather than from the pandas metadata of the files
+    ts_df = (
+        table.replace_schema_metadata(None)
+        .to_pandas(use_threads=use_threads)
+        .set_index(id_cols)
+    )
+    # the values of a station and time may be spread across several files (e.g.,
+    # variables synced separately into a `meteora.store.ParquetStore`)
+    if ts_df.index.has_duplicates:
+        ts_df = ts_df.groupby(level=[0, 1]).first()
+    ts_df = ts_df.sort_index()
+
+    attrs_metadata = [
+        physical_schema.metadata[_PANDAS_ATTRS_KEY]
+        for physical_schema in physical_schemas
+        if _PANDAS_ATTRS_KEY in (physical_schema.metadata or {})
+    ]
+    if attrs_metadata:
+        units = {}
+        for metadata in attrs_metadata:
+            units.update(json.loads(metadata).get("units", {}))
+        ts_df.attrs = {
+            "units": {
+                variable: unit
+                for variable, unit in units.items()
+                if variable in ts_df.columns
+            }
+        }
+    return ts_df
@@ -0,0 +1,174 @@
+"""Rate limiting of requests to the providers' APIs."""
+
+import asyncio
+import collections
+import logging as lg
+import threading
+import time
+from collections.abc import Sequence
+from urllib import parse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from meteora import settings, utils
+
+__all__ = [
+    "RateLimitAdapter",
+    "RateLimiter",
+    "get_rate_limiter",
+]
+
+RateLimitsType = Sequence[tuple[int, float]]
+
+# process-wide rate limiters, keyed by domain, so that all the clients (and all the
+# threads and coroutines) that request the same API share the same budget
+_RATE_LIMITERS: dict[str, "RateLimiter"] = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
+
+
+class RateLimiter:
+    """Rate limiter enforcing a maximum number of requests over several time windows.
+
+    Each call to `acquire` (or `aacquire`) reserves the earliest time at which a
+    request can be sent without exceeding the maximum number of requests in any window
+    (e.g., both 50 requests per 10 seconds and 500 requests per hour), and then sleeps
+    until then. Reservations are made under a lock and in order of arrival, so that a
+    single limiter can be shared by threads and coroutines.
+
+    Parameters
+    ----------
+    rate_limits : sequence of (int, float) tuples
+        Maximum number of requests and duration of the time window (in seconds), for
+        each window.
+    name : str, optional
+        Name of the limiter (e.g., the API domain), used for logging.
+    """
+
+    def __init__(self, rate_limits: RateLimitsType, *, name: str | None = None) -> None:
+        """Initialize the rate limiter."""
+        self.rate_limits = [
+            (int(max_requests), float(period)) for max_requests, period in rate_limits
+        ]
+        self.name = name
+        # times (in `time.monotonic` seconds) of the requests in each window
+        self._request_times = [collections.deque() for _ in self.rate_limits]
+        self._last_time = float("-inf")
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Reserve a request and return how long to wait (in seconds) before it."""
+        with self._lock:
+            now = time.monotonic()
+            # requests are served in order of arrival
+            request_time = max(now, self._last_time)
+            for (max_requests, period), request_times in zip(
+                self.rate_limits, self._request_times
+            ):
+                # drop the requests that are no longer within any future window
+                while request_times and request_times[0] <= now - period:
+                    request_times.popleft()
+                if len(request_times) >= max_requests:
+                    request_time = max(
+                        request_time, request_times[-max_requests] + period
+                    )
+            for request_times in self._request_times:
+                request_times.append(request_time)
+            self._last_time = request_time
+        wait = request_time - now
+        if wait > 1:
+            utils.log(
+                f"Rate limit of {self.name or 'the API'} reached, waiting {wait:.1f} "
+                "secs",
+                level=lg.INFO,
+            )
+        return wait
+
+    def acquire(self) -> None:
+        """Block until a request can be sent."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        """Wait (without blocking the event loop) until a request can be sent."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def get_rate_limiter(
+    domain: str, rate_limits: RateLimitsType | None = None
+) -> RateLimiter | None:
+    """Get the process-wide rate limiter of a domain.
+
+    Parameters
+    ----------
+    domain : str
+        Domain of the API, e.g., "api.netatmo.com".
+    rate_limits : sequence of (int, float) tuples, optional
+        Default rate limits for the domain, i.e., maximum number of requests and
+        duration of the time window (in seconds), for each window. Overridden by
+        the value for `domain` in `settings.RATE_LIMITS` if any. Only used when the
+        limiter of the domain is first created.
+
+    Returns
+    -------
+    rate_limiter : RateLimiter or None
+        The rate limiter of the domain, or None if the domain has no rate limits.
+    """
+    with _RATE_LIMITERS_LOCK:
+        try:
+            return _RATE_LIMITERS[domain]
+        except KeyError:
+            rate_limits = settings.RATE_LIMITS.get(domain, rate_limits)
+            if not rate_limits:
+                return None
+            rate_limiter = RateLimiter(rate_limits, name=domain)
+            _RATE_LIMITERS[domain] = rate_limiter
+            return rate_limiter
+
+
+class RateLimitAdapter(HTTPAdapter):
+    """Transport adapter that waits for the domain's rate limiter before sending.
+
+    Since the adapter is only reached when the request is actually sent, responses
+    served from the cache of a `requests_cache.CachedSession` do not count against the
+    rate limits.
+
+    Parameters
+    ----------
+    rate_limits : sequence of (int, float) tuples, optional
+        Default rate limits for the domains requested through this adapter, see
+        `get_rate_limiter`.
+    **adapter_kwargs
+        Additional keyword arguments to pass to `requests.adapters.HTTPAdapter`.
+    """
+
+    def __init__(
+        self, rate_limits: RateLimitsType | None = None, **adapter_kwargs
+    ) -> None:
+        """Initialize the adapter."""
+        self.rate_limits = rate_limits
+        super().__init__(**adapter_kwargs)
+
+    def get_rate_limiter(self, url: str) -> RateLimiter | None:
+        """Get the rate limiter for the domain of `url`."""
+        return get_rate_limiter(parse.urlsplit(url).netloc, self.rate_limits)
+
+    def acquire(self, url: str) -> None:
+        """Block until a request to `url` can be sent."""
+        rate_limiter = self.get_rate_limiter(url)
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+
+    async def aacquire(self, url: str) -> None:
+        """Wait until a request to `url` can be sent."""
+        rate_limiter = self.get_rate_limiter(url)
+        if rate_limiter is not None:
+            await rate_limiter.aacquire()
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        """Send the request once allowed by the rate limiter."""
+        self.acquire(request.url)
+        return super().send(request, **kwargs)
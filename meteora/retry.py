@@ -0,0 +1,325 @@
+"""Retry policy and circuit breaker for requests to the providers' APIs."""
+
+import asyncio
+import datetime as dt
+import logging as lg
+import random
+import threading
+import time
+import warnings
+from collections.abc import Collection
+from email import utils as email_utils
+
+import requests
+
+from meteora import settings, utils
+
+__all__ = [
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "RetryPolicy",
+    "get_circuit_breaker",
+    "is_outage",
+]
+
+# process-wide circuit breakers, keyed by domain
+_CIRCUIT_BREAKERS: dict[str, "CircuitBreaker"] = {}
+_CIRCUIT_BREAKERS_LOCK = threading.Lock()
+# interval (in seconds) at which the requests waiting for the outcome of the trial
+# request of a half-open circuit check it
+_PROBE_POLL_INTERVAL = 0.1
+
+
+class CircuitOpenError(Exception):
+    """Raised when a request is not sent because the provider is considered down."""
+
+
+class RetryPolicy:
+    """Policy to retry failed requests with exponential backoff and jitter.
+
+    Parameters
+    ----------
+    max_attempts : int, optional
+        Maximum number of attempts (including the first request). If None, the value
+        from `settings.RETRY_MAX_ATTEMPTS` is used.
+    backoff_factor : float, optional
+        Pause before the first retry, in seconds, which is doubled at each subsequent
+        attempt. If None, the value from `settings.RETRY_BACKOFF_FACTOR` is used.
+    max_backoff : float, optional
+        Maximum pause between attempts, in seconds (except when the server requires a
+        longer one via the "Retry-After" header). If None, the value from
+        `settings.RETRY_MAX_BACKOFF` is used.
+    jitter : float, optional
+        Fraction of the pause that is randomized (between 0 and 1) so that concurrent
+        requests do not retry in lockstep. If None, the value from
+        `settings.RETRY_JITTER` is used.
+    status_codes : collection of int, optional
+        HTTP status codes that are retried. If None, the value from
+        `settings.RETRY_STATUS_CODES` is used.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int | None = None,
+        backoff_factor: float | None = None,
+        max_backoff: float | None = None,
+        jitter: float | None = None,
+        status_codes: Collection[int] | None = None,
+    ) -> None:
+        """Initialize the retry policy."""
+        if max_attempts is None:
+            max_attempts = settings.RETRY_MAX_ATTEMPTS
+        if backoff_factor is None:
+            if settings.ERROR_PAUSE is not None:
+                warnings.warn(
+                    "`settings.ERROR_PAUSE` is deprecated, use "
+                    "`settings.RETRY_BACKOFF_FACTOR` instead",
+                    DeprecationWarning,
+                    stacklevel=2,
+                )
+                backoff_factor = settings.ERROR_PAUSE
+            else:
+                backoff_factor = settings.RETRY_BACKOFF_FACTOR
+        if max_backoff is None:
+            max_backoff = settings.RETRY_MAX_BACKOFF
+        if jitter is None:
+            jitter = settings.RETRY_JITTER
+        if status_codes is None:
+            status_codes = settings.RETRY_STATUS_CODES
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.status_codes = set(status_codes)
+
+    def is_retryable(
+        self,
+        *,
+        response: requests.Response | None = None,
+        exception: Exception | None = None,
+    ) -> bool:
+        """Whether a failed request should be retried."""
+        if exception is not None:
+            return isinstance(exception, (requests.ConnectionError, requests.Timeout))
+        return response is not None and response.status_code in self.status_codes
+
+    def get_pause(
+        self, attempt: int, *, response: requests.Response | None = None
+    ) -> float:
+        """Get the pause (in seconds) before the next attempt.
+
+        Parameters
+        ----------
+        attempt : int
+            Number of the attempt that failed, starting at 1.
+        response : requests.Response, optional
+            Response of the failed attempt, if any. Its "Retry-After" header is
+            honoured.
+
+        Returns
+        -------
+        pause : float
+            Pause in seconds.
+        """
+        backoff = min(self.max_backoff, self.backoff_factor * 2 ** (attempt - 1))
+        pause = backoff * (1 - self.jitter * random.random())
+        if response is not None:
+            retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                pause = max(pause, retry_after)
+        return pause
+
+
+def is_outage(
+    *,
+    response: requests.Response | None = None,
+    exception: Exception | None = None,
+) -> bool:
+    """Whether a failed request indicates a provider outage.
+
+    Only connection errors, timeouts and server errors (5xx status codes) count as
+    outages, i.e., throttling (e.g., 429 'too many requests') does not.
+    """
+    if exception is not None:
+        return isinstance(exception, (requests.ConnectionError, requests.Timeout))
+    return response is not None and response.status_code >= 500
+
+
+def _parse_retry_after(retry_after: str | None) -> float | None:
+    """Parse the value of a "Retry-After" header into seconds."""
+    if retry_after is None:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_dt = email_utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_dt - dt.datetime.now(dt.timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """Circuit breaker to stop sending requests while a provider is down.
+
+    After `failure_threshold` consecutive failed requests, the circuit is opened for
+    `recovery_timeout` seconds, during which requests wait (see `acquire`). Then, a
+    single trial request is let through: the circuit is closed if it succeeds, and the
+    waiting requests are sent, whereas if it fails, the circuit is opened again and the
+    waiting requests fail with `CircuitOpenError`.
+
+    Parameters
+    ----------
+    failure_threshold : int, optional
+        Number of consecutive failures that open the circuit. If None, the value from
+        `settings.CIRCUIT_BREAKER_THRESHOLD` is used.
+    recovery_timeout : float, optional
+        Time (in seconds) during which the circuit stays open. If None, the value from
+        `settings.CIRCUIT_BREAKER_TIMEOUT` is used.
+    name : str, optional
+        Name of the circuit breaker (e.g., the API domain), used for messages.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int | None = None,
+        recovery_timeout: float | None = None,
+        *,
+        name: str | None = None,
+    ) -> None:
+        """Initialize the circuit breaker."""
+        if failure_threshold is None:
+            failure_threshold = settings.CIRCUIT_BREAKER_THRESHOLD
+        if recovery_timeout is None:
+            recovery_timeout = settings.CIRCUIT_BREAKER_TIMEOUT
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.name = name
+        self._n_failures = 0
+        self._opened_at = None
+        # time at which the trial request of the half-open circuit was let through
+        self._probe_started_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the circuit is open, i.e., no request is sent."""
+        return (
+            self._opened_at is not None
+            and time.monotonic() - self._opened_at < self.recovery_timeout
+        )
+
+    def _reserve(self, since: float) -> float:
+        """Get how long to wait (in seconds) before a request can be sent.
+
+        Returns 0 if the request can be sent, i.e., if the circuit is closed or the
+        request is the trial one of the half-open circuit, and raises
+        `CircuitOpenError` if the circuit has been opened since `since`.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            if self._opened_at >= since:
+                # the provider failed after the request was started (e.g., its trial
+                # request or its own previous attempt)
+                raise CircuitOpenError(
+                    f"{self.name or 'The API'} is failing, not sending requests for "
+                    f"{self.recovery_timeout:.0f} secs"
+                )
+            now = time.monotonic()
+            wait = self._opened_at + self.recovery_timeout - now
+            if wait > 0:
+                if wait > 1:
+                    utils.log(
+                        f"{self.name or 'The API'} is failing, waiting {wait:.1f} "
+                        "secs before a trial request",
+                        level=lg.INFO,
+                    )
+                return wait
+            if (
+                self._probe_started_at is None
+                or now - self._probe_started_at >= self.recovery_timeout
+            ):
+                # let a single trial request through (or another one if the outcome
+                # of the previous one was never recorded)
+                self._probe_started_at = now
+                return 0.0
+            return _PROBE_POLL_INTERVAL
+
+    def check(self) -> None:
+        """Raise `CircuitOpenError` if a request cannot be sent right away."""
+        if self._reserve(time.monotonic()) > 0:
+            raise CircuitOpenError(
+                f"{self.name or 'The API'} is failing, not sending requests"
+            )
+
+    def acquire(self, since: float | None = None) -> None:
+        """Block until a request can be sent.
+
+        Parameters
+        ----------
+        since : float, optional
+            Time (in `time.monotonic` seconds) at which the request was started. If the
+            circuit is opened again after it (e.g., because the trial request failed),
+            `CircuitOpenError` is raised rather than waiting. If None, the current time
+            is used.
+        """
+        if since is None:
+            since = time.monotonic()
+        while (wait := self._reserve(since)) > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, since: float | None = None) -> None:
+        """Wait (without blocking the event loop) until a request can be sent.
+
+        Coroutine version of `acquire`, see its documentation for the parameters.
+        """
+        if since is None:
+            since = time.monotonic()
+        while (wait := self._reserve(since)) > 0:
+            await asyncio.sleep(wait)
+
+    def record_success(self) -> None:
+        """Record a successful request, which closes the circuit."""
+        with self._lock:
+            self._n_failures = 0
+            self._opened_at = None
+            self._probe_started_at = None
+
+    def record_failure(self) -> None:
+        """Record a failed request, which may open the circuit."""
+        with self._lock:
+            self._n_failures += 1
+            if self._n_failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    utils.log(
+                        f"{self._n_failures} consecutive failed requests to "
+                        f"{self.name or 'the API'}, opening circuit for "
+                        f"{self.recovery_timeout} secs",
+                        level=lg.WARNING,
+                    )
+                self._opened_at = time.monotonic()
+                self._probe_started_at = None
+
+
+def get_circuit_breaker(domain: str) -> CircuitBreaker:
+    """Get the process-wide circuit breaker of a domain.
+
+    Parameters
+    ----------
+    domain : str
+        Domain of the API, e.g., "api.meteo.cat".
+
+    Returns
+    -------
+    circuit_breaker : CircuitBreaker
+        The circuit breaker of the domain.
+    """
+    with _CIRCUIT_BREAKERS_LOCK:
+        try:
+            return _CIRCUIT_BREAKERS[domain]
+        except KeyError:
+            circuit_breaker = CircuitBreaker(name=domain)
+            _CIRCUIT_BREAKERS[domain] = circuit_breaker
+            return circuit_breaker
@@ -0,0 +1,475 @@
+"""Process-wide registry of pooled HTTP sessions."""
+
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections.abc import Hashable, Iterable, Iterator, Mapping
+
+import pooch
+import requests
+import requests_cache
+import urllib3
+
+from meteora import cache as http_cache
+from meteora import rate_limit, settings
+from meteora.optional import require_optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+__all__ = [
+    "FILE_COMPRESSIONS",
+    "SessionDownloader",
+    "accept_encoding",
+    "cache_ignored_parameters",
+    "clear_sessions",
+    "compressed_fname",
+    "get_session",
+    "mount_adapter",
+    "read_validators",
+    "write_validators",
+]
+
+# sessions keyed by provider/domain and session settings, so that client instances
+# that request the same provider reuse TCP/TLS connections and cache handles
+_SESSIONS: dict[Hashable, requests.Session] = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+def cache_ignored_parameters(
+    credential_params: Iterable[str] = (),
+) -> tuple[str, ...]:
+    """Get the request parameters and headers that are left out of cache keys.
+
+    Credentials (e.g., API keys or OAuth tokens) are left out of cache keys so that
+    cached responses are shared regardless of the credentials used to request them
+    (e.g., after a key rotation or by different users). They are also redacted from the
+    cached requests. Note that the other parameters are sorted when creating cache
+    keys, so their order does not matter either.
+
+    Parameters
+    ----------
+    credential_params : iterable of str, optional
+        Names of the request parameters and/or headers that hold credentials, which
+        are added to the ones that `requests_cache` ignores by default (i.e.,
+        "Authorization", "X-API-KEY", "access_token" and "api_key").
+
+    Returns
+    -------
+    ignored_parameters : tuple of str
+        Sorted names of the ignored parameters and headers.
+    """
+    return tuple(sorted({*requests_cache.DEFAULT_IGNORED_PARAMS, *credential_params}))
+
+
+def _new_session(
+    cache: bool,
+    rate_limits: rate_limit.RateLimitsType | None,
+    credential_params: Iterable[str],
+    urls_expire_after: Mapping | None,
+) -> requests.Session:
+    if cache:
+        session = requests_cache.CachedSession(
+            cache_name=settings.CACHE_NAME,
+            backend=http_cache.get_backend(),
+            expire_after=settings.CACHE_EXPIRE,
+            urls_expire_after=urls_expire_after,
+            stale_while_revalidate=settings.CACHE_STALE_WHILE_REVALIDATE,
+            stale_if_error=settings.CACHE_STALE_IF_ERROR,
+            ignored_parameters=cache_ignored_parameters(credential_params),
+        )
+    else:
+        session = requests.Session()
+    return mount_adapter(session, rate_limits)
+
+
+def accept_encoding() -> str:
+    """Get the value of the "Accept-Encoding" header of the sessions.
+
+    Returns
+    -------
+    accept_encoding : str
+        The value from `settings.ACCEPT_ENCODING` or, if it is None, all the content
+        encodings that can be decoded, i.e., "gzip" and "deflate" plus "br" and "zstd"
+        if the `brotli` and `zstandard` packages are installed.
+    """
+    if settings.ACCEPT_ENCODING is not None:
+        return settings.ACCEPT_ENCODING
+    return ", ".join(
+        urllib3.util.make_headers(accept_encoding=True)["accept-encoding"].split(",")
+    )
+
+
+def mount_adapter(
+    session: requests.Session, rate_limits: rate_limit.RateLimitsType | None = None
+) -> requests.Session:
+    """Mount a rate-limited adapter with the configured pool sizes on `session`.
+
+    The "Accept-Encoding" header of the session is also set (see `accept_encoding`),
+    so that responses are transferred compressed.
+
+    Parameters
+    ----------
+    session : requests.Session
+        Session to mount the adapter on, for both HTTP and HTTPS requests.
+    rate_limits : sequence of (int, float) tuples, optional
+        Default rate limits of the requested domains, see
+        `meteora.rate_limit.get_rate_limiter`.
+
+    Returns
+    -------
+    session : requests.Session
+        The same session, with the adapter mounted.
+    """
+    adapter = rate_limit.RateLimitAdapter(
+        rate_limits,
+        pool_connections=settings.POOL_CONNECTIONS,
+        pool_maxsize=settings.POOL_MAXSIZE,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = accept_encoding()
+    return session
+
+
+def get_session(
+    key: Hashable,
+    *,
+    cache: bool | None = None,
+    rate_limits: rate_limit.RateLimitsType | None = None,
+    credential_params: Iterable[str] = (),
+    urls_expire_after: Mapping | None = None,
+) -> requests.Session:
+    """Get the pooled session for a provider.
+
+    The first call for a given key (and session settings) creates the session, and
+    subsequent calls return the same session, so that all the clients of the provider
+    share its connection pool and cache handle.
+
+    Parameters
+    ----------
+    key : hashable
+        Key of the provider, e.g., the domain of its API.
+    cache : bool, optional
+        Whether the session caches responses. If None, the value from
+        `settings.USE_CACHE` is used.
+    rate_limits : sequence of (int, float) tuples, optional
+        Default rate limits of the provider, see `meteora.rate_limit.get_rate_limiter`.
+        Only used when the session is first created.
+    credential_params : iterable of str, optional
+        Names of the request parameters and/or headers that hold the provider's
+        credentials, which are left out of cache keys (see `cache_ignored_parameters`).
+    urls_expire_after : mapping, optional
+        Expiration of the cached responses by URL pattern, which takes precedence over
+        `settings.CACHE_EXPIRE`. The first pattern that matches a URL applies, see the
+        `urls_expire_after` argument of `requests_cache.CachedSession`.
+
+    Returns
+    -------
+    session : requests.Session
+        The pooled session, a `requests_cache.CachedSession` if `cache` is True.
+    """
+    if cache is None:
+        cache = settings.USE_CACHE
+    # include the settings that the session depends on in the key, so that changing
+    # them at runtime results in new sessions
+    session_key = (
+        key,
+        cache,
+        settings.POOL_CONNECTIONS,
+        settings.POOL_MAXSIZE,
+        settings.ACCEPT_ENCODING,
+    )
+    if cache:
+        session_key += (
+            settings.CACHE_NAME,
+            settings.CACHE_BACKEND,
+            settings.CACHE_EXPIRE,
+            settings.CACHE_STALE_WHILE_REVALIDATE,
+            settings.CACHE_STALE_IF_ERROR,
+            settings.CACHE_MAX_DB_BODY_SIZE,
+            settings.CACHE_COMPRESS_DB_BODIES,
+            cache_ignored_parameters(credential_params),
+            tuple((urls_expire_after or {}).items()),
+        )
+    with _SESSIONS_LOCK:
+        try:
+            return _SESSIONS[session_key]
+        except KeyError:
+            session = _new_session(
+                cache, rate_limits, credential_params, urls_expire_after
+            )
+            _SESSIONS[session_key] = session
+            return session
+
+
+def clear_sessions() -> None:
+    """Close and drop all the pooled sessions (and clear the in-memory cache tier)."""
+    with _SESSIONS_LOCK:
+        for session in _SESSIONS.values():
+            session.close()
+        _SESSIONS.clear()
+    http_cache.clear_memory_cache()
+
+
+# suffix of the (compressed) downloaded files for each compression, from which
+# `pandas.read_csv` infers how to decompress them
+FILE_COMPRESSIONS = {"gzip": ".gz", "zstd": ".zst"}
+# compression level of the downloaded files
+FILE_COMPRESS_LEVEL = 6
+
+
+def _check_compression(compression: str) -> None:
+    if compression not in FILE_COMPRESSIONS:
+        raise ValueError(
+            f"Unknown compression '{compression}'. Must be one of "
+            f"{list(FILE_COMPRESSIONS)}."
+        )
+
+
+def compressed_fname(fname: str, compression: str) -> str:
+    """Get the name of a downloaded file when stored with `compression`.
+
+    Parameters
+    ----------
+    fname : str
+        Name of the (uncompressed) file.
+    compression : {"gzip", "zstd"}
+        Compression of the file.
+
+    Returns
+    -------
+    fname : str
+        The name with the suffix of the compression, so that compressed and
+        uncompressed files do not clash and `pandas.read_csv` can infer how to
+        decompress them.
+    """
+    _check_compression(compression)
+    return f"{fname}{FILE_COMPRESSIONS[compression]}"
+
+
+@contextlib.contextmanager
+def _compressed_writer(dst, compression: str | None) -> Iterator:
+    """Wrap a binary file-like object so that the written data is compressed."""
+    if compression is None:
+        yield dst
+    elif compression == "gzip":
+        with gzip.GzipFile(
+            fileobj=dst, mode="wb", compresslevel=FILE_COMPRESS_LEVEL, mtime=0
+        ) as writer:
+            yield writer
+    elif compression == "zstd":
+        require_optional(
+            {"zstandard": zstandard},
+            extra="zstd",
+            feature="Zstandard compression of downloaded files",
+        )
+        with zstandard.ZstdCompressor(level=FILE_COMPRESS_LEVEL).stream_writer(
+            dst, closefd=False
+        ) as writer:
+            yield writer
+    else:
+        _check_compression(compression)
+
+
+# validators of the downloaded files are stored next to them, in a JSON file with the
+# following suffix
+VALIDATORS_SUFFIX = ".validators.json"
+_VALIDATOR_HEADERS = {"ETag": "If-None-Match", "Last-Modified": "If-Modified-Since"}
+
+
+def _get_validators(response: requests.Response) -> dict:
+    return {
+        header: response.headers[header]
+        for header in _VALIDATOR_HEADERS
+        if header in response.headers
+    }
+
+
+def read_validators(filepath: str | os.PathLike) -> dict | None:
+    """Read the validators stored next to a downloaded file.
+
+    Parameters
+    ----------
+    filepath : str or path-like
+        Path to the downloaded file.
+
+    Returns
+    -------
+    validators : dict or None
+        The "ETag" and/or "Last-Modified" headers of the response from which the file
+        was downloaded, or None if no validators are stored for the file.
+    """
+    try:
+        with open(f"{filepath}{VALIDATORS_SUFFIX}") as src:
+            return json.load(src)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def write_validators(filepath: str | os.PathLike, validators: Mapping | None) -> None:
+    """Store (or, if `validators` is None, remove) the validators of a downloaded file.
+
+    Parameters
+    ----------
+    filepath : str or path-like
+        Path to the downloaded file.
+    validators : mapping or None
+        The "ETag" and/or "Last-Modified" headers of the response from which the file
+        was downloaded.
+    """
+    validators_filepath = f"{filepath}{VALIDATORS_SUFFIX}"
+    if validators is None:
+        try:
+            os.remove(validators_filepath)
+        except FileNotFoundError:
+            pass
+        return
+    with open(validators_filepath, "w") as dst:
+        json.dump(dict(validators), dst)
+
+
+class SessionDownloader:
+    """Pooch downloader that streams files through a (pooled) session.
+
+    Unlike pooch's default `pooch.HTTPDownloader`, which uses `requests.get`, the
+    connections of the session are kept alive across downloads. The validators (i.e.,
+    "ETag" and "Last-Modified" headers) of the last download are kept in the
+    `validators` attribute, so that files that change over time can be revalidated
+    with conditional requests (see `revalidate`).
+
+    Parameters
+    ----------
+    session : requests.Session
+        Session used to download the files.
+    chunk_size : int, optional
+        Size (in bytes) of the chunks written to the output file. If None, the value
+        from `settings.DOWNLOAD_CHUNK_SIZE` is used.
+    compression : {"gzip", "zstd"}, optional
+        Compression of the written files, which are otherwise written as downloaded.
+    known_hash : str, optional
+        Known hash of the downloaded content, in the format of `pooch.retrieve` (i.e.,
+        with an optional "alg:" prefix). Since the hash of compressed files does not
+        match it, the content is hashed (before compression) as it is downloaded and a
+        `ValueError` is raised if it does not match.
+    **request_kwargs
+        Additional keyword arguments to pass to `session.get`.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        *,
+        chunk_size: int | None = None,
+        compression: str | None = None,
+        known_hash: str | None = None,
+        **request_kwargs,
+    ) -> None:
+        """Initialize the downloader."""
+        if chunk_size is None:
+            chunk_size = settings.DOWNLOAD_CHUNK_SIZE
+        if compression is not None:
+            _check_compression(compression)
+        self.session = session
+        self.chunk_size = chunk_size
+        self.compression = compression
+        self.known_hash = known_hash
+        self.request_kwargs = request_kwargs
+        self.validators = {}
+
+    def __call__(self, url: str, output_file, pooch, check_only: bool = False):
+        """Download `url` to `output_file` (a path or a binary file-like object)."""
+        if check_only:
+            response = self.session.head(
+                url, allow_redirects=True, **self.request_kwargs
+            )
+            return response.status_code == 200
+
+        with self.session.get(url, stream=True, **self.request_kwargs) as response:
+            response.raise_for_status()
+            self.validators = _get_validators(response)
+            if hasattr(output_file, "write"):
+                self._write(response, output_file)
+            else:
+                with open(output_file, "w+b") as dst:
+                    self._write(response, dst)
+        return None
+
+    def _write(
+        self, response: requests.Response, dst, *, check_hash: bool = True
+    ) -> None:
+        hasher = None
+        if check_hash and self.known_hash is not None:
+            hasher = hashlib.new(pooch.hashes.hash_algorithm(self.known_hash))
+        with _compressed_writer(dst, self.compression) as writer:
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                if chunk:
+                    writer.write(chunk)
+                    if hasher is not None:
+                        hasher.update(chunk)
+        if hasher is not None:
+            new_hash = hasher.hexdigest()
+            if new_hash.lower() != self.known_hash.split(":")[-1].lower():
+                raise ValueError(
+                    f"{hasher.name.upper()} hash of downloaded file ({response.url}) "
+                    f"does not match the known hash: expected {self.known_hash} but "
+                    f"got {new_hash}."
+                )
+
+    def revalidate(self, url: str, filepath: str | os.PathLike) -> bool:
+        """Revalidate a downloaded file, replacing it if it changed on the server.
+
+        A conditional request is sent with the validators stored next to the file (see
+        `read_validators`), so that the file is only downloaded again if the server
+        does not reply with "304 Not Modified". If no validators are stored, the file
+        is downloaded again unconditionally. The updated file atomically replaces the
+        previous one.
+
+        Parameters
+        ----------
+        url : str
+            URL of the file.
+        filepath : str or path-like
+            Path to the downloaded file.
+
+        Returns
+        -------
+        modified : bool
+            Whether the file was downloaded again.
+        """
+        validators = read_validators(filepath) or {}
+        request_kwargs = self.request_kwargs.copy()
+        headers = dict(request_kwargs.pop("headers", None) or {})
+        headers.update(
+            {
+                _VALIDATOR_HEADERS[header]: value
+                for header, value in validators.items()
+                if header in _VALIDATOR_HEADERS
+            }
+        )
+        with self.session.get(
+            url, stream=True, headers=headers, **request_kwargs
+        ) as response:
+            if response.status_code == 304:
+                self.validators = validators
+                return False
+            response.raise_for_status()
+            self.validators = _get_validators(response)
+            # write to a temporary file in the same directory and then move it, so
+            # that readers never see a partially-written file
+            fd, tmp_filepath = tempfile.mkstemp(dir=os.path.dirname(filepath))
+            try:
+                with os.fdopen(fd, "w+b") as dst:
+                    # the file may have changed, so its hash is not checked
+                    self._write(response, dst, check_hash=False)
+                os.replace(tmp_filepath, filepath)
+            except BaseException:
+                os.remove(tmp_filepath)
+                raise
+        return True
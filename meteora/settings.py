@@ -69,15 +69,109 @@ HEATWAVE_INTER_STATION_AGG_FUNC = "mean"
 ## progress
 SHOW_PROGRESS = True
 
+## concurrency
+# partitions of the time series requests are fetched one after the other by default,
+# concurrency is opt-in (e.g., "thread" runs up to `MAX_WORKERS` concurrent requests per
+# client, which may exceed the rate limits of some providers)
+EXECUTOR = "serial"  # or "thread", "process", "dask"
+MAX_WORKERS = 8
+ASYNC_MAX_CONCURRENCY = 16  # concurrent requests in `aget_ts_df`
+
 REQUEST_KWARGS = {}
+# connection pools of the sessions shared by the clients of each provider: number of
+# hosts to keep pools for and maximum number of connections per host (which should be
+# at least the number of concurrent workers, i.e., `MAX_WORKERS`)
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 16
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # bytes
+# "Accept-Encoding" header of the requests. If None, all the content encodings that can
+# be decoded are accepted, i.e., "gzip" and "deflate" plus "br" and "zstd" if the
+# `brotli` and `zstandard` packages are installed (see `meteora.sessions`)
+ACCEPT_ENCODING = None
+# parse text (e.g., CSV) responses while they are read from the connection, rather than
+# decoding the whole body into a string first
+STREAM_TEXT_RESPONSES = True
+# engine used to parse the CSV files and responses of the time series, either "pandas"
+# or "pyarrow" (multi-threaded, requires the `pyarrow` package), following the schema of
+# each client (see `meteora.parsing.read_csv`)
+CSV_ENGINE = "pandas"
+# maximum number of requests and time window (in seconds) for each quota, by domain
+# (e.g., `{"api.netatmo.com": [(50, 10), (500, 3600)]}`), overriding the clients' own
+# rate limits
+RATE_LIMITS = {}
 # PAUSE = 1
-ERROR_PAUSE = 60
+## retries
+RETRY_MAX_ATTEMPTS = 5
+RETRY_BACKOFF_FACTOR = 1  # pause (in seconds) before the first retry, then doubled
+RETRY_MAX_BACKOFF = 60
+RETRY_JITTER = 0.5
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# deprecated alias of `RETRY_BACKOFF_FACTOR`, used instead if not None
+ERROR_PAUSE = None
+# consecutive outages (connection errors or 5xx status codes) after which requests to a
+# domain wait (for the given number of seconds) for a single trial request
+CIRCUIT_BREAKER_THRESHOLD = 5
+CIRCUIT_BREAKER_TIMEOUT = 60
 # TIMEOUT = 180
 ## cache
 USE_CACHE = True
+# serve requests and files only from the caches, i.e., never access the network (the
+# data that is not cached raises `meteora.cache.CacheMissError`)
+OFFLINE = False
+# whether the files that are downloaded into memory rather than cached with pooch are
+# stored in the HTTP cache (yet revalidated on every download), so that they can be
+# served in offline mode
+CACHE_DOWNLOADED_FILES = False
 CACHE_NAME = "meteora-cache"
+# opt-in "hybrid" is a SQLite database that stores large response bodies in compressed
+# files (see `meteora.cache.HybridCache`), other values are passed to `requests_cache`
 CACHE_BACKEND = "sqlite"
 CACHE_EXPIRE = requests_cache.NEVER_EXPIRE
+# expiration of the cached responses of each kind of endpoint, which clients can
+# override (see `meteora.clients.base.BaseClient`). None falls back to `CACHE_EXPIRE`.
+# The live time series (and the non-final files, e.g., the data of the current period)
+# are revalidated on every request by default, and at most once every
+# `CACHE_EXPIRE_LIVE_TS` otherwise
+CACHE_EXPIRE_STATIONS = None
+CACHE_EXPIRE_VARIABLES = None
+CACHE_EXPIRE_HISTORICAL_TS = None
+CACHE_EXPIRE_LIVE_TS = requests_cache.EXPIRE_IMMEDIATELY
+# opt-in serving of expired cached responses, either right away while they are refreshed
+# in the background (stale-while-revalidate) or when the request fails (stale-if-error).
+# Each can be True or the maximum time (in seconds) since expiration. Stale responses
+# are reported in the `"stale"` attribute of the time series data frames
+CACHE_STALE_WHILE_REVALIDATE = False
+CACHE_STALE_IF_ERROR = False
+CACHE_MAX_DB_BODY_SIZE = 256 * 1024  # bytes, larger bodies are stored in files
+# whether the response bodies stored in the database are gzip-compressed (the larger
+# ones stored in files always are)
+CACHE_COMPRESS_DB_BODIES = True
+# compression of the cached downloaded files (e.g., CSV), either "gzip", "zstd"
+# (requires the `zstandard` package) or None
+CACHE_FILE_COMPRESSION = None
+# budgets of the HTTP cache and the pooch files together, enforced by evicting the least
+# recently ("lru") or frequently ("lfu") used entries that are not pinned (see
+# `meteora.cache.prune`), at most once every `CACHE_PRUNE_INTERVAL` seconds. The
+# accesses to the entries are only recorded (in the "<CACHE_NAME>-index.sqlite"
+# database) when a budget is set
+CACHE_MAX_SIZE = None  # bytes
+CACHE_MAX_AGE = None  # seconds since the last access
+CACHE_EVICTION_POLICY = "lru"
+CACHE_PRUNE_INTERVAL = 600
+# expiration of the records of the time series partitions that have no data (e.g.,
+# station-years without file), which are skipped until then (see
+# `meteora.cache.record_nodata`). None never expires and 0 disables the negative cache
+CACHE_NODATA_EXPIRE = 30 * 24 * 60 * 60  # seconds
+# budget of the in-process LRU tier of decoded cached responses in front of the HTTP
+# cache (see `meteora.cache.MemoryCache`), 0 or None disables it
+CACHE_MEMORY_MAX_SIZE = 64 * 1024 * 1024  # bytes
+# maximum size of the responses kept in the in-process tier, so that a few large ones do
+# not evict all the others
+CACHE_MEMORY_MAX_ENTRY_SIZE = 4 * 1024 * 1024  # bytes
+# whether the data frames parsed from the cached time series partitions are cached as
+# Parquet files (requires the `pyarrow` package), keyed by the client, the partition and
+# the validator of the cached source (see `meteora.cache.read_parsed`)
+CACHE_PARSED_PARTITIONS = False
 
 ## logging
 LOG_CONSOLE = False
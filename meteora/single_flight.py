@@ -0,0 +1,153 @@
+"""Deduplication of concurrent identical calls (e.g., requests or downloads)."""
+
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable, Hashable, Sequence
+from typing import Any
+
+__all__ = ["SingleFlight"]
+
+ShareType = Callable[[Any, int], Sequence]
+
+
+class _Call:
+    """In-flight call and the callers that wait for its result."""
+
+    def __init__(self) -> None:
+        self.n_callers = 1
+        self.results = None
+        self.exception = None
+        self.done = threading.Event()
+        self.task = None
+
+
+def _share(result: Any, n_callers: int, share: ShareType | None) -> Sequence:
+    if n_callers > 1 and share is not None:
+        return share(result, n_callers)
+    return [result] * n_callers
+
+
+class SingleFlight:
+    """Group of calls in which concurrent calls with the same key are merged.
+
+    While a call for a given key is in flight, subsequent calls with the same key (from
+    other threads with `do`, or other tasks of the same event loop with `ado`) do not
+    run the function but wait for the in-flight call and get its result (or exception).
+    Once the call is done, the key is released, i.e., the next call runs the function
+    again (results are not cached).
+
+    Results that cannot be used by several callers at once (e.g., streams) can be
+    shared by means of the `share` argument of `do` and `ado`, i.e., a function that
+    takes the result and the number of callers and returns one result for each caller.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the group."""
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key: Hashable) -> tuple[_Call, int]:
+        """Get the in-flight call for `key` (or a new one) and the caller's index."""
+        with self._lock:
+            try:
+                call = self._calls[key]
+            except KeyError:
+                call = _Call()
+                self._calls[key] = call
+                return call, 0
+            call.n_callers += 1
+            return call, call.n_callers - 1
+
+    def _release(self, key: Hashable) -> int:
+        """Release `key` and return the number of callers of its call."""
+        with self._lock:
+            return self._calls.pop(key).n_callers
+
+    def do(
+        self,
+        key: Hashable,
+        func: Callable,
+        *args,
+        share: ShareType | None = None,
+        **kwargs,
+    ) -> Any:
+        """Call `func(*args, **kwargs)` unless a call with the same key is in flight.
+
+        Parameters
+        ----------
+        key : hashable
+            Key identifying the call, e.g., the URL and parameters of a request.
+        func : callable
+            Function to call.
+        *args, **kwargs
+            Positional and keyword arguments to pass to `func`.
+        share : callable, optional
+            Function that takes the result and the number of callers and returns one
+            result for each caller. If None, all the callers get the same object.
+
+        Returns
+        -------
+        result
+            The result of the call.
+        """
+        call, index = self._join(key)
+        if index > 0:
+            call.done.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.results[index]
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as exc:
+            call.exception = exc
+            self._release(key)
+            call.done.set()
+            raise
+        try:
+            call.results = _share(result, self._release(key), share)
+        except BaseException as exc:
+            call.exception = exc
+            raise
+        finally:
+            call.done.set()
+        return call.results[0]
+
+    async def ado(
+        self,
+        key: Hashable,
+        func: Callable[..., Awaitable],
+        *args,
+        share: ShareType | None = None,
+        **kwargs,
+    ) -> Any:
+        """Await `func(*args, **kwargs)` unless a call with the same key is in flight.
+
+        Coroutine version of `do`, see its documentation for the parameters. The
+        in-flight call runs in its own task, so that cancelling one of the callers
+        does not cancel the call for the others.
+        """
+        # the tasks of different event loops cannot be awaited from one another
+        key = (id(asyncio.get_running_loop()), key)
+        call, index = self._join(key)
+        if index == 0:
+
+            def _on_done(task: asyncio.Task) -> None:
+                n_callers = self._release(key)
+                if task.cancelled():
+                    call.exception = asyncio.CancelledError()
+                elif task.exception() is not None:
+                    call.exception = task.exception()
+                else:
+                    try:
+                        call.results = _share(task.result(), n_callers, share)
+                    except Exception as exc:
+                        call.exception = exc
+
+            # the callback runs before the callers awaiting the task are resumed
+            call.task = asyncio.ensure_future(func(*args, **kwargs))
+            call.task.add_done_callback(_on_done)
+        await asyncio.wait([call.task])
+        if call.exception is not None:
+            raise call.exception
+        return call.results[index]
@@ -0,0 +1,477 @@
+"""Local store of time series data frames in a partitioned Parquet dataset.
+
+The store is a Hive-partitioned Parquet dataset laid out by provider, station and year,
+i.e., `<path>/provider=<provider>/station=<station>/year=<year>/part-<uuid>.parquet`,
+where each file holds the long form time series data frame (as returned by the
+clients' `get_ts_df`) of a station and year. Next to the data, a manifest of each
+provider (`_manifest.json`, which Parquet readers ignore) lists the committed files and
+the time intervals that have been synced for each station and variable, so that the
+clients can fetch only the missing gaps (see `BaseClient.sync`). Appends are atomic:
+the data files are written under hidden names, then renamed and finally committed by
+replacing the manifest, and only the committed files are read.
+"""
+
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import uuid
+from collections.abc import Iterable, Mapping, Sequence
+from urllib import parse
+
+import numpy as np
+import pandas as pd
+
+from meteora import query, settings, utils
+from meteora.optional import require_optional
+from meteora.utils import DateTimeType
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+__all__ = ["ParquetStore", "merge_intervals"]
+
+MANIFEST_FILENAME = "_manifest.json"
+
+IntervalType = tuple[pd.Timestamp, pd.Timestamp]
+
+# appends to the same store are serialized within the process
+_LOCKS: dict[str, threading.Lock] = {}
+_LOCKS_LOCK = threading.Lock()
+
+
+def _get_lock(path: str) -> threading.Lock:
+    with _LOCKS_LOCK:
+        return _LOCKS.setdefault(path, threading.Lock())
+
+
+def _timestamp(value: DateTimeType) -> pd.Timestamp:
+    """Timestamp in which tz-aware values are converted to naive UTC times."""
+    value = pd.Timestamp(value)
+    if value.tz is not None:
+        value = value.tz_convert("UTC").tz_localize(None)
+    return value
+
+
+def _time_index(ts_df: pd.DataFrame) -> pd.DatetimeIndex:
+    """Naive time index of a time series data frame (see `_timestamp`)."""
+    time_index = pd.DatetimeIndex(ts_df.index.get_level_values(settings.TIME_COL))
+    if time_index.tz is not None:
+        time_index = time_index.tz_convert("UTC").tz_localize(None)
+    return time_index
+
+
+def merge_intervals(intervals: Iterable[IntervalType]) -> list[IntervalType]:
+    """Merge the overlapping (or contiguous) closed intervals."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _record_intervals(
+    manifest: dict,
+    intervals: Mapping,
+    stations: Iterable,
+    variables: Sequence[str],
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+) -> None:
+    """Record [start, end] as synced for the stations and variables of a manifest."""
+    for station in map(str, stations):
+        station_intervals = manifest["intervals"].setdefault(station, {})
+        for variable in variables:
+            station_intervals[variable] = [
+                [interval_start.isoformat(), interval_end.isoformat()]
+                for interval_start, interval_end in merge_intervals(
+                    [*intervals.get(station, {}).get(variable, []), (start, end)]
+                )
+            ]
+
+
+def _subtract_intervals(
+    start: pd.Timestamp, end: pd.Timestamp, intervals: Iterable[IntervalType]
+) -> list[IntervalType]:
+    """Get the parts of the closed interval [start, end] not covered by `intervals`.
+
+    The gaps are closed too, i.e., they share their bounds with the covered intervals.
+    """
+    gaps = []
+    for interval_start, interval_end in merge_intervals(intervals):
+        if interval_end < start:
+            continue
+        if interval_start > end:
+            break
+        if interval_start > start:
+            gaps.append((start, interval_start))
+        start = max(start, interval_end)
+        if start >= end:
+            return gaps
+    gaps.append((start, end))
+    return gaps
+
+
+def _covered(
+    time_index: pd.DatetimeIndex, intervals: Iterable[IntervalType]
+) -> np.ndarray:
+    """Mask of the times that are within any of the closed intervals."""
+    mask = np.zeros(len(time_index), dtype=bool)
+    for start, end in intervals:
+        mask |= (time_index >= start) & (time_index <= end)
+    return mask
+
+
+class ParquetStore:
+    """Partitioned Parquet store of time series data frames.
+
+    Parameters
+    ----------
+    path : str or path-like
+        Root directory of the store, which is created if needed.
+    """
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        """Initialize the store."""
+        require_optional(
+            {"pyarrow": pyarrow}, extra="parquet", feature="The Parquet store"
+        )
+        self.path = os.path.abspath(path)
+        os.makedirs(self.path, exist_ok=True)
+
+    def _provider_dir(self, provider: str) -> str:
+        return os.path.join(self.path, f"provider={parse.quote(provider, safe='')}")
+
+    def _read_manifest(self, provider: str) -> dict:
+        try:
+            with open(
+                os.path.join(self._provider_dir(provider), MANIFEST_FILENAME)
+            ) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"files": [], "intervals": {}, "units": {}}
+
+    def _write_manifest(self, provider: str, manifest: Mapping) -> None:
+        provider_dir = self._provider_dir(provider)
+        os.makedirs(provider_dir, exist_ok=True)
+        fd, tmp_filepath = tempfile.mkstemp(dir=provider_dir, prefix=".manifest-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(manifest, f)
+            os.replace(tmp_filepath, os.path.join(provider_dir, MANIFEST_FILENAME))
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp_filepath)
+            raise
+
+    def intervals(self, provider: str) -> dict[str, dict[str, list[IntervalType]]]:
+        """Get the synced time intervals of a provider.
+
+        Parameters
+        ----------
+        provider : str
+            Name of the provider.
+
+        Returns
+        -------
+        intervals : dict
+            Mapping of each station (as a string) to a mapping of each variable to its
+            list of (start, end) synced time intervals, which are closed and sorted.
+        """
+        return {
+            station: {
+                variable: [
+                    (pd.Timestamp(start), pd.Timestamp(end))
+                    for start, end in variable_intervals
+                ]
+                for variable, variable_intervals in station_intervals.items()
+            }
+            for station, station_intervals in self._read_manifest(provider)[
+                "intervals"
+            ].items()
+        }
+
+    def gaps(
+        self,
+        provider: str,
+        stations: Iterable,
+        variables: Iterable[str],
+        start: DateTimeType,
+        end: DateTimeType,
+    ) -> dict[str, list[IntervalType]]:
+        """Get the time intervals that have not been synced for each station.
+
+        Parameters
+        ----------
+        provider : str
+            Name of the provider.
+        stations : iterable
+            Station identifiers.
+        variables : iterable of str
+            Variables, i.e., columns of the time series data frames.
+        start, end : datetime-like, str, int, float
+            Values representing the start and end of the requested period.
+
+        Returns
+        -------
+        gaps : dict
+            Mapping of each station (as a string) with gaps to the list of (start, end)
+            closed time intervals missing for any of the variables.
+        """
+        start = _timestamp(start)
+        end = _timestamp(end)
+        intervals = self.intervals(provider)
+        gaps = {}
+        for station in map(str, stations):
+            station_intervals = intervals.get(station, {})
+            station_gaps = merge_intervals(
+                gap
+                for variable in variables
+                for gap in _subtract_intervals(
+                    start, end, station_intervals.get(variable, [])
+                )
+            )
+            if station_gaps:
+                gaps[station] = station_gaps
+        return gaps
+
+    def append(
+        self,
+        provider: str,
+        ts_df: pd.DataFrame,
+        start: DateTimeType,
+        end: DateTimeType,
+        *,
+        stations: Iterable | None = None,
+    ) -> pd.DataFrame:
+        """Append a time series data frame and record the period as synced.
+
+        Only the values that are within [start, end] and not synced yet (for their
+        station and variable) are written, so that appending overlapping data frames
+        does not duplicate data. The period is recorded as synced for all the
+        `stations` and the variables (columns) of the data frame up to its last
+        timestamp, since later data may not be published yet. If the data frame has no
+        data within [start, end], the period is recorded as synced for `stations` up to
+        `end` (or up to now if `end` is in the future), i.e., the stations are
+        considered to have no data for it, unless `stations` is None.
+
+        Parameters
+        ----------
+        provider : str
+            Name of the provider.
+        ts_df : pandas.DataFrame
+            Long form data frame with a time series of measurements (second-level
+            index) at each station (first-level index) for each variable (column).
+        start, end : datetime-like, str, int, float
+            Values representing the start and end of the period of `ts_df`.
+        stations : iterable, optional
+            Stations for which the period is recorded as synced, e.g., all the
+            stations requested, including those without data. If None, the stations of
+            `ts_df` are used.
+
+        Returns
+        -------
+        appended_df : pandas.DataFrame
+            The data that has been written.
+        """
+        start = _timestamp(start)
+        end = _timestamp(end)
+        variables = [str(column) for column in ts_df.columns]
+        with _get_lock(self.path):
+            manifest = self._read_manifest(provider)
+            intervals = self.intervals(provider)
+            time_index = _time_index(ts_df)
+            ts_df = ts_df[(time_index >= start) & (time_index <= end)]
+            if ts_df.empty:
+                # the stations have no data for the period, which is recorded as synced
+                # (up to now if `end` is in the future) so that it is not fetched again
+                synced_end = min(end, _timestamp(pd.Timestamp.now(tz="UTC")))
+                if stations is not None and synced_end >= start:
+                    _record_intervals(
+                        manifest, intervals, stations, variables, start, synced_end
+                    )
+                    self._write_manifest(provider, manifest)
+                return ts_df
+            time_index = _time_index(ts_df)
+            station_ser = ts_df.index.get_level_values(settings.STATIONS_ID_COL)
+            synced_end = time_index.max()
+            # mask the values of the periods that are already synced
+            ts_df = ts_df.copy()
+            for station in station_ser.unique():
+                station_mask = station_ser == station
+                station_intervals = intervals.get(str(station), {})
+                for column, variable in zip(ts_df.columns, variables):
+                    covered = _covered(
+                        time_index[station_mask], station_intervals.get(variable, [])
+                    )
+                    if covered.any():
+                        ts_df.loc[station_mask, column] = ts_df.loc[
+                            station_mask, column
+                        ].where(~covered)
+            ts_df = ts_df.dropna(how="all")
+
+            # write the data files, one per station and year
+            provider_dir = self._provider_dir(provider)
+            tmp_filepaths = {}
+            try:
+                for (station, year), partition_df in ts_df.groupby(
+                    [
+                        ts_df.index.get_level_values(settings.STATIONS_ID_COL),
+                        _time_index(ts_df).year,
+                    ]
+                ):
+                    partition_dir = os.path.join(
+                        f"station={parse.quote(str(station), safe='')}",
+                        f"year={year}",
+                    )
+                    os.makedirs(
+                        os.path.join(provider_dir, partition_dir), exist_ok=True
+                    )
+                    filename = f"part-{uuid.uuid4().hex}.parquet"
+                    # hidden files are ignored by Parquet readers until renamed
+                    tmp_filepath = os.path.join(
+                        provider_dir, partition_dir, f".{filename}"
+                    )
+                    partition_df.to_parquet(tmp_filepath, engine="pyarrow")
+                    tmp_filepaths[os.path.join(partition_dir, filename)] = tmp_filepath
+            except BaseException:
+                for tmp_filepath in tmp_filepaths.values():
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(tmp_filepath)
+                raise
+            for filepath, tmp_filepath in tmp_filepaths.items():
+                os.replace(tmp_filepath, os.path.join(provider_dir, filepath))
+
+            # commit
+            if stations is None:
+                stations = station_ser.unique()
+            _record_intervals(
+                manifest, intervals, stations, variables, start, synced_end
+            )
+            manifest["files"] += list(tmp_filepaths)
+            manifest["units"].update(ts_df.attrs.get("units", {}))
+            self._write_manifest(provider, manifest)
+        utils.log(
+            f"Appended {len(ts_df)} rows in {len(tmp_filepaths)} files to the "
+            f"'{provider}' data of the store at '{self.path}'."
+        )
+        return ts_df
+
+    def read(
+        self,
+        provider: str,
+        *,
+        stations: Sequence | None = None,
+        variables: Sequence[str] | None = None,
+        start: DateTimeType | None = None,
+        end: DateTimeType | None = None,
+    ) -> pd.DataFrame:
+        """Read the stored time series data frame of a provider.
+
+        Parameters
+        ----------
+        provider : str
+            Name of the provider.
+        stations : list-like, optional
+            Stations to read. If None, all the stations are read.
+        variables : list-like of str, optional
+            Variables (columns) to read. If None, all the variables are read.
+        start, end : datetime-like, str, int, float, optional
+            Values representing the start and end of the period to read. If None, the
+            period is not bounded.
+
+        Returns
+        -------
+        ts_df : pandas.DataFrame
+            Long form data frame with a time series of measurements (second-level index)
+            at each station (first-level index) for each variable (column), with the
+            units in `attrs["units"]`.
+        """
+        manifest = self._read_manifest(provider)
+        start = None if start is None else _timestamp(start)
+        end = None if end is None else _timestamp(end)
+        if stations is not None:
+            station_dirs = {
+                f"station={parse.quote(str(station), safe='')}" for station in stations
+            }
+        filepaths = []
+        for filepath in manifest["files"]:
+            station_dir, year_dir, _ = filepath.split(os.sep)
+            year = int(year_dir.split("=", 1)[1])
+            # prune the partitions by station and year
+            if (
+                stations is not None
+                and station_dir not in station_dirs
+                or start is not None
+                and year < start.year
+                or end is not None
+                and year > end.year
+            ):
+                continue
+            filepaths.append(os.path.join(self._provider_dir(provider), filepath))
+        if not filepaths:
+            return pd.DataFrame(columns=variables)
+        # only the committed files are read, with the filters pushed down
+        ts_df = query.query(
+            filepaths, stations=stations, variables=variables, start=start, end=end
+        )
+        ts_df.attrs = {
+            "units": {
+                column: unit
+                for column, unit in manifest["units"].items()
+                if column in ts_df.columns
+            }
+        }
+        return ts_df
+
+    def compact(self, provider: str) -> None:
+        """Merge the files of each station and year of a provider into a single one.
+
+        Parameters
+        ----------
+        provider : str
+            Name of the provider.
+        """
+        with _get_lock(self.path):
+            manifest = self._read_manifest(provider)
+            provider_dir = self._provider_dir(provider)
+            partition_filepaths = {}
+            for filepath in manifest["files"]:
+                partition_filepaths.setdefault(os.path.dirname(filepath), []).append(
+                    filepath
+                )
+            files = []
+            replaced_filepaths = []
+            for partition_dir, filepaths in partition_filepaths.items():
+                if len(filepaths) == 1:
+                    files += filepaths
+                    continue
+                partition_df = pd.concat(
+                    [
+                        pd.read_parquet(
+                            os.path.join(provider_dir, filepath), engine="pyarrow"
+                        )
+                        for filepath in filepaths
+                    ]
+                )
+                if partition_df.index.has_duplicates:
+                    partition_df = partition_df.groupby(level=[0, 1]).first()
+                filename = f"part-{uuid.uuid4().hex}.parquet"
+                tmp_filepath = os.path.join(provider_dir, partition_dir, f".{filename}")
+                partition_df.sort_index().to_parquet(tmp_filepath, engine="pyarrow")
+                os.replace(
+                    tmp_filepath, os.path.join(provider_dir, partition_dir, filename)
+                )
+                files.append(os.path.join(partition_dir, filename))
+                replaced_filepaths += filepaths
+            manifest["files"] = files
+            self._write_manifest(provider, manifest)
+            # the replaced files are removed once they are no longer committed
+            for filepath in replaced_filepaths:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(os.path.join(provider_dir, filepath))
@@ -33,9 +33,15 @@ def attach_units(ts_df: pd.DataFrame, units_map: Mapping) -> pd.DataFrame:
         Copy of the input data frame with units metadata in ``attrs["units"]``.
     """
     ts_df = ts_df.copy()
+    _set_units(ts_df, units_map)
+    return ts_df
+
+
+def _set_units(ts_df: pd.DataFrame, units_map: Mapping) -> None:
+    # set the units metadata in place, e.g., on the (new) data frames of the clients'
+    # post-processing, which are not copied
     ts_df.attrs = ts_df.attrs.copy()
     ts_df.attrs["units"] = dict(units_map)
-    return ts_df
 
 
 def _convert_series_units(series: pd.Series, from_unit: str, to_unit: str) -> pd.Series:
@@ -106,6 +112,5 @@ def convert_units(
         if from_unit == to_unit:
             continue
         ts_df[col] = _convert_series_units(ts_df[col], from_unit, to_unit)
-    ts_df.attrs = ts_df.attrs.copy()
-    ts_df.attrs["units"] = dict(target_units)
+    _set_units(ts_df, target_units)
     return ts_df
@@ -1,26 +1,56 @@
 """Tests for Meteora."""
 
+import asyncio
+import glob
+import gzip
+import hashlib
 import importlib
 import inspect
+import io
 import json
 import logging as lg
 import os
+import pickle
 import sys
+import tempfile
+import time
+import tracemalloc
 import unittest
 from collections.abc import Generator
+from concurrent import futures
 from os import path
 
 import geopandas as gpd
+import httpx
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+import pooch
 import pook
 import pytest
+import requests
+import requests_cache
 import xarray as xr
 import xclim.indices as xci
 from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype
 
-from meteora import climate_indices, qc, settings, units, utils
+from meteora import (
+    aio,
+    cache,
+    climate_indices,
+    concurrency,
+    parsing,
+    qc,
+    query,
+    rate_limit,
+    retry,
+    sessions,
+    settings,
+    single_flight,
+    store,
+    units,
+    utils,
+)
 from meteora.clients import (
     AemetClient,
     AgrometeoClient,
@@ -32,8 +62,14 @@ from meteora.clients import (
     MeteoSwissClient,
     NetatmoClient,
 )
-from meteora.clients.base import BaseClient
+from meteora.clients.base import (
+    BaseClient,
+    BaseFileClient,
+    BaseJSONClient,
+    BaseTextClient,
+)
 from meteora.clients.mixins import (
+    APIKeyParamMixin,
     StationPartitionedTSMixin,
     StationsEndpointMixin,
     TimePartitionedTSMixin,
@@ -46,6 +82,18 @@ tests_dir = "tests"
 tests_data_dir = path.join(tests_dir, "data")
 
 
+@pytest.fixture(autouse=True, scope="session")
+def tmp_settings(
+    tmp_path_factory: pytest.TempPathFactory,
+) -> Generator[None, None, None]:
+    """Write the logs and the HTTP cache to a temporary directory."""
+    tmp_dir = tmp_path_factory.mktemp("meteora")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(settings, "LOGS_FOLDER", str(tmp_dir / "logs"))
+        monkeypatch.setattr(settings, "CACHE_NAME", str(tmp_dir / "meteora-cache"))
+        yield
+
+
 @pytest.fixture
 def unload_xarray(monkeypatch: pytest.MonkeyPatch) -> Generator[None, None, None]:
     """Fake that xarray is not installed.
@@ -158,6 +206,65 @@ class DummyUnitsClient(VariablesHardcodedMixin, BaseClient):
         return pd.DataFrame(data, index=idx)
 
 
+class DummyLeafClient(VariablesHardcodedMixin, BaseClient):
+    X_COL = "x"
+    Y_COL = "y"
+    CRS = "epsg:4326"
+    _stations_gdf_id_col = settings.STATIONS_ID_COL
+    _ts_df_time_col = settings.TIME_COL
+    _ts_df_stations_id_col = settings.STATIONS_ID_COL
+    _variables_id_col = "code"
+    _variables_label_col = "label"
+    _variables_dict = {"tmp": "Temperature", "hum": "Humidity"}
+    _ecv_dict = {
+        settings.ECV_TEMPERATURE: "tmp",
+        settings.ECV_RELATIVE_HUMIDITY: "hum",
+    }
+    _ts_endpoint = "dummy/{station_id}/{period:%Y%m%d}"
+    _time_partition_freq = "D"
+
+    def __init__(self, **kwargs):
+        self.region = [0.0, 0.0, 1.0, 1.0]
+        super().__init__()
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    def _ts_params(self, variable_ids, start, end):
+        return dict(
+            variable_ids=variable_ids, start=pd.Timestamp(start), end=pd.Timestamp(end)
+        )
+
+    def _ts_df_from_endpoint(self, ts_params):
+        # one hourly record per (station, day) partition
+        idx = pd.MultiIndex.from_product(
+            [
+                [ts_params["station_id"]],
+                pd.date_range(ts_params["period"], periods=24, freq="h"),
+            ],
+            names=[settings.STATIONS_ID_COL, settings.TIME_COL],
+        )
+        return pd.DataFrame(
+            {
+                variable_id: np.arange(len(idx), dtype=float)
+                for variable_id in ts_params["variable_ids"]
+            },
+            index=idx,
+        )
+
+    def get_ts_df(self, variables, start, end):
+        return self._get_ts_df(variables, start, end)
+
+    async def aget_ts_df(self, variables, start, end):
+        return await self._aget_ts_df(variables, start, end)
+
+
+class DummyPartitionedClient(
+    StationPartitionedTSMixin, TimePartitionedTSMixin, DummyLeafClient
+):
+    def _iter_station_ids(self):
+        return ["A", "B", "C"]
+
+
 class TestUtils(unittest.TestCase):
     def setUp(self):
         self.ts_df = pd.read_csv(
@@ -213,6 +320,12 @@ class TestUtils(unittest.TestCase):
             source_units={"temperature": "degC"},
         )
         pd.testing.assert_frame_equal(result, result_from_attrs)
+        # the returned data frames do not share the data of the input
+        result = units.convert_units(
+            ts_df, {"temperature": "degF"}, source_units=source_units
+        )
+        result.iloc[0, 0] = 0.0
+        self.assertEqual(ts_df.iloc[0, 0], 32.0)
 
     @pytest.mark.usefixtures("unload_xarray")
     def test_long_to_cube_missing_xarray(self):
@@ -681,6 +794,117 @@ def test_qc():
     ) <= len(indoor_stations)
 
 
+class DummyJSONClient(TimePartitionedTSMixin, VariablesHardcodedMixin, BaseJSONClient):
+    X_COL = "x"
+    Y_COL = "y"
+    CRS = "epsg:4326"
+    _stations_gdf_id_col = settings.STATIONS_ID_COL
+    _ts_df_time_col = settings.TIME_COL
+    _ts_df_stations_id_col = settings.STATIONS_ID_COL
+    _variables_id_col = "code"
+    _variables_label_col = "label"
+    _variables_dict = {"tmp": "Temperature"}
+    _ecv_dict = {settings.ECV_TEMPERATURE: "tmp"}
+    _ts_endpoint = "https://example.com/ts/{period:%Y%m%d}"
+    _time_partition_freq = "D"
+
+    def __init__(self):
+        self.region = [0.0, 0.0, 1.0, 1.0]
+        super().__init__()
+        self.progress = False
+
+    def _ts_params(self, variable_ids, start, end):
+        return dict(
+            variable_ids=variable_ids, start=pd.Timestamp(start), end=pd.Timestamp(end)
+        )
+
+    def _ts_query_params(self, ts_params):
+        return {}
+
+    def _ts_df_from_content(self, response_content):
+        return (
+            pd.DataFrame(response_content)
+            .assign(
+                **{settings.TIME_COL: lambda df: pd.to_datetime(df[settings.TIME_COL])}
+            )
+            .set_index([settings.STATIONS_ID_COL, settings.TIME_COL])
+        )
+
+    def get_ts_df(self, variables, start, end):
+        return self._get_ts_df(variables, start, end)
+
+    async def aget_ts_df(self, variables, start, end):
+        return await self._aget_ts_df(variables, start, end)
+
+
+class DummyCSVClient(DummyJSONClient, BaseTextClient):
+    _ts_endpoint = "https://csv.example.com/ts/{period:%Y%m%d}"
+
+    def _get_content_from_response(self, response):
+        return BaseTextClient._get_content_from_response(self, response)
+
+    def _ts_df_from_content(self, response_content):
+        with response_content:
+            return pd.read_csv(
+                response_content,
+                parse_dates=[settings.TIME_COL],
+                index_col=[settings.STATIONS_ID_COL, settings.TIME_COL],
+            )
+
+
+class DummyFileClient(BaseFileClient):
+    _ts_endpoint = "https://files.example.com/{period}.csv"
+
+    def __init__(self, path):
+        super().__init__()
+        self.pooch_kwargs = {"path": path}
+
+    def _ts_df_from_url(self, url, ts_params):
+        return pd.read_csv(self._ts_source(url, ts_params))
+
+    # the dummy files have no stations, time or variables
+    def _ts_parsed_params(self, ts_params):
+        return ts_params
+
+    def _select_ts_df(self, ts_df, ts_params):
+        return ts_df
+
+
+class APIKeyDummyJSONClient(APIKeyParamMixin, DummyJSONClient):
+    _api_key_param_name = "key"
+
+    def __init__(self, api_key):
+        self._api_key = api_key
+        super().__init__()
+
+
+class MockTSTransport(httpx.AsyncBaseTransport):
+    """Serve one day of hourly records per request and track the request count."""
+
+    def __init__(self):
+        self.n_requests = 0
+        self.n_concurrent = 0
+        self.max_concurrent = 0
+
+    async def handle_async_request(self, request):
+        self.n_requests += 1
+        self.n_concurrent += 1
+        self.max_concurrent = max(self.max_concurrent, self.n_concurrent)
+        await asyncio.sleep(0.01)
+        self.n_concurrent -= 1
+        day = pd.Timestamp(request.url.path.split("/")[-1])
+        return httpx.Response(
+            200,
+            json={
+                settings.STATIONS_ID_COL: ["A"] * 24,
+                settings.TIME_COL: pd.date_range(day, periods=24, freq="h")
+                .astype(str)
+                .tolist(),
+                "tmp": list(range(24)),
+            },
+        )
+
+
 class TestClientUnits(unittest.TestCase):
     def test_get_ts_df_units(self):
         client = DummyUnitsClient()
@@ -731,6 +955,14 @@ class TestProgress(unittest.TestCase):
         client.progress = True
         self.assertTrue(client.progress)
 
+    def test_client_executor_default(self):
+        client = MeteoSwissClient(region=self.REGION)
+        self.assertEqual(client.executor, settings.EXECUTOR)
+        # GHCNh fetches its (station, year) files concurrently by default
+        self.assertEqual(GHCNHourlyClient(region=self.REGION).executor, "thread")
+        client = GHCNHourlyClient(region=self.REGION, executor="serial")
+        self.assertEqual(client.executor, "serial")
+
     def test_should_show_progress_meteoswiss(self):
         """MeteoSwiss uses Station + Time; station is outermost."""
         client = MeteoSwissClient(region=self.REGION, progress=True)
@@ -750,9 +982,9 @@ class TestProgress(unittest.TestCase):
         self.assertFalse(client._should_show_progress(StationPartitionedTSMixin))
 
     def test_should_show_progress_ghcnh(self):
-        """GHCNh overrides _ts_df_from_endpoint; no mixin shows progress."""
+        """GHCNh uses Station + Time; station is outermost."""
         client = GHCNHourlyClient(region=self.REGION, progress=True)
-        self.assertFalse(client._should_show_progress(StationPartitionedTSMixin))
+        self.assertTrue(client._should_show_progress(StationPartitionedTSMixin))
         self.assertFalse(client._should_show_progress(TimePartitionedTSMixin))
 
     def test_should_show_progress_disabled(self):
@@ -761,6 +993,1648 @@ class TestProgress(unittest.TestCase):
         self.assertFalse(client._should_show_progress(TimePartitionedTSMixin))
 
 
+class TestExecutors(unittest.TestCase):
+    def test_get_executor(self):
+        for executor, executor_cls in concurrency.EXECUTOR_DICT.items():
+            self.assertIsInstance(concurrency.get_executor(executor), executor_cls)
+        executor = concurrency.ThreadExecutor(max_workers=2)
+        self.assertIs(concurrency.get_executor(executor), executor)
+        with pytest.raises(ValueError):
+            concurrency.get_executor("foo")
+
+    def test_partitioned_executors(self):
+        variables = ["temperature", "relative_humidity"]
+        client = DummyPartitionedClient(progress=False, executor="serial")
+        serial_ts_df = client.get_ts_df(variables, "2022-03-22", "2022-03-24")
+        # three stations times three days of hourly records
+        self.assertEqual(len(serial_ts_df), 3 * 3 * 24)
+        for executor in [
+            "thread",
+            "process",
+            "dask",
+            concurrency.ThreadExecutor(max_workers=2),
+        ]:
+            client.executor = executor
+            ts_df = client.get_ts_df(variables, "2022-03-22", "2022-03-24")
+            pd.testing.assert_frame_equal(ts_df, serial_ts_df)
+        # the outermost bar still works with concurrent executors
+        client.progress = True
+        client.executor = "thread"
+        pd.testing.assert_frame_equal(
+            client.get_ts_df(variables, "2022-03-22", "2022-03-24"), serial_ts_df
+        )
+
+
+class TestAsync(unittest.TestCase):
+    def setUp(self):
+        sessions.clear_sessions()
+        with override_settings(settings, CACHE_BACKEND="memory"):
+            self.client = DummyJSONClient()
+        self.transport = MockTSTransport()
+
+    async def _aget_ts_df(self, client, *args, max_concurrency=None):
+        async with aio.async_client(
+            transport=self.transport, max_concurrency=max_concurrency
+        ):
+            return await client.aget_ts_df(*args)
+
+    def test_cache(self):
+        request = self.client._prepare_request(
+            "https://example.com/ts/20220322", {}, {}
+        )
+
+        async def _send():
+            async with aio.async_client(transport=self.transport):
+                return [
+                    await aio.send(self.client._session, request.copy())
+                    for _ in range(2)
+                ]
+
+        response, cached_response = asyncio.run(_send())
+        self.assertEqual(self.transport.n_requests, 1)
+        self.assertFalse(response.from_cache)
+        self.assertTrue(cached_response.from_cache)
+        self.assertEqual(response.json(), cached_response.json())
+        # the synchronous session shares the same cache
+        self.assertTrue(
+            self.client._session.get("https://example.com/ts/20220322").from_cache
+        )
+
+    def test_aget_ts_df(self):
+        variables = ["temperature"]
+        ts_df = asyncio.run(
+            self._aget_ts_df(
+                self.client, variables, "2022-03-01", "2022-03-10", max_concurrency=3
+            )
+        )
+        self.assertEqual(len(ts_df), 10 * 24)
+        self.assertEqual(self.transport.n_requests, 10)
+        self.assertLessEqual(self.transport.max_concurrent, 3)
+        self.assertGreater(self.transport.max_concurrent, 1)
+        # same result as the synchronous path, which is served from the cache
+        pd.testing.assert_frame_equal(
+            self.client.get_ts_df(variables, "2022-03-01", "2022-03-10"), ts_df
+        )
+        # non-request clients run the synchronous implementation in a worker thread
+        client = DummyPartitionedClient(progress=False)
+        variables = ["temperature", "relative_humidity"]
+        pd.testing.assert_frame_equal(
+            asyncio.run(client.aget_ts_df(variables, "2022-03-22", "2022-03-24")),
+            client.get_ts_df(variables, "2022-03-22", "2022-03-24"),
+        )
+
+    def test_stale_while_revalidate(self):
+        url = "https://example.com/ts/20220322"
+        args = ("temperature", "2022-03-22", "2022-03-22")
+        with override_settings(
+            settings,
+            CACHE_BACKEND="memory",
+            CACHE_EXPIRE_HISTORICAL_TS=1,
+            CACHE_STALE_WHILE_REVALIDATE=True,
+            # the responses must come from the HTTP cache, not the in-memory tier
+            CACHE_MEMORY_MAX_SIZE=0,
+        ):
+            client = DummyJSONClient()
+            ts_df = asyncio.run(self._aget_ts_df(client, *args))
+            time.sleep(1.1)
+            # the expired response is served and refreshed in the background, which is
+            # completed before the asynchronous client is closed
+            stale_ts_df = asyncio.run(self._aget_ts_df(client, *args))
+            self.assertEqual(stale_ts_df.attrs["stale"], [url])
+            pd.testing.assert_frame_equal(stale_ts_df, ts_df)
+            self.assertEqual(self.transport.n_requests, 2)
+            self.assertEqual(client.get_ts_df(*args).attrs["stale"], [])
+            # failed refreshes are logged rather than raised
+            time.sleep(1.1)
+            transport = FlakyTransport([httpx.ConnectError("foo")])
+
+            async def _aget_ts_df():
+                async with aio.async_client(transport=transport):
+                    return await client.aget_ts_df(*args)
+
+            self.assertEqual(asyncio.run(_aget_ts_df()).attrs["stale"], [url])
+            self.assertEqual(transport.n_requests, 1)
+            self.assertEqual(aio._background_tasks, set())
+
+    def test_stale_if_error(self):
+        url = "https://example.com/ts/20220322"
+        args = ("temperature", "2022-03-22", "2022-03-22")
+        with override_settings(
+            settings,
+            CACHE_BACKEND="memory",
+            CACHE_EXPIRE_HISTORICAL_TS=1,
+            CACHE_STALE_IF_ERROR=True,
+            CACHE_MEMORY_MAX_SIZE=0,
+        ):
+            client = DummyJSONClient()
+            ts_df = asyncio.run(self._aget_ts_df(client, *args))
+            time.sleep(1.1)
+            # the request fails and the expired response is served instead
+            transport = FlakyTransport([500])
+
+            async def _aget_ts_df():
+                async with aio.async_client(transport=transport):
+                    return await client.aget_ts_df(*args)
+
+            stale_ts_df = asyncio.run(_aget_ts_df())
+            self.assertEqual(stale_ts_df.attrs["stale"], [url])
+            pd.testing.assert_frame_equal(stale_ts_df, ts_df)
+            self.assertEqual(transport.n_requests, 1)
+
+
+class RateLimitedDummyJSONClient(DummyJSONClient):
+    _ts_endpoint = "https://ratelimit.example.com/ts/{period:%Y%m%d}"
+    _rate_limits = [(100, 60)]
+
+
+class TestRateLimit(unittest.TestCase):
+    def test_rate_limiter(self):
+        rate_limiter = rate_limit.RateLimiter([(2, 0.5), (3, 2)])
+        waits = [rate_limiter._reserve() for _ in range(4)]
+        for wait, expected in zip(waits, [0, 0, 0.5, 2]):
+            self.assertAlmostEqual(wait, expected, delta=0.05)
+
+    def test_shared_budget(self):
+        rate_limiter = rate_limit.RateLimiter([(4, 0.2)])
+
+        async def _acquire():
+            await asyncio.gather(*(rate_limiter.aacquire() for _ in range(4)))
+
+        start = time.monotonic()
+        with futures.ThreadPoolExecutor(max_workers=4) as pool:
+            _futures = [pool.submit(rate_limiter.acquire) for _ in range(4)]
+            asyncio.run(_acquire())
+            for future in _futures:
+                future.result()
+        # 8 requests with a budget of 4 every 0.2 seconds
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+        self.assertIs(
+            rate_limit.get_rate_limiter("foo.example.com", [(1, 1)]),
+            rate_limit.get_rate_limiter("foo.example.com"),
+        )
+        self.assertIsNone(rate_limit.get_rate_limiter("bar.example.com"))
+
+    def test_cache_hits(self):
+        with override_settings(settings, CACHE_BACKEND="memory"):
+            client = RateLimitedDummyJSONClient()
+        rate_limiter = rate_limit.get_rate_limiter(
+            "ratelimit.example.com", client._rate_limits
+        )
+        args = (["temperature"], "2022-03-01", "2022-03-03")
+
+        async def _aget_ts_df():
+            async with aio.async_client(transport=MockTSTransport()):
+                return await client.aget_ts_df(*args)
+
+        for _ in range(2):
+            ts_df = asyncio.run(_aget_ts_df())
+            self.assertEqual(len(rate_limiter._request_times[0]), 3)
+        # the synchronous path shares the cache and the rate limiter
+        pd.testing.assert_frame_equal(client.get_ts_df(*args), ts_df)
+        self.assertEqual(len(rate_limiter._request_times[0]), 3)
+        with pook.use():
+            pook.get(
+                "https://ratelimit.example.com/ts/20220304",
+                reply=200,
+                response_json={
+                    settings.STATIONS_ID_COL: ["A"],
+                    settings.TIME_COL: ["2022-03-04"],
+                    "tmp": [0],
+                },
+            )
+            client.get_ts_df(["temperature"], "2022-03-04", "2022-03-04")
+        self.assertEqual(len(rate_limiter._request_times[0]), 4)
+
+    def test_netatmo_api_limit(self):
+        # bypass the authentication and the stations metadata
+        client = NetatmoClient.__new__(NetatmoClient)
+        client.progress = False
+        module_requests = [
+            (f"station{i}", f"module{i}", ["temperature"], {"module_id": i})
+            for i in range(10)
+        ]
+        client._ts_module_requests = lambda ts_params: module_requests
+        client._get_nodata_keys = lambda module_requests: set()
+        sent = []
+        n_in_flight = 0
+        max_in_flight = 0
+
+        async def _aget_module_json(params, nodata_keys):
+            nonlocal n_in_flight, max_in_flight
+            sent.append(params["module_id"])
+            n_in_flight += 1
+            max_in_flight = max(max_in_flight, n_in_flight)
+            await asyncio.sleep(0.01)
+            n_in_flight -= 1
+            if params["module_id"] >= 3:
+                return {"error": {"code": 26, "message": "User usage reached"}}
+            return {"body": [{"beg_time": 0, "step_time": 1800, "value": [[1.5]]}]}
+
+        client._aget_module_json = _aget_module_json
+        with override_settings(settings, ASYNC_MAX_CONCURRENCY=2):
+            ts_df = asyncio.run(client._ats_df_from_endpoint({}))
+        self.assertLessEqual(max_in_flight, 2)
+        # no further requests are sent once the API limit is reached
+        self.assertLess(len(sent), len(module_requests))
+        self.assertEqual(
+            list(ts_df.index.get_level_values(0)), ["station0", "station1", "station2"]
+        )
+
+
+class FlakyTransport(httpx.AsyncBaseTransport):
+    """Fail with the given errors (exceptions or status codes) before succeeding."""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.n_requests = 0
+
+    async def handle_async_request(self, request):
+        self.n_requests += 1
+        if self.errors:
+            error = self.errors.pop(0)
+            if isinstance(error, Exception):
+                raise error
+            return httpx.Response(error, headers={"Retry-After": "0"})
+        return httpx.Response(200, json={"foo": "bar"})
+
+
+class TestRetry(unittest.TestCase):
+    def setUp(self):
+        sessions.clear_sessions()
+        with override_settings(settings, CACHE_BACKEND="memory"):
+            self.client = DummyJSONClient()
+
+    def test_retry_policy(self):
+        retry_policy = retry.RetryPolicy(backoff_factor=1, max_backoff=3, jitter=0)
+        self.assertEqual(
+            [retry_policy.get_pause(attempt) for attempt in range(1, 5)], [1, 2, 3, 3]
+        )
+        response = requests.Response()
+        response.headers["Retry-After"] = "10"
+        self.assertEqual(retry_policy.get_pause(1, response=response), 10)
+        response.headers["Retry-After"] = "Wed, 21 Oct 2015 07:28:00 GMT"
+        self.assertEqual(retry_policy.get_pause(1, response=response), 1)
+        retry_policy = retry.RetryPolicy(backoff_factor=1, jitter=0.5)
+        for _ in range(10):
+            self.assertTrue(0.5 <= retry_policy.get_pause(1) <= 1)
+        self.assertTrue(retry_policy.is_retryable(exception=requests.ConnectionError()))
+        self.assertFalse(retry_policy.is_retryable(exception=ValueError()))
+        # only connection errors and server errors are outages
+        self.assertTrue(retry.is_outage(exception=requests.Timeout()))
+        response.status_code = 429
+        self.assertFalse(retry.is_outage(response=response))
+        response.status_code = 503
+        self.assertTrue(retry.is_outage(response=response))
+        # deprecated alias of the backoff factor
+        with override_settings(settings, ERROR_PAUSE=7):
+            with pytest.warns(DeprecationWarning):
+                self.assertEqual(retry.RetryPolicy().backoff_factor, 7)
+
+    def test_circuit_breaker(self):
+        circuit_breaker = retry.CircuitBreaker(2, 0.1)
+        circuit_breaker.record_failure()
+        circuit_breaker.check()
+        circuit_breaker.record_failure()
+        self.assertTrue(circuit_breaker.is_open)
+        with pytest.raises(retry.CircuitOpenError):
+            circuit_breaker.check()
+        time.sleep(0.1)
+        # a single trial request is let through
+        circuit_breaker.check()
+        with pytest.raises(retry.CircuitOpenError):
+            circuit_breaker.check()
+        circuit_breaker.record_success()
+        self.assertFalse(circuit_breaker.is_open)
+        circuit_breaker.check()
+
+    def test_get_content_from_url(self):
+        retry_policy = retry.RetryPolicy(max_attempts=3, backoff_factor=0)
+
+        async def _aget_content_from_url(transport, url):
+            async with aio.async_client(transport=transport):
+                return await self.client._aget_content_from_url(
+                    url, retry_policy=retry_policy
+                )
+
+        # retryable status codes and connection errors
+        transport = FlakyTransport([503, httpx.ConnectError("foo")])
+        self.assertEqual(
+            asyncio.run(
+                _aget_content_from_url(transport, "https://retry.example.com/foo")
+            ),
+            {"foo": "bar"},
+        )
+        self.assertEqual(transport.n_requests, 3)
+        # maximum number of attempts
+        transport = FlakyTransport([503] * 3)
+        with pytest.raises(Exception, match="Server returned"):
+            asyncio.run(
+                _aget_content_from_url(transport, "https://retry.example.com/bar")
+            )
+        self.assertEqual(transport.n_requests, 3)
+        # non-retryable status codes are raised right away
+        transport = FlakyTransport([404])
+        with pytest.raises(Exception, match="Server returned"):
+            asyncio.run(
+                _aget_content_from_url(transport, "https://retry.example.com/baz")
+            )
+        self.assertEqual(transport.n_requests, 1)
+        # synchronous requests
+        url = "https://retry.example.com/qux"
+        with pook.use():
+            pook.get(url, reply=429, times=1)
+            pook.get(url, reply=200, response_json={"foo": "bar"})
+            self.assertEqual(
+                self.client._get_content_from_url(url, retry_policy=retry_policy),
+                {"foo": "bar"},
+            )
+
+    def test_decode_error(self):
+        # the responses that cannot be decoded are neither retried nor outages
+        url = "https://decode.example.com/foo"
+        retry_policy = retry.RetryPolicy(max_attempts=3, backoff_factor=0)
+        circuit_breaker = retry.get_circuit_breaker("decode.example.com")
+        circuit_breaker.record_failure()
+        with pook.use():
+            mock = pook.get(url, reply=200, response_body="not json")
+            with pytest.raises(requests.JSONDecodeError):
+                self.client._get_content_from_url(url, retry_policy=retry_policy)
+        self.assertEqual(mock.calls, 1)
+        self.assertEqual(circuit_breaker._n_failures, 0)
+
+        async def _aget_content_from_url():
+            transport = httpx.MockTransport(
+                lambda request: httpx.Response(200, content=b"not json")
+            )
+            async with aio.async_client(transport=transport):
+                return await self.client._aget_content_from_url(
+                    f"{url}/bar", retry_policy=retry_policy
+                )
+
+        circuit_breaker.record_failure()
+        with pytest.raises(requests.JSONDecodeError):
+            asyncio.run(_aget_content_from_url())
+        self.assertEqual(circuit_breaker._n_failures, 0)
+
+    def test_circuit_breaker_fail_fast(self):
+        transport = FlakyTransport([503] * 10)
+
+        async def _aget_content_from_url(url="https://down.example.com/foo"):
+            async with aio.async_client(transport=transport):
+                return await self.client._aget_content_from_url(
+                    url, retry_policy=retry.RetryPolicy(backoff_factor=0)
+                )
+
+        with override_settings(
+            settings, CIRCUIT_BREAKER_THRESHOLD=3, CIRCUIT_BREAKER_TIMEOUT=0.2
+        ):
+            with pytest.raises(retry.CircuitOpenError):
+                asyncio.run(_aget_content_from_url())
+        self.assertEqual(transport.n_requests, 3)
+
+        # the queued requests wait for a single trial request, and fail with it
+        async def _gather():
+            return await asyncio.gather(
+                _aget_content_from_url("https://down.example.com/bar"),
+                _aget_content_from_url("https://down.example.com/baz"),
+                return_exceptions=True,
+            )
+
+        for result in asyncio.run(_gather()):
+            self.assertIsInstance(result, retry.CircuitOpenError)
+        self.assertEqual(transport.n_requests, 4)
+        # the queued requests are sent once the trial request succeeds
+        time.sleep(0.2)
+        transport = FlakyTransport([])
+        self.assertEqual(asyncio.run(_gather()), [{"foo": "bar"}] * 2)
+        self.assertFalse(retry.get_circuit_breaker("down.example.com").is_open)
+
+    def test_circuit_breaker_throttling(self):
+        # throttling (429) does not open the circuit
+        url = "https://throttled.example.com/foo"
+        transport = FlakyTransport([429] * 3)
+
+        async def _aget_content_from_url():
+            async with aio.async_client(transport=transport):
+                return await self.client._aget_content_from_url(
+                    url,
+                    retry_policy=retry.RetryPolicy(max_attempts=4, backoff_factor=0),
+                )
+
+        with override_settings(settings, CIRCUIT_BREAKER_THRESHOLD=2):
+            self.assertEqual(asyncio.run(_aget_content_from_url()), {"foo": "bar"})
+        self.assertEqual(transport.n_requests, 4)
+        self.assertFalse(retry.get_circuit_breaker("throttled.example.com").is_open)
+
+
+class TestSessions(unittest.TestCase):
+    def setUp(self):
+        sessions.clear_sessions()
+
+    def test_get_session(self):
+        with override_settings(settings, CACHE_BACKEND="memory", POOL_MAXSIZE=4):
+            client = DummyJSONClient()
+            # clients of the same provider share the pooled session
+            self.assertIs(DummyJSONClient()._session, client._session)
+            self.assertIs(
+                sessions.get_session(
+                    "example.com",
+                    cache=True,
+                    urls_expire_after=client._urls_expire_after,
+                ),
+                client._session,
+            )
+            self.assertIsInstance(client._session, requests_cache.CachedSession)
+            adapter = client._session.get_adapter("https://example.com")
+            self.assertIsInstance(adapter, rate_limit.RateLimitAdapter)
+            self.assertEqual(adapter._pool_maxsize, 4)
+            # uncached sessions are pooled separately
+            session = sessions.get_session("example.com", cache=False)
+            self.assertNotIsInstance(session, requests_cache.CachedSession)
+            self.assertIs(sessions.get_session("example.com", cache=False), session)
+        with override_settings(settings, CACHE_BACKEND="memory", POOL_MAXSIZE=8):
+            self.assertIsNot(DummyJSONClient()._session, client._session)
+        sessions.clear_sessions()
+        with override_settings(settings, CACHE_BACKEND="memory", POOL_MAXSIZE=4):
+            self.assertIsNot(DummyJSONClient()._session, client._session)
+
+    def test_cache_keys(self):
+        url = "https://example.com/ts/20220322"
+        with override_settings(settings, CACHE_BACKEND="memory"), pook.use():
+            pook.get(url, reply=200, response_json={"a": 1})
+            client = APIKeyDummyJSONClient("foo")
+            self.assertEqual(
+                client._get_content_from_url(url, params={"b": 2, "a": 1}), {"a": 1}
+            )
+            # the credentials and the order of the parameters do not matter
+            other_client = APIKeyDummyJSONClient("bar")
+            self.assertIs(other_client._session, client._session)
+            response = other_client._get(url, params={"a": 1, "b": 2})
+            self.assertTrue(response.from_cache)
+            self.assertNotIn("foo", response.url)
+
+    def test_urls_expire_after(self):
+        ts_url = "https://example.com/ts/20220322"
+        stations_url = "https://example.com/stations"
+
+        class LiveDummyJSONClient(DummyJSONClient):
+            _stations_endpoint = stations_url
+            _live_ts = True
+
+        with (
+            override_settings(settings, CACHE_BACKEND="memory", CACHE_EXPIRE_LIVE_TS=0),
+            pook.use(),
+        ):
+            client = LiveDummyJSONClient()
+            self.assertEqual(
+                client._session.settings.urls_expire_after,
+                {
+                    "https://example.com/ts/*": 0,
+                    # the stations fall back to `CACHE_EXPIRE` by default
+                    stations_url: settings.CACHE_EXPIRE,
+                },
+            )
+            ts_mock = pook.get(ts_url, reply=200, response_json={"a": 1}, times=2)
+            stations_mock = pook.get(
+                stations_url, reply=200, response_json={"b": 1}, times=2
+            )
+            for _ in range(2):
+                client._get_content_from_url(ts_url)
+                client._get_content_from_url(stations_url)
+            # the live time series expire right away whereas the stations are served
+            # from the cache
+            self.assertEqual(ts_mock.calls, 2)
+            self.assertEqual(stations_mock.calls, 1)
+
+    def test_accept_encoding(self):
+        session = sessions.get_session("example.com", cache=False)
+        self.assertIn("gzip", session.headers["Accept-Encoding"])
+        with override_settings(settings, ACCEPT_ENCODING="identity"):
+            session = sessions.get_session("example.com", cache=False)
+            self.assertEqual(session.headers["Accept-Encoding"], "identity")
+
+    def test_session_downloader(self):
+        url = "https://files.example.com/foo.csv"
+        downloader = sessions.SessionDownloader(
+            sessions.get_session("files.example.com", cache=False)
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir, pook.use():
+            pook.get(url, reply=200, response_body="a,b\n1,2\n")
+            filepath = pooch.retrieve(url, None, path=tmp_dir, downloader=downloader)
+            pd.testing.assert_frame_equal(
+                pd.read_csv(filepath), pd.DataFrame({"a": [1], "b": [2]})
+            )
+
+    def test_revalidation(self):
+        url = "https://files.example.com/recent.csv"
+        with (
+            tempfile.TemporaryDirectory() as tmp_dir,
+            override_settings(settings, CACHE_NAME=path.join(tmp_dir, "cache")),
+            pook.use(),
+        ):
+            client = DummyFileClient(tmp_dir)
+            pook.get(
+                url,
+                reply=200,
+                response_body="a\n1\n",
+                response_headers={"ETag": '"v1"'},
+            )
+            filepath = client._retrieve_file(url, revalidate=True)
+            self.assertEqual(sessions.read_validators(filepath), {"ETag": '"v1"'})
+            # unchanged file: the server replies 304 and the local file is reused
+            pook.get(url, headers={"If-None-Match": '"v1"'}, reply=304)
+            self.assertEqual(client._retrieve_file(url, revalidate=True), filepath)
+            pd.testing.assert_frame_equal(
+                pd.read_csv(filepath), pd.DataFrame({"a": [1]})
+            )
+            # updated file
+            pook.get(
+                url,
+                headers={"If-None-Match": '"v1"'},
+                reply=200,
+                response_body="a\n2\n",
+                response_headers={"ETag": '"v2"'},
+            )
+            client._retrieve_file(url, revalidate=True)
+            pd.testing.assert_frame_equal(
+                pd.read_csv(filepath), pd.DataFrame({"a": [2]})
+            )
+            # the file is not revalidated again before it expires
+            self.assertEqual(
+                client._retrieve_file(url, revalidate=True, expire_after=60), filepath
+            )
+            # once final, the file is revalidated one last time and then served from
+            # the cache without any request
+            pook.get(url, headers={"If-None-Match": '"v2"'}, reply=304)
+            client._retrieve_file(url)
+            self.assertIsNone(sessions.read_validators(filepath))
+            self.assertEqual(client._retrieve_file(url), filepath)
+            self.assertTrue(pook.isdone())
+
+    def test_file_compression(self):
+        urls = [f"https://files.example.com/{i}.csv" for i in range(2)]
+        body = b"a,b\n" + b"1,2\n" * 100
+        known_hash = f"sha256:{hashlib.sha256(body).hexdigest()}"
+        with (
+            tempfile.TemporaryDirectory() as tmp_dir,
+            override_settings(
+                settings,
+                CACHE_NAME=path.join(tmp_dir, "cache"),
+                CACHE_FILE_COMPRESSION="gzip",
+            ),
+            pook.use(),
+        ):
+            client = DummyFileClient(tmp_dir)
+            pook.get(urls[0], reply=200, response_body=body)
+            # the file with an outdated hash is downloaded again
+            pook.get(urls[1], reply=200, response_body=body, times=2)
+            # the hash is checked on the content before compression
+            filepath = client._retrieve_file(urls[0], known_hash=known_hash)
+            self.assertTrue(filepath.endswith(".gz"))
+            self.assertLess(path.getsize(filepath), len(body))
+            with gzip.open(filepath) as src:
+                self.assertEqual(src.read(), body)
+            pd.testing.assert_frame_equal(
+                pd.read_csv(filepath), pd.DataFrame({"a": [1] * 100, "b": [2] * 100})
+            )
+            # the cached file is reused
+            self.assertEqual(
+                client._retrieve_file(urls[0], known_hash=known_hash), filepath
+            )
+            # with an outdated hash, the updated download is accepted
+            filepath = client._retrieve_file(urls[1], known_hash="sha256:0")
+            with gzip.open(filepath) as src:
+                self.assertEqual(src.read(), body)
+            self.assertTrue(pook.isdone())
+            with self.assertRaises(ValueError):
+                client._retrieve_file(urls[0], compression="bz2")
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_do(self):
+        group = single_flight.SingleFlight()
+        n_calls = 0
+        release = futures.Future()
+
+        def _func():
+            nonlocal n_calls
+            n_calls += 1
+            return release.result()
+
+        with futures.ThreadPoolExecutor(4) as executor:
+            results = [executor.submit(group.do, "key", _func) for _ in range(4)]
+            # wait for all the callers to join the in-flight call
+            while group._calls.get("key") is None or group._calls["key"].n_callers < 4:
+                time.sleep(0.01)
+            release.set_result(["a"])
+            results = [result.result() for result in results]
+        self.assertEqual(n_calls, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        # once done, the next call runs the function again
+        self.assertEqual(group.do("key", _func), ["a"])
+        self.assertEqual(n_calls, 2)
+        # exceptions are raised to all the callers
+        with self.assertRaises(ZeroDivisionError):
+            group.do("key", lambda: 1 / 0)
+
+    def test_ado(self):
+        sessions.clear_sessions()
+        with override_settings(settings, CACHE_BACKEND="memory"):
+            client = DummyJSONClient()
+        transport = MockTSTransport()
+        url = "https://example.com/ts/20220322"
+
+        async def _get_contents():
+            async with aio.async_client(transport=transport):
+                return await asyncio.gather(
+                    *[client._aget_content_from_url(url) for _ in range(3)]
+                )
+
+        contents = asyncio.run(_get_contents())
+        self.assertEqual(transport.n_requests, 1)
+        self.assertEqual(contents[0], contents[2])
+
+    def test_share_text_content(self):
+        client = DummyCSVClient()
+        content = io.TextIOWrapper(io.BytesIO(b"a\n1\n"), encoding="utf-8")
+        contents = client._share_content(content, 2)
+        self.assertEqual([_content.read() for _content in contents], ["a\n1\n"] * 2)
+
+
+class TestCache(unittest.TestCase):
+    def test_hybrid_cache(self):
+        small_url = "https://example.com/small"
+        large_url = "https://example.com/large"
+        large_body = "a,b\n" + "é,1\n" * 100
+        with tempfile.TemporaryDirectory() as tmp_dir, pook.use():
+            backend = cache.HybridCache(
+                path.join(tmp_dir, "cache"),
+                max_body_size=64,
+                serializer=requests_cache.serializers.Stage(pickle),
+            )
+            session = requests_cache.CachedSession(backend=backend)
+            pook.get(small_url, reply=200, response_json={"a": 1})
+            pook.get(
+                large_url,
+                reply=200,
+                response_body=large_body.encode("latin-1"),
+                response_headers={"Content-Type": "text/csv; charset=ISO-8859-1"},
+            )
+            for _ in range(2):
+                small_response = session.get(small_url)
+                large_response = session.get(large_url)
+            self.assertTrue(small_response.from_cache)
+            self.assertTrue(large_response.from_cache)
+            self.assertEqual(small_response.json(), {"a": 1})
+            self.assertEqual(large_response.text, large_body)
+            # only the large body is stored in a (compressed) file
+            self.assertEqual(
+                os.listdir(backend.responses.bodies_dir),
+                [f"{large_response.cache_key}.gz"],
+            )
+            self.assertLess(
+                path.getsize(
+                    backend.responses._body_filepath(large_response.cache_key)
+                ),
+                len(large_body),
+            )
+            backend.delete(large_response.cache_key)
+            self.assertEqual(os.listdir(backend.responses.bodies_dir), [])
+
+    def test_compressed_db_bodies(self):
+        url = "https://example.com/medium"
+        body = {"a": list(range(500))}
+        with tempfile.TemporaryDirectory() as tmp_dir, pook.use():
+            for compress_bodies in [True, False]:
+                backend = cache.HybridCache(
+                    path.join(tmp_dir, f"cache-{compress_bodies}"),
+                    compress_bodies=compress_bodies,
+                    serializer=requests_cache.serializers.Stage(pickle),
+                )
+                session = requests_cache.CachedSession(backend=backend)
+                pook.get(url, reply=200, response_json=body)
+                session.get(url)
+                response = session.get(url)
+                self.assertTrue(response.from_cache)
+                self.assertEqual(response.json(), body)
+                self.assertEqual(os.listdir(backend.responses.bodies_dir), [])
+                with backend.responses.connection() as con:
+                    ((db_size,),) = con.execute("SELECT LENGTH(value) FROM responses")
+                if compress_bodies:
+                    self.assertLess(db_size, len(response.content))
+                else:
+                    self.assertGreater(db_size, len(response.content))
+
+    def test_prune(self):
+        urls = [f"https://files.example.com/{i}.csv" for i in range(4)]
+        with (
+            tempfile.TemporaryDirectory() as tmp_dir,
+            override_settings(
+                settings,
+                CACHE_NAME=path.join(tmp_dir, "cache"),
+                CACHE_BACKEND="memory",
+            ),
+            pook.use(),
+        ):
+            client = DummyFileClient(tmp_dir)
+            for url in urls:
+                pook.get(url, reply=200, response_body="a\n1\n")
+            # accesses are not recorded without budgets
+            client._retrieve_file(urls[0])
+            self.assertFalse(path.exists(path.join(tmp_dir, "cache-index.sqlite")))
+            with override_settings(settings, CACHE_MAX_AGE=3600):
+                filepaths = [client._retrieve_file(url) for url in urls]
+                # the first file is the least recently used, but pinned
+                cache.pin(filepaths[0])
+                # the second file is accessed again, so the third one is the least
+                # recently used unpinned file
+                client._retrieve_file(urls[1])
+            cache_df = cache.inspect()
+            self.assertEqual(set(cache_df.index), set(filepaths))
+            self.assertEqual(cache_df.loc[filepaths[1], "hits"], 2)
+            self.assertTrue(cache_df.loc[filepaths[0], "pinned"])
+
+            # evict the least recently used unpinned file
+            evicted_df = cache.prune(max_size=cache_df["size"].sum() - 4)
+            self.assertEqual(list(evicted_df.index), [filepaths[2]])
+            self.assertFalse(path.exists(filepaths[2]))
+            # LFU evicts the least frequently used file
+            evicted_df = cache.prune(max_size=1, policy="lfu")
+            self.assertEqual(list(evicted_df.index), [filepaths[3], filepaths[1]])
+            self.assertEqual(list(cache.inspect().index), [filepaths[0]])
+            self.assertTrue(path.exists(filepaths[0]))
+            with self.assertRaises(ValueError):
+                cache.prune(policy="fifo")
+
+    def test_stale_if_error(self):
+        urls = [f"https://example.com/ts/2022032{day}" for day in [2, 3]]
+        with (
+            override_settings(
+                settings,
+                CACHE_BACKEND="memory",
+                CACHE_EXPIRE_HISTORICAL_TS=1,
+                CACHE_STALE_IF_ERROR=True,
+            ),
+            pook.use(),
+        ):
+            client = DummyJSONClient()
+            for url in urls:
+                day = pd.Timestamp(url.rsplit("/", 1)[-1])
+                pook.get(
+                    url,
+                    reply=200,
+                    response_json={
+                        settings.STATIONS_ID_COL: ["A"] * 24,
+                        settings.TIME_COL: pd.date_range(day, periods=24, freq="h")
+                        .astype(str)
+                        .tolist(),
+                        "tmp": list(range(24)),
+                    },
+                    response_headers={"ETag": '"v1"'},
+                )
+            ts_df = client.get_ts_df("temperature", "2022-03-22", "2022-03-23")
+            self.assertEqual(ts_df.attrs["stale"], [])
+            # once the responses expire, the first day fails and is served from the
+            # cache whereas the second one is revalidated
+            time.sleep(1.1)
+            pook.get(urls[0], reply=500)
+            pook.get(urls[1], headers={"If-None-Match": '"v1"'}, reply=304)
+            stale_ts_df = client.get_ts_df("temperature", "2022-03-22", "2022-03-23")
+            self.assertEqual(stale_ts_df.attrs["stale"], [urls[0]])
+            pd.testing.assert_frame_equal(stale_ts_df, ts_df)
+            self.assertTrue(pook.isdone())
+
+    def test_stale_while_revalidate(self):
+        url = "https://example.com/ts/20220322"
+        day = pd.Timestamp("2022-03-22")
+        args = ("temperature", "2022-03-22", "2022-03-22")
+        with (
+            override_settings(
+                settings,
+                CACHE_BACKEND="memory",
+                CACHE_EXPIRE_HISTORICAL_TS=1,
+                CACHE_STALE_WHILE_REVALIDATE=True,
+                CACHE_MEMORY_MAX_SIZE=0,
+            ),
+            pook.use(),
+        ):
+            sessions.clear_sessions()
+            client = DummyJSONClient()
+            for i in range(2):
+                pook.get(
+                    url,
+                    reply=200,
+                    response_json={
+                        settings.STATIONS_ID_COL: ["A"] * 24,
+                        settings.TIME_COL: pd.date_range(day, periods=24, freq="h")
+                        .astype(str)
+                        .tolist(),
+                        "tmp": [i] * 24,
+                    },
+                )
+            ts_df = client.get_ts_df(*args)
+            time.sleep(1.1)
+            # the expired response is served and refreshed in a background thread
+            stale_ts_df = client.get_ts_df(*args)
+            self.assertEqual(stale_ts_df.attrs["stale"], [url])
+            pd.testing.assert_frame_equal(stale_ts_df, ts_df)
+            cache_key = client._get_cache_key(url, {})
+            for _ in range(50):
+                if not client._session.cache.get_response(cache_key).is_expired:
+                    break
+                time.sleep(0.1)
+            fresh_ts_df = client.get_ts_df(*args)
+            self.assertEqual(fresh_ts_df.attrs["stale"], [])
+            self.assertEqual(fresh_ts_df["temperature"].unique().tolist(), [1])
+            self.assertTrue(pook.isdone())
+
+    def test_aemet_data_urls(self):
+        # the temporary URLs of the AEMET data are not cached
+        data_url = "https://opendata.aemet.es/opendata/sh/abc123"
+        with (
+            override_settings(settings, CACHE_BACKEND="memory"),
+            pook.use(),
+        ):
+            sessions.clear_sessions()
+            client = AemetClient([0.0, 0.0, 1.0, 1.0], "dummy")
+            pook.get(data_url, reply=200, response_json=[{"a": 1}], times=2)
+            for _ in range(2):
+                self.assertEqual(
+                    client._get_data_content({"datos": data_url}), [{"a": 1}]
+                )
+            self.assertTrue(pook.isdone())
+            self.assertEqual(list(client._session.cache.responses.keys()), [])
+
+    def test_memory_cache(self):
+        memory_cache = cache.MemoryCache(8)
+        memory_cache.set("a", 1, 4)
+        memory_cache.set("b", 2, 4, expires=time.time() - 1)
+        memory_cache.set("c", 3, 4)
+        # "a" is evicted (least recently used) and "b" is expired
+        self.assertEqual(
+            [memory_cache.get(key) for key in ["a", "b", "c"]], [None, None, 3]
+        )
+        self.assertEqual(memory_cache.info(), cache.MemoryCacheInfo(1, 2, 1, 4, 8))
+        # entries larger than the budget are not stored
+        memory_cache.set("d", 4, 9)
+        self.assertIsNone(memory_cache.get("d"))
+
+        json_url = "https://example.com/stations"
+        csv_url = "https://csv.example.com/ts/20240101"
+        sessions.clear_sessions()
+        with override_settings(settings, CACHE_BACKEND="memory"), pook.use():
+            json_mock = pook.get(json_url, reply=200, response_json={"a": [1]})
+            csv_mock = pook.get(
+                csv_url,
+                reply=200,
+                response_body="a,b\r\n1,2\r\n",
+                response_headers={"Content-Type": "text/csv"},
+            )
+            json_client = DummyJSONClient()
+            csv_client = DummyCSVClient()
+            for _ in range(3):
+                self.assertEqual(
+                    json_client._get_content_from_url(json_url), {"a": [1]}
+                )
+                self.assertEqual(
+                    csv_client._get_content_from_url(csv_url).read(), "a,b\r\n1,2\r\n"
+                )
+            self.assertEqual((json_mock.calls, csv_mock.calls), (1, 1))
+            memory_cache_info = cache.memory_cache_info()
+            self.assertEqual((memory_cache_info.hits, memory_cache_info.misses), (4, 2))
+            # the tier is disabled with a zero budget
+            with override_settings(settings, CACHE_MEMORY_MAX_SIZE=0):
+                json_client._get_content_from_url(json_url)
+            self.assertEqual(cache.memory_cache_info().hits, 4)
+        sessions.clear_sessions()
+        self.assertEqual(cache.memory_cache_info().entries, 0)
+
+    def test_memory_cache_index(self):
+        class CredentialsClient(DummyJSONClient):
+            _credential_params = ("api_key",)
+
+        url = "https://example.com/stations"
+        with (
+            tempfile.TemporaryDirectory() as tmp_dir,
+            override_settings(
+                settings, CACHE_NAME=path.join(tmp_dir, "cache"), CACHE_MAX_AGE=3600
+            ),
+            pook.use(),
+        ):
+            mock = pook.get(url, reply=200, response_json={"a": [1]})
+            client = CredentialsClient()
+            client._session = requests_cache.CachedSession(
+                backend=requests_cache.SQLiteCache(
+                    path.join(tmp_dir, "cache"),
+                    serializer=requests_cache.serializers.Stage(pickle),
+                ),
+                ignored_parameters=sessions.cache_ignored_parameters(
+                    CredentialsClient._credential_params
+                ),
+            )
+            hits = cache.memory_cache_info().hits
+            # the credentials are not part of the key of the in-memory tier
+            for api_key in ["foo", "bar", "baz"]:
+                self.assertEqual(
+                    client._get_content_from_url(url, params={"api_key": api_key}),
+                    {"a": [1]},
+                )
+            self.assertEqual(mock.calls, 1)
+            self.assertEqual(cache.memory_cache_info().hits, hits + 2)
+            self.assertFalse(
+                any(
+                    "foo" in str(memory_key)
+                    for memory_key in cache.get_memory_cache()._entries
+                )
+            )
+            # the hits of the tier are recorded as accesses to the cached response
+            cache_key = client._get_cache_key(url, {"api_key": "foo"})
+            self.assertEqual(cache._get_index().to_frame().loc[cache_key, "hits"], 3)
+            client._session.close()
+
+    def test_nodata(self):
+        class PartitionedFileClient(TimePartitionedTSMixin, DummyFileClient):
+            _ts_endpoint = "https://files.example.com/{period:%Y%m%d}.csv"
+            _time_partition_freq = "D"
+
+            def _ts_df_from_url(self, url, ts_params):
+                try:
+                    return super()._ts_df_from_url(url, ts_params)
+                except requests.HTTPError:
+                    return pd.DataFrame()
+
+        urls = [f"https://files.example.com/2022032{day}.csv" for day in [2, 3]]
+        ts_params = {"start": "2022-03-22", "end": "2022-03-23"}
+        with (
+            tempfile.TemporaryDirectory() as tmp_dir,
+            override_settings(settings, CACHE_NAME=path.join(tmp_dir, "cache")),
+            pook.use(),
+        ):
+            client = PartitionedFileClient(tmp_dir)
+            client.executor = "serial"
+            pook.get(urls[0], reply=404)
+            pook.get(urls[1], reply=200, response_body="a\n1\n")
+            ts_df = client._ts_df_from_endpoint(ts_params)
+            self.assertEqual(cache.get_nodata(urls), {urls[0]})
+            # the partition without data is no longer requested
+            pd.testing.assert_frame_equal(client._ts_df_from_endpoint(ts_params), ts_df)
+            self.assertTrue(pook.isdone())
+            # until its record expires
+            with override_settings(settings, CACHE_NODATA_EXPIRE=0):
+                self.assertEqual(cache.get_nodata(urls), set())
+            cache.clear_nodata()
+            self.assertEqual(cache.get_nodata(urls), set())
+            # a missing live partition (e.g., the current period) is fetched again
+            client._ts_cache = lambda ts_params: (
+                client._format_ts_endpoint(ts_params) != urls[0]
+            )
+            pook.get(urls[0], reply=404, times=2)
+            for _ in range(2):
+                client._ts_df_from_endpoint(ts_params)
+            self.assertEqual(cache.get_nodata(urls), set())
+            self.assertTrue(pook.isdone())
+
+    def test_netatmo_coverage(self):
+        # bypass the authentication and the stations metadata
+        client = NetatmoClient.__new__(NetatmoClient)
+        client._session = requests.Session()
+        module_requests = [
+            (f"station{i}", f"module{i}", ["temperature"], {"module_id": f"module{i}"})
+            for i in range(3)
+        ]
+        client._ts_module_requests = lambda ts_params: module_requests
+        with (
+            tempfile.TemporaryDirectory() as tmp_dir,
+            override_settings(settings, CACHE_NAME=path.join(tmp_dir, "cache")),
+        ):
+            cache.record_nodata(client._module_nodata_key(module_requests[1][-1]))
+            # an entry for each `getmeasure` request
+            (entries,) = client._ts_cache_entries([{}])
+        self.assertEqual(
+            [entry["status"] for entry in entries], ["missing", "nodata", "missing"]
+        )
+        self.assertEqual(entries[0]["url"], f"{client._ts_endpoint}?module_id=module0")
+
+    def test_netatmo_nodata(self):
+        # bypass the authentication and the stations metadata
+        client = NetatmoClient.__new__(NetatmoClient)
+        client._get_content_from_url = lambda url, params: {"body": []}
+        now = time.time()
+        past_params = {"module_id": "module0", "real_time": False, "date_end": now - 60}
+        live_params = [
+            past_params | {"real_time": True},
+            past_params | {"date_end": now + 3600},
+        ]
+        with (
+            tempfile.TemporaryDirectory() as tmp_dir,
+            override_settings(settings, CACHE_NAME=path.join(tmp_dir, "cache")),
+        ):
+            # only the empty responses of final (past) windows are recorded
+            for params in [past_params, *live_params]:
+                self.assertEqual(client._get_module_json(params, set()), {"body": []})
+            keys = [
+                client._module_nodata_key(params)
+                for params in [past_params, *live_params]
+            ]
+            self.assertEqual(cache.get_nodata(keys), {keys[0]})
+
+    def test_coverage(self):
+        records = [{"station_id": "a", "time": "2022-03-22 00:00", "tmp": 1.0}]
+        with (
+            tempfile.TemporaryDirectory() as tmp_dir,
+            override_settings(
+                settings, CACHE_BACKEND="memory", CACHE_NAME=path.join(tmp_dir, "cache")
+            ),
+            pook.use(),
+        ):
+            sessions.clear_sessions()
+            # HTTP cache
+            pook.get(
+                "https://example.com/ts/20220322", reply=200, response_json=records
+            )
+            client = DummyJSONClient()
+            client.get_ts_df("tmp", "2022-03-22", "2022-03-22")
+            coverage = client.get_cache_coverage("tmp", "2022-03-22", "2022-03-23")
+            self.assertEqual(
+                coverage.coverage_df["status"].tolist(), ["cached", "missing"]
+            )
+            self.assertEqual(
+                coverage.coverage_df["period"].tolist(),
+                list(pd.date_range("2022-03-22", periods=2)),
+            )
+            self.assertEqual(coverage.n_requests, 1)
+            self.assertEqual(coverage.n_bytes, coverage.coverage_df["size"].iloc[0])
+            # SQLite-based backends are queried without reading the responses
+            backend = cache.HybridCache(
+                path.join(tmp_dir, "http"),
+                max_body_size=0,
+                serializer=requests_cache.serializers.Stage(pickle),
+            )
+            session = requests_cache.CachedSession(backend=backend)
+            pook.get("https://example.com/foo", reply=200, response_json=records)
+            key = session.get("https://example.com/foo").cache_key
+            self.assertEqual(
+                cache.lookup_responses(backend, [key, "bar"]).keys(), {key}
+            )
+            # file cache (and partitions known to have no data)
+            urls = [f"https://files.example.com/2022032{day}.csv" for day in [2, 3, 4]]
+            file_client = type(
+                "PartitionedFileClient",
+                (TimePartitionedTSMixin, DummyFileClient),
+                {
+                    "_ts_endpoint": "https://files.example.com/{period:%Y%m%d}.csv",
+                    "_time_partition_freq": "D",
+                    "_get_variable_id_ser": lambda self, variables: pd.Series(
+                        variables, dtype=object
+                    ),
+                },
+            )(tmp_dir)
+            pook.get(urls[0], reply=200, response_body="a\n1\n")
+            file_client._retrieve_file(urls[0])
+            cache.record_nodata(urls[1])
+            coverage = file_client.get_cache_coverage(
+                [], start="2022-03-22", end="2022-03-24"
+            )
+            self.assertEqual(coverage.coverage_df["url"].tolist(), urls)
+            self.assertEqual(
+                coverage.coverage_df["status"].tolist(), ["cached", "nodata", "missing"]
+            )
+            self.assertEqual((coverage.n_requests, coverage.n_bytes), (1, 4))
+            self.assertTrue(pook.isdone())
+
+    def test_parsed_partitions(self):
+        class CountingFileClient(DummyFileClient):
+            n_parsed = 0
+
+            def _ts_df_from_url(self, url, ts_params):
+                self.n_parsed += 1
+                return super()._ts_df_from_url(url, ts_params)
+
+        class StationFileClient(VariablesHardcodedMixin, CountingFileClient):
+            _ts_df_stations_id_col = settings.STATIONS_ID_COL
+            _ts_df_time_col = settings.TIME_COL
+            _variables_id_col = "code"
+            _variables_label_col = "label"
+            _variables_dict = {"tmp": "Temperature", "rh": "Relative humidity"}
+            _ts_parsed_params = BaseFileClient._ts_parsed_params
+            _select_ts_df = BaseFileClient._select_ts_df
+
+            def _ts_df_from_url(self, url, ts_params):
+                self.n_parsed += 1
+                return pd.read_csv(
+                    self._ts_source(url, ts_params),
+                    parse_dates=[settings.TIME_COL],
+                    index_col=[settings.STATIONS_ID_COL, settings.TIME_COL],
+                )[list(ts_params["variable_ids"])]
+
+        class CountingJSONClient(DummyJSONClient):
+            n_parsed = 0
+
+            def _ts_df_from_content(self, response_content):
+                self.n_parsed += 1
+                return super()._ts_df_from_content(response_content)
+
+        url = "https://files.example.com/20220322.csv"
+        records = [{"station_id": "a", "time": "2022-03-22 00:00", "tmp": 1.0}]
+        with (
+            tempfile.TemporaryDirectory() as tmp_dir,
+            override_settings(
+                settings,
+                CACHE_BACKEND="memory",
+                CACHE_NAME=path.join(tmp_dir, "cache"),
+                CACHE_PARSED_PARTITIONS=True,
+            ),
+            pook.use(),
+        ):
+            sessions.clear_sessions()
+            # files
+            pook.get(url, reply=200, response_body="a\n1\n")
+            client = CountingFileClient(tmp_dir)
+            ts_params = {"period": "20220322"}
+            ts_df = client._ts_df_from_endpoint(ts_params)
+            pd.testing.assert_frame_equal(client._ts_df_from_endpoint(ts_params), ts_df)
+            self.assertEqual(client.n_parsed, 1)
+            # the parsed partition is invalidated when the file changes
+            filepath = client._retrieve_file(url)
+            with open(filepath, "w") as f:
+                f.write("a\n2\n")
+            self.assertEqual(client._ts_df_from_endpoint(ts_params)["a"].tolist(), [2])
+            self.assertEqual(client.n_parsed, 2)
+            # the parsed partition is shared by the queries of other time ranges or
+            # variables
+            pook.get(
+                "https://files.example.com/station.csv",
+                reply=200,
+                response_body="station_id,time,tmp,rh\n"
+                "a,2022-03-22 00:00,1.0,50.0\na,2022-03-22 01:00,2.0,60.0\n",
+            )
+            client = StationFileClient(tmp_dir)
+            ts_params = {
+                "period": "station",
+                "variable_ids": ["tmp"],
+                "start": pd.Timestamp("2022-03-22 00:00"),
+                "end": pd.Timestamp("2022-03-22 00:00"),
+            }
+            ts_df = client._ts_df_from_endpoint(ts_params)
+            self.assertEqual(ts_df.columns.tolist(), ["tmp"])
+            self.assertEqual(ts_df["tmp"].tolist(), [1.0])
+            ts_params |= {
+                "variable_ids": ["rh"],
+                "end": pd.Timestamp("2022-03-22 01:00"),
+            }
+            ts_df = client._ts_df_from_endpoint(ts_params)
+            self.assertEqual(client.n_parsed, 1)
+            with override_settings(settings, CACHE_PARSED_PARTITIONS=False):
+                pd.testing.assert_frame_equal(
+                    client._ts_df_from_endpoint(ts_params), ts_df
+                )
+            self.assertEqual(ts_df["rh"].tolist(), [50.0, 60.0])
+            # responses
+            pook.get(
+                "https://example.com/ts/20220322", reply=200, response_json=records
+            )
+            client = CountingJSONClient()
+            ts_df = client.get_ts_df("tmp", "2022-03-22", "2022-03-22")
+            cache.clear_memory_cache()
+            pd.testing.assert_frame_equal(
+                client.get_ts_df("tmp", "2022-03-22", "2022-03-22"), ts_df
+            )
+            self.assertEqual(client.n_parsed, 1)
+            cache.clear_parsed()
+            client.get_ts_df("tmp", "2022-03-22", "2022-03-22")
+            self.assertEqual(client.n_parsed, 2)
+
+            # the validators are not computed if the parsed partitions are not cached
+            def _ts_response_validator(url, params):
+                raise AssertionError
+
+            client._ts_response_validator = _ts_response_validator
+            with override_settings(settings, CACHE_PARSED_PARTITIONS=False):
+                client.get_ts_df("tmp", "2022-03-22", "2022-03-22")
+
+    def test_offline(self):
+        urls = [f"https://files.example.com/2022032{day}.csv" for day in [2, 3]]
+        with (
+            tempfile.TemporaryDirectory() as tmp_dir,
+            override_settings(
+                settings,
+                CACHE_BACKEND="memory",
+                CACHE_NAME=path.join(tmp_dir, "cache"),
+                # the responses must come from the HTTP cache, not the in-memory tier
+                CACHE_MEMORY_MAX_SIZE=0,
+            ),
+            pook.use(),
+        ):
+            # requests and files that were cached online are served offline
+            pook.get("https://example.com/foo", reply=200, response_json={"a": 1})
+            pook.get(urls[0], reply=200, response_body="a\n1\n")
+            json_client = DummyJSONClient()
+            json_client._get_content_from_url("https://example.com/foo")
+            file_client = DummyFileClient(tmp_dir)
+            file_client._retrieve_file(urls[0])
+            # the files downloaded into memory are only stored in the HTTP cache if
+            # required
+            download_url = "https://files.example.com/download.csv"
+            pook.get(download_url, reply=200, response_body="a\n1\n", times=2)
+            file_client._retrieve_file(download_url, cache=False)
+            self.assertIsNone(file_client._get_cached_response(download_url))
+            with override_settings(settings, CACHE_DOWNLOADED_FILES=True):
+                file_client._retrieve_file(download_url, cache=False)
+            self.assertTrue(pook.isdone())
+            json_client.offline = True
+            file_client.offline = True
+            self.assertEqual(
+                file_client._retrieve_file(download_url, cache=False).read(),
+                b"a\n1\n",
+            )
+            self.assertEqual(
+                json_client._get_content_from_url("https://example.com/foo"), {"a": 1}
+            )
+            with self.assertRaises(cache.CacheMissError):
+                json_client._get_content_from_url("https://example.com/bar")
+            # the missing partitions are reported at once
+            file_client = type(
+                "PartitionedFileClient",
+                (TimePartitionedTSMixin, DummyFileClient),
+                {
+                    "_ts_endpoint": "https://files.example.com/{period:%Y%m%d}.csv",
+                    "_time_partition_freq": "D",
+                },
+            )(tmp_dir)
+            file_client.executor = "serial"
+            with (
+                override_settings(settings, OFFLINE=True),
+                self.assertRaises(cache.CacheMissError) as cm,
+            ):
+                file_client._ts_df_from_endpoint(
+                    {"start": "2022-03-22", "end": "2022-03-23"}
+                )
+            self.assertEqual(cm.exception.urls, urls[1:])
+            self.assertEqual(
+                cm.exception.partitions, [{"period": pd.Timestamp("2022-03-23")}]
+            )
+            self.assertEqual(
+                pickle.loads(pickle.dumps(cm.exception)).urls, cm.exception.urls
+            )
+
+
+class TestQuery(unittest.TestCase):
+    def test_query(self):
+        client = DummyPartitionedClient(executor="serial", progress=False)
+        ts_df = client.get_ts_df(["tmp", "hum"], "2022-03-22", "2022-03-24")
+        stations_gdf = gpd.GeoDataFrame(
+            geometry=gpd.points_from_xy([0.25, 0.75, 2.0], [0.5, 0.5, 2.0]),
+            index=pd.Index(["A", "B", "C"], name=settings.STATIONS_ID_COL),
+            crs="epsg:4326",
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for i, (_, station_ts_df) in enumerate(ts_df.groupby(level=0)):
+                station_ts_df.to_parquet(
+                    path.join(tmp_dir, f"{i}.parquet"), row_group_size=24
+                )
+            query_df = query.query(
+                tmp_dir,
+                region=[0.0, 0.0, 1.0, 1.0],
+                stations_gdf=stations_gdf,
+                start="2022-03-23",
+                end="2022-03-23 23:00",
+                variables=["hum"],
+            )
+            time_ser = ts_df.index.get_level_values(settings.TIME_COL)
+            pd.testing.assert_frame_equal(
+                query_df,
+                ts_df.loc[
+                    ["A", "B"],
+                    ["hum"],
+                ][
+                    time_ser[ts_df.index.get_level_values(0).isin(["A", "B"])].date
+                    == pd.Timestamp("2022-03-23").date()
+                ],
+                check_freq=False,
+            )
+            self.assertEqual(len(query.query(tmp_dir)), len(ts_df))
+            with self.assertRaises(ValueError):
+                query.query(tmp_dir, region=[0.0, 0.0, 1.0, 1.0])
+
+
+class TestStore(unittest.TestCase):
+    def test_sync(self):
+        class SyncClient(DummyPartitionedClient):
+            n_partitions = 0
+
+            @property
+            def stations_gdf(self):
+                return gpd.GeoDataFrame(
+                    index=pd.Index(["A", "B", "C"], name=settings.STATIONS_ID_COL)
+                )
+
+            def _ts_params(self, variable_ids, start, end):
+                # the (daily) partitions of the dummy start at `start`
+                return super()._ts_params(
+                    variable_ids, pd.Timestamp(start).floor("D"), end
+                )
+
+            def _partition_ts_df_from_endpoint(self, ts_params):
+                self.n_partitions += 1
+                return super()._partition_ts_df_from_endpoint(ts_params)
+
+        client = SyncClient(executor="serial", progress=False)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ts_store = store.ParquetStore(tmp_dir)
+            appended_df = client.sync("tmp", "2022-03-22", "2022-03-23 23:00", ts_store)
+            self.assertEqual(len(appended_df), 3 * 48)
+            self.assertEqual(client.n_partitions, 3 * 2)
+            # nothing is fetched if the store is in sync
+            self.assertTrue(
+                client.sync("tmp", "2022-03-22", "2022-03-23", tmp_dir).empty
+            )
+            self.assertEqual(client.n_partitions, 3 * 2)
+            # only the gap is fetched (i.e., the partitions that overlap it)
+            appended_df = client.sync("tmp", "2022-03-22", "2022-03-24 23:00", tmp_dir)
+            self.assertEqual(len(appended_df), 3 * 24)
+            self.assertEqual(client.n_partitions, 3 * 4)
+            expected_df = client.get_ts_df("tmp", "2022-03-22", "2022-03-24 23:00")
+            pd.testing.assert_frame_equal(
+                ts_store.read("SyncClient"), expected_df, check_freq=False
+            )
+            ts_store.compact("SyncClient")
+            self.assertEqual(
+                len(glob.glob(path.join(tmp_dir, "*", "*", "*", "*.parquet"))), 3
+            )
+            pd.testing.assert_frame_equal(
+                ts_store.read("SyncClient", stations=["A"], end="2022-03-22 23:00"),
+                expected_df.loc[["A"]].iloc[:24],
+                check_freq=False,
+            )
+
+    def test_read(self):
+        def _ts_df(variable, times):
+            return pd.DataFrame(
+                {variable: np.arange(len(times), dtype=float)},
+                index=pd.MultiIndex.from_product(
+                    [["A"], times], names=[settings.STATIONS_ID_COL, settings.TIME_COL]
+                ),
+            )
+
+        times = pd.date_range(
+            "2022-01-01 10:00", periods=2, freq="h", tz="Europe/Zurich"
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ts_store = store.ParquetStore(tmp_dir)
+            # variables synced separately, i.e., in different files
+            ts_store.append("P", _ts_df("tmp", times), times[0], times[-1])
+            ts_store.append("P", _ts_df("prec", times), times[0], times[-1])
+            for variables in [None, ["tmp", "prec"]]:
+                ts_df = ts_store.read("P", variables=variables)
+                self.assertEqual(set(ts_df.columns), {"tmp", "prec"})
+                self.assertFalse(ts_df.isna().any().any())
+            # naive and tz-aware bounds are UTC times
+            for start in ["2022-01-01 09:30", "2022-01-01 09:30+00:00"]:
+                self.assertEqual(
+                    list(ts_store.read("P", start=start).index.get_level_values(1)),
+                    [times[1]],
+                )
+
+    def test_append_empty(self):
+        ts_df = pd.DataFrame(
+            {"tmp": []},
+            index=pd.MultiIndex.from_arrays(
+                [[], pd.DatetimeIndex([])],
+                names=[settings.STATIONS_ID_COL, settings.TIME_COL],
+            ),
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ts_store = store.ParquetStore(tmp_dir)
+            # a period without data is recorded as synced for the requested stations
+            ts_store.append("P", ts_df, "2022-03-22", "2022-03-23", stations=["A", "B"])
+            self.assertEqual(
+                ts_store.gaps("P", ["A", "B"], ["tmp"], "2022-03-22", "2022-03-23"),
+                {},
+            )
+            # up to now if the period extends into the future
+            end = pd.Timestamp.now() + pd.Timedelta(days=1)
+            ts_store.append("P", ts_df, "2022-03-23", end, stations=["A"])
+            ((gap_start, gap_end),) = ts_store.gaps(
+                "P", ["A"], ["tmp"], "2022-03-22", end
+            )["A"]
+            self.assertLess(gap_start, pd.Timestamp.now() + pd.Timedelta(hours=1))
+            self.assertEqual(gap_end, end)
+
+
+class TestTextResponses(unittest.TestCase):
+    def setUp(self):
+        sessions.clear_sessions()
+
+    def test_streaming(self):
+        url = "https://csv.example.com/ts/20240101"
+        body = "station_id,time,tmp\nZürich,2024-01-01 00:00,1.5\n".encode("latin-1")
+        expected_df = pd.DataFrame(
+            {"tmp": [1.5]},
+            index=pd.MultiIndex.from_arrays(
+                [["Zürich"], pd.to_datetime(["2024-01-01 00:00"])],
+                names=[settings.STATIONS_ID_COL, settings.TIME_COL],
+            ),
+        )
+        for use_cache, stream in [(False, True), (True, True), (False, False)]:
+            with (
+                self.subTest(use_cache=use_cache, stream=stream),
+                override_settings(
+                    settings,
+                    USE_CACHE=use_cache,
+                    CACHE_BACKEND="memory",
+                    STREAM_TEXT_RESPONSES=stream,
+                ),
+                pook.use(),
+            ):
+                cache.clear_memory_cache()
+                pook.get(
+                    url,
+                    reply=200,
+                    response_body=body,
+                    response_headers={"Content-Type": "text/csv; charset=ISO-8859-1"},
+                )
+                client = DummyCSVClient()
+                # the responses memorized by the in-memory tier are streamed too
+                for _ in range(2 if use_cache else 1):
+                    content = client._get_content_from_url(url)
+                    self.assertIsInstance(
+                        content, io.TextIOWrapper if stream else io.StringIO
+                    )
+                    pd.testing.assert_frame_equal(
+                        client._ts_df_from_content(content), expected_df
+                    )
+                if use_cache:
+                    self.assertEqual(cache.memory_cache_info().hits, 1)
+
+
+class TestParsing(unittest.TestCase):
+    def test_engines(self):
+        psv_schema = parsing.CSVSchema(
+            sep="|",
+            dtypes={"STATION": "str"},
+            time_formats={"DATE": parsing.ISO8601},
+            value_dtype="float64",
+        )
+        psv_body = (
+            "STATION|DATE|temperature|wind_direction|remarks\n"
+            "USW1|2024-01-01T00:00:00|1.5|000|a\n"
+            "USW1|2024-01-01T01:00:00||270|b\n"
+        ).encode()
+        columns = ["STATION", "DATE", "temperature", "wind_direction", "pressure"]
+        expected_df = pd.DataFrame(
+            {
+                "STATION": ["USW1", "USW1"],
+                "DATE": pd.to_datetime(["2024-01-01 00:00", "2024-01-01 01:00"]),
+                "temperature": [1.5, np.nan],
+                "wind_direction": [0.0, 270.0],
+                "pressure": [np.nan, np.nan],
+            }
+        )
+        # explicit timestamp format, latin-1 encoded text stream
+        csv_schema = parsing.CSVSchema(
+            sep=";",
+            dtypes={"station_abbr": "str"},
+            time_formats={"reference_timestamp": "%d.%m.%Y %H:%M"},
+            na_values=["M"],
+            encoding="ISO-8859-1",
+        )
+        csv_body = (
+            "station_abbr;reference_timestamp;tre200s0\nZÜR;31.01.2024 23:50;M\n"
+        ).encode("latin-1")
+        expected_csv_df = pd.DataFrame(
+            {
+                "station_abbr": ["ZÜR"],
+                "reference_timestamp": pd.to_datetime(["2024-01-31 23:50"]),
+                "tre200s0": [np.nan],
+            }
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filepath = path.join(tmp_dir, "ts.psv.gz")
+            with gzip.open(filepath, "wb") as dst:
+                dst.write(psv_body)
+            for engine in parsing.CSV_ENGINES:
+                with self.subTest(engine=engine):
+                    with override_settings(settings, CSV_ENGINE=engine):
+                        ts_df = parsing.read_csv(filepath, psv_schema, columns=columns)
+                    pd.testing.assert_frame_equal(ts_df, expected_df)
+                    pd.testing.assert_frame_equal(
+                        parsing.read_csv(
+                            io.TextIOWrapper(io.BytesIO(csv_body), encoding="latin-1"),
+                            csv_schema,
+                            engine=engine,
+                        ),
+                        expected_csv_df,
+                    )
+        with self.assertRaises(ValueError):
+            parsing.read_csv(io.BytesIO(psv_body), psv_schema, engine="polars")
+
+    def test_coerce_ts_df(self):
+        ts_df = pd.DataFrame(
+            {"tmp": ["1.5", None], "hum": [80.0, 85.0]},
+            index=pd.MultiIndex.from_arrays(
+                [["1", "1"], ["2024-01-01 00:00", "2024-01-01 01:00"]],
+                names=[settings.STATIONS_ID_COL, settings.TIME_COL],
+            ),
+        )
+        coerced_df = parsing.coerce_ts_df(
+            ts_df, {"tmp": "float64", "hum": "float32"}, station_dtype="int64"
+        )
+        pd.testing.assert_frame_equal(
+            coerced_df,
+            pd.DataFrame(
+                {
+                    "tmp": [1.5, np.nan],
+                    "hum": np.array([80.0, 85.0], dtype="float32"),
+                },
+                index=pd.MultiIndex.from_arrays(
+                    [[1, 1], pd.to_datetime(["2024-01-01 00:00", "2024-01-01 01:00"])],
+                    names=[settings.STATIONS_ID_COL, settings.TIME_COL],
+                ),
+            ),
+        )
+        # the original data frame is not modified and already typed frames are kept
+        self.assertEqual(ts_df["tmp"].dtype, object)
+        self.assertIs(parsing.coerce_ts_df(coerced_df, {"tmp": "float64"}), coerced_df)
+
+        # the clients type the variables following their schema
+        client = DummyUnitsClient()
+        client._ts_schema = parsing.TSSchema(variable_dtypes={"dwpf": "float32"})
+        ts_df = client.get_ts_df(["tmpf", "dwpf"])
+        self.assertEqual(ts_df["tmpf"].dtype, "float64")
+        self.assertEqual(ts_df["dwpf"].dtype, "float32")
+
+
+class DummyLargeLeafClient(DummyLeafClient):
+    def _ts_df_from_endpoint(self, ts_params):
+        # one record every 10 seconds per (station, day) partition
+        idx = pd.MultiIndex.from_product(
+            [
+                [ts_params["station_id"]],
+                pd.date_range(ts_params["period"], periods=8640, freq="10s"),
+            ],
+            names=[settings.STATIONS_ID_COL, settings.TIME_COL],
+        )
+        return pd.DataFrame(
+            np.ones((len(idx), len(ts_params["variable_ids"]))),
+            index=idx,
+            columns=list(ts_params["variable_ids"]),
+        )
+
+
+class DummyLargePartitionedClient(
+    StationPartitionedTSMixin, TimePartitionedTSMixin, DummyLargeLeafClient
+):
+    def _iter_station_ids(self):
+        return ["A", "B", "C"]
+
+
+class TestPeakMemory(unittest.TestCase):
+    """Track the peak memory of `get_ts_df` relative to the size of its result."""
+
+    variables = ["tmp", "hum"]
+    start = "2022-03-22"
+    end = "2022-03-25"
+
+    def setUp(self):
+        self.client = DummyLargePartitionedClient(executor="serial", progress=False)
+        # warm up (e.g., the variables metadata and lazy imports)
+        self.client.get_ts_df(self.variables, self.start, self.start)
+        tracemalloc.start()
+
+    def tearDown(self):
+        tracemalloc.stop()
+
+    def test_get_ts_df(self):
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        ts_df = self.client.get_ts_df(self.variables, self.start, self.end)
+        _, peak = tracemalloc.get_traced_memory()
+        n_bytes = ts_df.memory_usage(index=True).sum()
+        # the partitions and their concatenation (i.e., not any further copies)
+        self.assertLess(peak - baseline, 3 * n_bytes)
+
+    def test_process_ts_df(self):
+        variable_id_ser = self.client._get_variable_id_ser(self.variables)
+        ts_params = self.client._ts_params(variable_id_ser, self.start, self.end)
+        raw_ts_df = self.client._ts_df_from_endpoint(ts_params)
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        ts_df = self.client._process_ts_df(raw_ts_df, variable_id_ser)
+        _, peak = tracemalloc.get_traced_memory()
+        # the labels, types and units are set without copying the data
+        self.assertLess(peak - baseline, 0.1 * raw_ts_df.memory_usage().sum())
+        for variable in self.variables:
+            self.assertTrue(
+                np.shares_memory(
+                    ts_df[variable].to_numpy(), raw_ts_df[variable].to_numpy()
+                )
+            )
+        self.assertEqual(
+            ts_df.index.names, [settings.STATIONS_ID_COL, settings.TIME_COL]
+        )
+        self.assertEqual(ts_df.attrs["units"], {"tmp": "degC", "hum": "percent"})
+
+
 class BaseClientTest:
     client_cls = None
     region = None